@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime
+import logging
+import time
+
+BACKFILL_STARTED = 'Начата догрузка статусов %s подписчиков, отставших на %s с'
+BACKFILL_FINISHED = 'Догружены статусы %s подписчиков за %.2f с'
+BACKFILL_ERROR = 'Сбой догрузки статусов подписчика %s: %s'
+
+
+def updated_at(homework):
+    """Время последнего изменения работы в секундах или None."""
+    date = homework.get('date_updated')
+    if not isinstance(date, str):
+        return None
+    try:
+        return datetime.fromisoformat(date.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+class Backfill:
+    """Догружает изменения статусов работ, пропущенные, пока бот не работал.
+    Для каждого подписчика, курсор которого отстал больше чем на lag
+    секунд, делается один запрос к API с from_date курсора: API не
+    принимает верхней границы, поэтому один ответ уже содержит все
+    пропущенные изменения, а окна лишь повторяли бы его части. Новым
+    курсором становится current_date ответа. Запросы подписчиков идут
+    одновременно, не более concurrency сразу, а их частоту ограничивает
+    ведро budget. request(from_date, headers) — сопрограмма запроса к API,
+    с флагом stream ей передаётся и индекс статусов подписчика, чтобы
+    длинный ответ разбирался потоком. check(ответ) возвращает проверенный
+    список работ.
+    """
+
+    def __init__(self, request, lag=86400, concurrency=4, budget=None,
+                 check=None, stream=False, clock=time.time):
+        """Запоминает функцию запроса и параметры догрузки."""
+        self.request = request
+        self.lag = lag
+        self.concurrency = concurrency
+        self.budget = budget
+        self.check = check or (lambda response: response['homeworks'])
+        self.stream = stream
+        self.clock = clock
+        self._semaphore = None
+
+    def pending(self, tenant):
+        """Проверяет, что курсор подписчика отстал больше чем на lag."""
+        return tenant.from_date < self.clock() - self.lag
+
+    async def _fetch(self, tenant):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            if self.budget is not None:
+                await self.budget.acquire()
+            if self.stream:
+                return await self.request(
+                    tenant.from_date, tenant.headers, index=tenant.statuses
+                )
+            return await self.request(tenant.from_date, tenant.headers)
+
+    async def collect(self, tenant):
+        """Возвращает пропущенные изменения подписчика и новый курсор.
+        Изменения упорядочены по date_updated от старых к новым, работы без
+        даты идут первыми. Если запрос не удался, исключение выбрасывается,
+        а курсор не сдвигается.
+        """
+        response = await self._fetch(tenant)
+        changes = [
+            homework for homework in self.check(response)
+            if tenant.statuses.changed(homework)
+        ]
+        changes.sort(key=lambda homework: updated_at(homework) or 0)
+        return changes, response.get('current_date')
+
+    async def _catch_up(self, tenant, emit):
+        try:
+            changes, current_date = await self.collect(tenant)
+            await emit(tenant, changes, current_date)
+        except Exception as error:
+            logging.exception(BACKFILL_ERROR, tenant, error)
+
+    async def run(self, tenants, emit):
+        """Догружает изменения отставших подписчиков tenants.
+        Изменения каждого подписчика передаются сопрограмме
+        emit(подписчик, изменения, current_date) по порядку. Сбой одного
+        подписчика не мешает остальным. Возвращает число догруженных
+        подписчиков, то есть запросов к API.
+        """
+        tenants = [tenant for tenant in tenants if self.pending(tenant)]
+        if not tenants:
+            return 0
+        logging.info(BACKFILL_STARTED, len(tenants), self.lag)
+        started = time.monotonic()
+        await asyncio.gather(*(
+            self._catch_up(tenant, emit) for tenant in tenants
+        ))
+        logging.info(
+            BACKFILL_FINISHED, len(tenants), time.monotonic() - started
+        )
+        return len(tenants)
@@ -0,0 +1,94 @@
+"""Измеряет пропускную способность догрузки пропущенных статусов.
+
+Заглушка Практикума отдаёт историю работ за HISTORY_DAYS дней, подписчики
+отстали на всю историю. Каждый подписчик догружается одним запросом с
+from_date курсора, догрузка выполняется с разным числом одновременных
+запросов, частота запросов ограничена ведром --rate.
+
+Запуск: python benchmarks/bench_backfill.py --tenants 200 --api-latency 0.05
+"""
+import argparse
+import asyncio
+from functools import partial
+from os.path import abspath, dirname
+import sys
+import time
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from backfill import Backfill  # noqa: E402
+from concurrency import Limiter  # noqa: E402
+import homework  # noqa: E402
+from ratelimit import TokenBucket  # noqa: E402
+from session import create_session  # noqa: E402
+from stubs import PRACTICUM_PATH, PracticumHandler  # noqa: E402
+from stubs import StubConfig, StubServer  # noqa: E402
+from tenants import TenantRegistry  # noqa: E402
+
+DAY = 86400
+HISTORY_DAYS = 30
+CONCURRENCY = (1, 4, 16)
+RESULT = (
+    'одновременно: {concurrency:>3}  подписчиков: {tenants:>5}  '
+    'подписчиков/с: {rate:>8.1f}  изменений: {changes}'
+)
+
+
+def parse_args():
+    """Разбирает параметры бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=200)
+    parser.add_argument('--homeworks', type=int, default=300)
+    parser.add_argument('--rate', type=float, default=10_000,
+                        help='ограничение запросов к API в секунду')
+    parser.add_argument('--api-latency', type=float, default=0.05)
+    return parser.parse_args()
+
+
+async def measure(args, session, concurrency, started):
+    """Догружает историю подписчиков и печатает их число в секунду."""
+    registry = TenantRegistry()
+    for number in range(args.tenants):
+        registry.add(f'token-{number}', number, from_date=started)
+    limiter = Limiter(concurrency, name='backfill')
+    changes = []
+
+    async def emit(tenant, tenant_changes, current_date):
+        changes.extend(tenant_changes)
+
+    backfill = Backfill(
+        partial(
+            limiter.run, partial(homework.request_api_answer, session=session)
+        ),
+        lag=DAY,
+        concurrency=concurrency,
+        budget=TokenBucket(args.rate),
+        check=homework.validate_response
+    )
+    began = time.perf_counter()
+    tenants = await backfill.run(registry, emit)
+    elapsed = time.perf_counter() - began
+    limiter.shutdown()
+    print(RESULT.format(
+        concurrency=concurrency, tenants=tenants, rate=tenants / elapsed,
+        changes=len(changes)
+    ))
+
+
+def main():
+    """Запускает бенчмарк."""
+    args = parse_args()
+    config = StubConfig(
+        args.api_latency, homeworks=args.homeworks + 1,
+        history=HISTORY_DAYS * DAY
+    )
+    with StubServer(PracticumHandler, config=config) as server:
+        homework.ENDPOINT = server.url + PRACTICUM_PATH
+        started = int(config.started) - HISTORY_DAYS * DAY - 1
+        with create_session(pool_maxsize=max(CONCURRENCY)) as session:
+            for concurrency in CONCURRENCY:
+                asyncio.run(measure(args, session, concurrency, started))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Измеряет накладные расходы журналирования на горячем пути опроса.
+
+Запуск: python benchmarks/bench_logging.py
+"""
+import logging
+from logging.handlers import RotatingFileHandler
+import os
+from os.path import abspath, dirname, join
+import sys
+import tempfile
+import time
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+import homework  # noqa: E402
+from logs import configure_logging, LOG_FORMAT  # noqa: E402
+
+ITERATIONS = 20_000
+RESULT = '{:<36} {:>7.1f} мкс на опрос'
+
+
+class FakeResponse:
+    """Ответ API без сети."""
+
+    status_code = 200
+
+    def json(self):
+        """Возвращает пустой список работ."""
+        return {'homeworks': [], 'current_date': 1000198000}
+
+
+class FakeSession:
+    """Сессия, сразу возвращающая ответ API."""
+
+    def get(self, **kwargs):
+        """Возвращает заготовленный ответ."""
+        return FakeResponse()
+
+
+class FakeBot:
+    """Бот, ничего не отправляющий в сеть."""
+
+    def send_message(self, chat_id, text, **kwargs):
+        """Ничего не делает."""
+
+
+def reset_logging():
+    """Убирает обработчики корневого логгера."""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def measure(title):
+    """Выполняет ITERATIONS опросов и печатает среднее время опроса."""
+    session, bot = FakeSession(), FakeBot()
+    started = time.perf_counter()
+    for number in range(ITERATIONS):
+        homework.request_api_answer(number, homework.HEADERS, session)
+        homework.send_chat_message(bot, 42, homework.NO_VERDICTS)
+    elapsed = time.perf_counter() - started
+    print(RESULT.format(title, elapsed / ITERATIONS * 1e6))
+
+
+def main():
+    """Запускает бенчмарк."""
+    directory = tempfile.mkdtemp()
+    devnull = open(os.devnull, 'w', encoding='utf-8')
+    logging.getLogger().setLevel(logging.WARNING)
+    measure('журнал выключен')
+
+    logging.basicConfig(
+        format=LOG_FORMAT,
+        level=logging.INFO,
+        handlers=[
+            RotatingFileHandler(
+                join(directory, 'sync.log'), encoding='utf-8'
+            ),
+            logging.StreamHandler(devnull),
+        ],
+        force=True
+    )
+    measure('синхронные обработчики')
+    reset_logging()
+
+    listener = configure_logging(join(directory, 'queue.log'), stream=devnull)
+    measure('очередь')
+    listener.stop()
+    reset_logging()
+
+    listener = configure_logging(
+        join(directory, 'sampled.log'),
+        stream=devnull,
+        sampling={
+            homework.API_REQUEST_START: 100,
+            homework.START_SENDING_MESSAGE: 100,
+            homework.SENT_MESSAGE: 100,
+        }
+    )
+    measure('очередь и выборка 1/100')
+    listener.stop()
+    reset_logging()
+    devnull.close()
+
+
+if __name__ == '__main__':
+    main()
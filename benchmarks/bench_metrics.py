@@ -0,0 +1,34 @@
+"""Измеряет стоимость записи метрик на горячем пути опроса.
+
+Запуск: python benchmarks/bench_metrics.py
+"""
+from os.path import abspath, dirname
+import sys
+import timeit
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from metrics import Counter, Gauge, Histogram  # noqa: E402
+
+NUMBER = 1_000_000
+RESULT = '{:<28} {:>6.0f} нс на вызов'
+
+
+def main():
+    """Запускает бенчмарк."""
+    histogram = Histogram('latency_seconds', 'Задержка')
+    counter = Counter('errors_total', 'Ошибки', label='exception')
+    gauge = Gauge('last_success', 'Время', label='chat_id')
+    cases = {
+        'пустой вызов': lambda: None,
+        'Histogram.observe': lambda: histogram.observe(0.042),
+        'Counter.inc': lambda: counter.inc('TimeoutException'),
+        'Gauge.set': lambda: gauge.set(1000198000, 42),
+    }
+    for title, case in cases.items():
+        elapsed = timeit.timeit(case, number=NUMBER)
+        print(RESULT.format(title, elapsed / NUMBER * 1e9))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Измеряет пропускную способность parse_status.
+
+Сравнивает сборку сообщения через str.format с предварительно подставленными
+вердиктами и кешем готовых сообщений.
+
+Запуск: python benchmarks/bench_render.py
+"""
+from os.path import abspath, dirname
+import sys
+import timeit
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+import homework  # noqa: E402
+from render import VerdictRenderer  # noqa: E402
+
+HOMEWORKS = 1000
+REPEATS = 200
+RESULT = '{:<40} {:>8.2f} млн вызовов/с'
+
+
+def format_status(homework_data):
+    """Сборка сообщения через str.format, как до кеша."""
+    name = homework_data['homework_name']
+    status = homework_data['status']
+    if status not in homework.VERDICTS:
+        raise ValueError(homework.UNKNOWN_STATUS.format(status))
+    return homework.CHANGED_VERDICT.format(name, homework.VERDICTS[status])
+
+
+def measure(title, func, homeworks):
+    """Вызывает func для всех работ REPEATS раз и печатает частоту вызовов."""
+    elapsed = timeit.timeit(
+        lambda: [func(item) for item in homeworks], number=REPEATS
+    )
+    print(RESULT.format(title, len(homeworks) * REPEATS / elapsed / 1e6))
+
+
+def main():
+    """Запускает бенчмарк."""
+    statuses = tuple(homework.VERDICTS)
+    homeworks = [
+        {'homework_name': f'hw_{number}',
+         'status': statuses[number % len(statuses)]}
+        for number in range(HOMEWORKS)
+    ]
+    measure('str.format', format_status, homeworks)
+    uncached = VerdictRenderer(
+        homework.VERDICTS, homework.CHANGED_VERDICT,
+        homework.UNKNOWN_STATUS, maxsize=0
+    )
+    measure('готовые части шаблона без кеша', uncached, homeworks)
+    measure('готовые части шаблона с кешем', homework.parse_status, homeworks)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Измеряет разбор неизменившегося ответа API с кешем ответов и без него.
+
+Запуск: python benchmarks/bench_response_cache.py
+"""
+import json
+import logging
+from os.path import abspath, dirname
+import sys
+import time
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+import homework  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+from tenants import Tenant  # noqa: E402
+
+SIZES = (0, 10, 100, 1000)
+REPEATS = 2000
+HEADERS = {'Authorization': 'OAuth token'}
+RESULT = 'работ: {:>5}  {:<18} на ответ: {:>8.1f} мкс'
+
+
+class Response:
+    """Ответ requests с телом body и кодом 200."""
+
+    status_code = 200
+    headers = {}
+
+    def __init__(self, body):
+        """Запоминает тело ответа body."""
+        self.content = body
+
+    def json(self):
+        """Декодирует тело ответа."""
+        return json.loads(self.content)
+
+
+class Session:
+    """Сессия, возвращающая тело body с новым current_date."""
+
+    def __init__(self, body):
+        """Сессия без единого запроса: current_date начинается с нуля."""
+        self.body = body
+        self.date = 0
+
+    def get(self, **data):
+        """Возвращает ответ без обращения к сети."""
+        self.date += 1
+        return Response(self.body.replace(b'"current_date": 0', (
+            f'"current_date": {self.date}'.encode()
+        )))
+
+
+def make_body(size):
+    """Создаёт тело ответа API из size работ."""
+    return json.dumps({
+        'homeworks': [
+            {'id': number, 'homework_name': f'hw_{number}',
+             'status': 'approved'}
+            for number in range(size)
+        ],
+        'current_date': 0,
+    }).encode()
+
+
+def measure(size, cache, title):
+    """Запрашивает и проверяет ответ REPEATS раз и печатает время."""
+    session, tenant = Session(make_body(size)), Tenant('token', 1)
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        response = homework.request_api_answer(0, HEADERS, session, cache)
+        homework.check_cached_response(cache, tenant, response)
+    elapsed = time.perf_counter() - started
+    print(RESULT.format(size, title, elapsed / REPEATS * 1e6))
+
+
+def main():
+    """Запускает бенчмарк."""
+    logging.disable(logging.CRITICAL)
+    for size in SIZES:
+        measure(size, None, 'без кеша')
+        measure(size, ResponseCache(), 'с кешем')
+
+
+if __name__ == '__main__':
+    main()
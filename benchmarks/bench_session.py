@@ -0,0 +1,49 @@
+"""Сравнивает число TLS-рукопожатий на опрос с пулом соединений и без него.
+
+Запуск: python benchmarks/bench_session.py [число опросов]
+"""
+from os.path import abspath, dirname
+import sys
+import time
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+import homework  # noqa: E402
+from session import create_session  # noqa: E402
+from stubs import PracticumHandler, https_stub  # noqa: E402
+
+POLLS = 200
+RESULT = (
+    '{:<24} опросов: {:>5}  рукопожатий: {:>5}  '
+    'рукопожатий на опрос: {:.3f}  среднее время опроса: {:.2f} мс'
+)
+
+
+def measure(server, title, polls, session=None):
+    """Выполняет polls запросов к заглушке и печатает статистику."""
+    server.connections = 0
+    started = time.perf_counter()
+    for _ in range(polls):
+        homework.request_api_answer(0, homework.HEADERS, session)
+    elapsed = time.perf_counter() - started
+    print(RESULT.format(
+        title,
+        polls,
+        server.connections,
+        server.connections / polls,
+        elapsed / polls * 1000
+    ))
+
+
+def main():
+    """Запускает бенчмарк."""
+    polls = int(sys.argv[1]) if len(sys.argv) > 1 else POLLS
+    with https_stub(PracticumHandler) as server:
+        homework.ENDPOINT = server.url + '/api/user_api/homework_statuses/'
+        measure(server, 'requests.get', polls)
+        with create_session() as session:
+            measure(server, 'create_session()', polls, session)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Измеряет время сравнения ответа API с индексом статусов.
+
+Запуск: python benchmarks/bench_status_index.py
+"""
+from os.path import abspath, dirname
+import random
+import sys
+import time
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from status_index import StatusIndex  # noqa: E402
+
+SIZES = (10_000, 50_000, 100_000)
+STATUSES = ('reviewing', 'approved', 'rejected')
+CHANGED_SHARE = 0.01
+RESULT = (
+    'работ: {:>7}  {:<22} изменений: {:>7}  '
+    'время: {:>8.2f} мс  на работу: {:>6.0f} нс'
+)
+
+
+def make_homeworks(size):
+    """Создаёт ответ API из size работ."""
+    return [
+        {
+            'id': number,
+            'homework_name': f'homework_{number}',
+            'status': random.choice(STATUSES),
+        }
+        for number in range(size)
+    ]
+
+
+def measure(index, homeworks, title):
+    """Сравнивает ответ с индексом и печатает время."""
+    started = time.perf_counter()
+    changes = index.diff(homeworks)
+    for homework in changes:
+        index.apply(homework)
+    elapsed = time.perf_counter() - started
+    print(RESULT.format(
+        len(homeworks), title, len(changes),
+        elapsed * 1000, elapsed / len(homeworks) * 1e9
+    ))
+
+
+def main():
+    """Запускает бенчмарк."""
+    for size in SIZES:
+        homeworks = make_homeworks(size)
+        index = StatusIndex()
+        measure(index, homeworks, 'пустой индекс')
+        measure(index, homeworks, 'без изменений')
+        for homework in random.sample(homeworks, int(size * CHANGED_SHARE)):
+            homework['status'] = 'approved' if (
+                homework['status'] != 'approved'
+            ) else 'rejected'
+        measure(index, homeworks, f'изменено {CHANGED_SHARE:.0%}')
+
+
+if __name__ == '__main__':
+    main()
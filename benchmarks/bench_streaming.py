@@ -0,0 +1,136 @@
+"""Измеряет пиковую память разбора большого ответа API целиком и потоком.
+
+Каждый замер выполняется в отдельном процессе, чтобы пиковый RSS одного
+режима не влиял на другой. Подписчику уже известны статусы всех работ,
+кроме последних CHANGED, как после долгого простоя со старым from_date.
+
+Запуск: python benchmarks/bench_streaming.py
+"""
+import argparse
+import json
+from os.path import abspath, dirname
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+import homework  # noqa: E402
+from status_index import StatusIndex  # noqa: E402
+
+SIZES = (10_000, 100_000, 300_000)
+MODES = ('json', 'stream')
+CHANGED = 10
+CHUNK_SIZE = 64 * 1024
+RESULT = (
+    'работ: {size:>7}  {mode:<7} пиковый RSS: +{peak:>7.1f} МБ  '
+    'время: {elapsed:>7.2f} с  изменений: {changes}'
+)
+
+
+def make_homework(number):
+    """Создаёт работу с номером number."""
+    statuses = tuple(homework.VERDICTS)
+    return {
+        'id': number,
+        'homework_name': f'username__hw_{number}.zip',
+        'status': statuses[number % len(statuses)],
+        'reviewer_comment': 'Комментарий ревьюера к работе. ' * 4,
+        'date_updated': '2022-01-01T00:00:00Z',
+        'lesson_name': f'Спринт {number % 20}',
+    }
+
+
+def make_body(size):
+    """Порождает тело ответа из size работ кусками по CHUNK_SIZE байт."""
+    buffer = bytearray(b'{"homeworks": [')
+    for number in range(size):
+        if number:
+            buffer += b', '
+        buffer += json.dumps(make_homework(number)).encode()
+        if len(buffer) >= CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b'], "current_date": 1700000000}'
+    yield bytes(buffer)
+
+
+class BodyResponse:
+    """Ответ requests с телом, которое порождается кусками."""
+
+    status_code = 200
+
+    def __init__(self, size):
+        """Тело ответа порождается make_body(size) при чтении."""
+        self.size = size
+
+    def __enter__(self):
+        """Возвращает сам ответ, как requests.Response."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Ничего не закрывает: соединения нет."""
+        pass
+
+    def iter_content(self, chunk_size):
+        """Тело ответа кусками, как при stream=True."""
+        return make_body(self.size)
+
+    def json(self):
+        """Тело ответа целиком, как его декодирует requests."""
+        return json.loads(b''.join(make_body(self.size)))
+
+
+def make_index(size):
+    """Индекс, которому известны статусы всех работ, кроме CHANGED."""
+    index = StatusIndex()
+    for number in range(CHANGED, size):
+        index.apply(make_homework(number))
+    return index
+
+
+def current_rss():
+    """Текущий RSS процесса в килобайтах."""
+    with open('/proc/self/statm') as statm:
+        pages = int(statm.read().split()[1])
+    return pages * resource.getpagesize() // 1024
+
+
+def run(mode, size):
+    """Разбирает ответ в режиме mode и печатает прирост пикового RSS."""
+    index = make_index(size)
+    response = BodyResponse(size)
+    baseline = current_rss()
+    started = time.perf_counter()
+    if mode == 'stream':
+        statuses = homework.stream_response(response, {}, {}, index)
+    else:
+        statuses = homework.read_response(response, {}, {})
+    changes = index.diff(homework.validate_response(statuses))
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    print(RESULT.format(
+        size=size, mode=mode, peak=max(peak, 0) / 1024, elapsed=elapsed,
+        changes=len(changes)
+    ))
+
+
+def main():
+    """Запускает замеры для всех размеров и режимов в отдельных процессах."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=MODES)
+    parser.add_argument('--size', type=int)
+    args = parser.parse_args()
+    if args.mode:
+        run(args.mode, args.size)
+        return
+    for size in SIZES:
+        for mode in MODES:
+            subprocess.run([
+                sys.executable, __file__, '--mode', mode, '--size', str(size)
+            ], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Измеряет проверку ответа API схемой и цепочкой try/except.
+
+Запуск: python benchmarks/bench_validate.py
+"""
+from os.path import abspath, dirname
+import sys
+import timeit
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+import homework  # noqa: E402
+
+SIZES = (1_000, 10_000, 100_000)
+REPEATS = 20
+RESULT = 'работ: {:>7}  {:<24} время: {:>8.2f} мс'
+
+
+def check_by_parsing(response):
+    """Проверка ответа и каждой работы через check_response и parse_status."""
+    problems = []
+    for homework_data in homework.check_response(response):
+        try:
+            homework.parse_status(homework_data)
+        except (KeyError, ValueError) as error:
+            problems.append(error)
+    return problems
+
+
+def make_response(size):
+    """Создаёт ответ API из size корректных работ."""
+    statuses = tuple(homework.VERDICTS)
+    return {
+        'homeworks': [
+            {'id': number, 'homework_name': f'hw_{number}',
+             'status': statuses[number % len(statuses)]}
+            for number in range(size)
+        ],
+        'current_date': 0,
+    }
+
+
+def measure(title, func, response):
+    """Проверяет ответ REPEATS раз и печатает среднее время."""
+    elapsed = timeit.timeit(lambda: func(response), number=REPEATS)
+    print(RESULT.format(
+        len(response['homeworks']), title, elapsed / REPEATS * 1000
+    ))
+
+
+def main():
+    """Запускает бенчмарк."""
+    for size in SIZES:
+        response = make_response(size)
+        measure('try/except', check_by_parsing, response)
+        measure('схема', homework.VALIDATOR.problems, response)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""Нагрузочный бенчмарк бота против локальных заглушек Практикума и Telegram.
+
+Запуск: python benchmarks/load.py --tenants 1000 --duration 30
+С параметром --workers N подписчики распределяются по N процессам-шардам.
+Результаты дописываются строкой JSON в файл --results, чтобы сравнивать их
+между коммитами.
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import json
+import logging
+import multiprocessing
+from os.path import abspath, dirname, join
+import subprocess
+import sys
+import time
+import tracemalloc
+from urllib.request import urlopen
+
+ROOT = dirname(dirname(abspath(__file__)))
+sys.path.append(ROOT)
+
+import homework  # noqa: E402
+from ratelimit import SharedTokenBucket  # noqa: E402
+from sharding import Supervisor  # noqa: E402
+from stubs import PRACTICUM_PATH, serve_stubs, StubConfig  # noqa: E402
+from tenants import TenantRegistry  # noqa: E402
+
+RESULTS = join(ROOT, 'benchmarks', 'results.jsonl')
+REPORT = (
+    'подписчиков: {tenants}  шардов: {workers}  '
+    'опросов/с: {polls_per_second:.1f}  '
+    'уведомлений: {notifications}  задержка p50: {latency_p50:.3f} с  '
+    'p99: {latency_p99:.3f} с  памяти на подписчика: '
+    '{memory_per_tenant:.0f} Б'
+)
+
+
+def parse_args():
+    """Разбирает параметры бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--interval', type=float, default=1,
+                        help='базовый интервал опроса подписчика, с')
+    parser.add_argument('--change-interval', type=float, default=5,
+                        help='период смены статуса работы в заглушке, с')
+    parser.add_argument('--homeworks', type=int, default=1,
+                        help='число работ в ответе заглушки Практикума')
+    parser.add_argument('--api-etag', action='store_true',
+                        help='заглушка Практикума поддерживает ETag и 304')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='число процессов-шардов')
+    parser.add_argument('--api-rate', type=float, default=10_000)
+    parser.add_argument('--telegram-rate', type=float, default=10_000)
+    parser.add_argument('--api-latency', type=float, default=0)
+    parser.add_argument('--api-error-rate', type=float, default=0)
+    parser.add_argument('--api-throttle-rate', type=float, default=0)
+    parser.add_argument('--telegram-latency', type=float, default=0)
+    parser.add_argument('--telegram-error-rate', type=float, default=0)
+    parser.add_argument('--telegram-throttle-rate', type=float, default=0)
+    parser.add_argument('--label', default='')
+    parser.add_argument('--results', default=RESULTS)
+    return parser.parse_args()
+
+
+def start_stubs(args):
+    """Запускает заглушки в отдельном процессе и возвращает их адреса."""
+    practicum = StubConfig(
+        args.api_latency, args.api_error_rate, args.api_throttle_rate,
+        args.homeworks, args.change_interval, args.api_etag
+    )
+    telegram = StubConfig(
+        args.telegram_latency, args.telegram_error_rate,
+        args.telegram_throttle_rate, change_interval=args.change_interval
+    )
+    telegram.started = practicum.started
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=serve_stubs,
+        args=(practicum, telegram),
+        kwargs={'ready': ready},
+        daemon=True
+    )
+    process.start()
+    return process, ready.get(timeout=10)
+
+
+def configure(args, practicum_url):
+    """Перенастраивает бота на заглушки и параметры бенчмарка."""
+    homework.ENDPOINT = practicum_url + PRACTICUM_PATH
+    homework.TELEGRAM_TOKEN = '123456:stub'
+    homework.RETRY_TIME = args.interval
+    homework.REVIEWING_RETRY_TIME = args.interval
+    homework.MAX_RETRY_TIME = args.interval
+    homework.POLLING_WORKERS = args.concurrency
+    homework.API_CONCURRENCY = args.concurrency
+    homework.HTTP_POOL_MAXSIZE = args.concurrency
+    homework.API_RATE_LIMIT = args.api_rate
+    homework.API_RETRY_DELAY = 0.1
+    homework.TELEGRAM_CONCURRENCY = args.concurrency
+    homework.TELEGRAM_RATE_LIMIT = args.telegram_rate
+    homework.TELEGRAM_CHAT_RATE_LIMIT = args.telegram_rate
+
+
+def run_shard(name, inbox, done, api_budget, telegram_budget, args, urls):
+    """Опрашивает подписчиков шарда в отдельном процессе."""
+    logging.basicConfig(level=logging.CRITICAL)
+    practicum_url, telegram_url = urls
+    configure(args, practicum_url)
+    asyncio.run(homework.serve_shard(
+        name, inbox, done, api_budget, telegram_budget,
+        telegram_url + '/bot'
+    ))
+
+
+def run_sharded(args, urls):
+    """Опрашивает подписчиков args.workers шардами args.duration секунд."""
+    Supervisor(
+        run_shard,
+        [
+            (tenant.token, tenant.chat_id, tenant.from_date)
+            for tenant in create_registry(args.tenants)
+        ],
+        workers=args.workers,
+        args=(
+            SharedTokenBucket(args.api_rate),
+            SharedTokenBucket(args.telegram_rate),
+            args,
+            urls,
+        )
+    ).run(args.duration)
+
+
+def create_registry(tenants):
+    """Создаёт реестр из tenants подписчиков."""
+    registry = TenantRegistry()
+    for number in range(tenants):
+        registry.add(f'token-{number}', number, int(time.time()))
+    return registry
+
+
+def fetch_stats(url):
+    """Читает статистику заглушки."""
+    with urlopen(url + '/stats') as response:
+        return json.load(response)
+
+
+def percentile(values, share):
+    """Возвращает перцентиль share от отсортированных values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+async def measure_memory(args, telegram_url):
+    """Измеряет память на подписчика после одного опроса каждого из них."""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    registry = create_registry(args.tenants)
+    client = homework.create_client()
+    outbox = homework.create_outbox(homework.create_bot(telegram_url + '/bot'))
+    engine = homework.create_engine(registry, client, outbox)
+    try:
+        await engine.run_cycle()
+        used = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+        client.close()
+        outbox.close()
+    return used / args.tenants
+
+
+async def run_load(args, telegram_url):
+    """Опрашивает подписчиков в течение args.duration секунд."""
+    registry = create_registry(args.tenants)
+    client = homework.create_client()
+    outbox = homework.create_outbox(homework.create_bot(telegram_url + '/bot'))
+    engine = homework.create_engine(registry, client, outbox)
+    try:
+        await asyncio.wait_for(engine.run_forever(), args.duration)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        client.close()
+        outbox.close()
+
+
+def git_commit():
+    """Возвращает хеш текущего коммита или None вне репозитория."""
+    result = subprocess.run(
+        ['git', 'rev-parse', '--short', 'HEAD'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    return result.stdout.strip() or None
+
+
+def save(result, path):
+    """Дописывает результат строкой JSON в файл path."""
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+def main():
+    """Запускает бенчмарк и сохраняет результат."""
+    args = parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+    process, (practicum_url, telegram_url) = start_stubs(args)
+    try:
+        configure(args, practicum_url)
+        memory = asyncio.run(measure_memory(args, telegram_url))
+        api_before = fetch_stats(practicum_url)['requests']
+        telegram_before = len(fetch_stats(telegram_url)['latencies'])
+        started = time.monotonic()
+        if args.workers > 1:
+            run_sharded(args, (practicum_url, telegram_url))
+        else:
+            asyncio.run(run_load(args, telegram_url))
+        elapsed = time.monotonic() - started
+        api = fetch_stats(practicum_url)
+        telegram = fetch_stats(telegram_url)
+    finally:
+        process.terminate()
+    latencies = sorted(telegram['latencies'][telegram_before:])
+    result = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': git_commit(),
+        'label': args.label,
+        'params': vars(args),
+        'tenants': args.tenants,
+        'workers': args.workers,
+        'polls_per_second': (api['requests'] - api_before) / elapsed,
+        'notifications': len(latencies),
+        'latency_p50': percentile(latencies, 0.5),
+        'latency_p99': percentile(latencies, 0.99),
+        'memory_per_tenant': memory,
+        'api_not_modified': api.get('not_modified', 0),
+        'api_cache': homework.API_CACHE.values(),
+        'api_errors': {
+            key: value for key, value in api.items()
+            if key.startswith('http_')
+        },
+        'telegram_errors': {
+            key: value for key, value in telegram.items()
+            if key.startswith('http_')
+        },
+    }
+    print(REPORT.format(**result))
+    save(result, args.results)
+
+
+if __name__ == '__main__':
+    main()
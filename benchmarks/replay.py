@@ -0,0 +1,117 @@
+"""Воспроизводит записанный обмен с API Практикума без сетевых запросов.
+
+Записи вида api из файла TRAFFIC_RECORD по очереди проходят тот же путь,
+что и ответы живого API: проверку кода и разбор JSON, проверку ответа,
+сравнение с индексом статусов подписчика, сборку уведомлений и их отправку
+в очередь, которая ничего не отправляет. Подписчики различаются по
+отпечаткам токенов. С --speed 0 записи воспроизводятся без пауз, иначе —
+с записанными паузами, ускоренными в speed раз. Профиль --profile cpu или
+memory снимается на время воспроизведения и печатается после отчёта.
+
+Запуск: python benchmarks/replay.py traffic.jsonl --speed 0 --profile cpu
+"""
+import argparse
+import asyncio
+from os.path import abspath, dirname
+from urllib.parse import parse_qsl, urlsplit
+import sys
+import time
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+import homework  # noqa: E402
+from profiling import profile, PROFILES  # noqa: E402
+from recording import read_records, recorded_response  # noqa: E402
+from tenants import TenantRegistry  # noqa: E402
+
+REPORT = (
+    'ответов API: {responses}  подписчиков: {tenants}  '
+    'уведомлений: {notifications} (в записи: {recorded})  '
+    'ответов/с: {rate:.0f}  время: {elapsed:.2f} с'
+)
+
+
+class ReplayClient:
+    """Клиент API, отвечающий записанным ответом record."""
+
+    cache = None
+
+    def __init__(self, record, stream=False):
+        """Запоминает запись ответа и способ её разбора."""
+        self.record = record
+        self.stream = stream
+
+    async def get(self, tenant):
+        """Разбирает записанный ответ так же, как ответ живого API."""
+        response = recorded_response(self.record)
+        headers = self.record['headers']
+        params = dict(parse_qsl(urlsplit(self.record['url']).query))
+        if self.stream:
+            return homework.stream_response(
+                response, headers, params, tenant.statuses
+            )
+        return homework.read_response(response, headers, params)
+
+
+class NullOutbox:
+    """Очередь отправки, которая только считает сообщения."""
+
+    def __init__(self):
+        """Начинает счёт сообщений с нуля."""
+        self.sent = 0
+
+    async def send(self, chat_id, message):
+        """Считает сообщение отправленным."""
+        self.sent += 1
+        return True
+
+
+async def replay(responses, speed=0, stream=False):
+    """Прогоняет записи ответов API через проверку подписчиков.
+    Возвращает реестр подписчиков и очередь отправки с числом сообщений.
+    """
+    registry, outbox, previous = TenantRegistry(), NullOutbox(), None
+    for record in responses:
+        if speed and previous is not None:
+            await asyncio.sleep(max(record['at'] - previous, 0) / speed)
+        previous = record['at']
+        token = record['headers'].get('Authorization', '')
+        tenant = registry.get(token) or registry.add(token, token)
+        await homework.poll_tenant(
+            tenant, ReplayClient(record, stream), outbox
+        )
+    return registry, outbox
+
+
+def main():
+    """Воспроизводит запись с параметрами командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help='файл записи TRAFFIC_RECORD')
+    parser.add_argument('--speed', type=float, default=0,
+                        help='ускорение пауз записи, 0 — без пауз')
+    parser.add_argument('--stream', action='store_true',
+                        help='разбирать ответы потоком')
+    parser.add_argument('--profile', choices=PROFILES)
+    parser.add_argument('--limit', type=int, default=25,
+                        help='строк в отчёте профиля')
+    args = parser.parse_args()
+    responses = list(read_records(args.path, 'api'))
+    recorded = sum(1 for _ in read_records(args.path, 'send'))
+    reports = []
+    started = time.perf_counter()
+    with profile(args.profile, reports.append, args.limit):
+        registry, outbox = asyncio.run(
+            replay(responses, args.speed, args.stream)
+        )
+    elapsed = time.perf_counter() - started
+    print(REPORT.format(
+        responses=len(responses), tenants=len(list(registry)),
+        notifications=outbox.sent, recorded=recorded,
+        rate=len(responses) / elapsed if elapsed else 0, elapsed=elapsed
+    ))
+    for report in reports:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
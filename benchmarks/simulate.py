@@ -0,0 +1,160 @@
+"""Симулирует сутки опроса подписчиков в виртуальном времени.
+
+Движок опроса, планировщик и poll_tenant те же, что в боте, а API
+Практикума и Telegram заменены сопрограммами, которые отвечают с заданной
+задержкой виртуального времени. Статус работы каждого подписчика меняется
+по своему расписанию, симуляция считает опросы, уведомления и задержку
+уведомления от смены статуса.
+
+Запуск: python benchmarks/simulate.py --tenants 10000
+"""
+import argparse
+import asyncio
+from os.path import abspath, dirname
+import random
+import re
+import sys
+import time
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from clock import VirtualClock  # noqa: E402
+import homework  # noqa: E402
+from ratelimit import TokenBucket  # noqa: E402
+from tenants import TenantRegistry  # noqa: E402
+
+DAY = 86400
+STATUSES = ('reviewing', 'approved', 'rejected')
+VERSIONED_NAME = re.compile(r'"(?P<token>[^"]+)~(?P<version>\d+)"')
+REPORT = (
+    'подписчиков: {tenants}  виртуальных суток: {days:g}  '
+    'опросов: {polls}  уведомлений: {notifications}  '
+    'задержка p50: {latency_p50:.0f} с  p99: {latency_p99:.0f} с  '
+    'реальное время: {elapsed:.1f} с'
+)
+
+
+class SimulatedApi:
+    """API Практикума в виртуальном времени.
+    Работа подписчика сменяет статус каждые change_interval секунд со
+    случайным сдвигом, ответ приходит через latency секунд.
+    """
+
+    cache = None
+
+    def __init__(self, clock, change_interval=4 * 3600, latency=0.2,
+                 seed=0):
+        """Сдвиги смены статусов задаются генератором с зерном seed."""
+        self.clock = clock
+        self.change_interval = change_interval
+        self.latency = latency
+        self.offsets = {}
+        self.random = random.Random(seed)
+        self.polls = 0
+
+    def version(self, token, moment):
+        """Номер смены статуса работы подписчика к моменту moment."""
+        offset = self.offsets.setdefault(
+            token, self.random.uniform(0, self.change_interval)
+        )
+        return int((moment + offset) // self.change_interval)
+
+    def changed_at(self, token, version):
+        """Момент смены статуса работы подписчика с номером version."""
+        return version * self.change_interval - self.offsets[token]
+
+    async def get(self, tenant):
+        """Отвечает работами, изменившимися после from_date подписчика."""
+        self.polls += 1
+        await asyncio.sleep(self.latency)
+        now = self.clock()
+        version = self.version(tenant.token, now)
+        homeworks = []
+        if self.changed_at(tenant.token, version) >= tenant.from_date:
+            homeworks.append({
+                'id': 1,
+                'homework_name': f'{tenant.token}~{version}',
+                'status': STATUSES[version % len(STATUSES)],
+            })
+        return {'homeworks': homeworks, 'current_date': now}
+
+
+class SimulatedOutbox:
+    """Очередь отправки в Telegram, считающая задержку уведомлений."""
+
+    def __init__(self, clock, api, latency=0.05):
+        """Отправка занимает latency секунд виртуального времени clock."""
+        self.clock = clock
+        self.api = api
+        self.latency = latency
+        self.latencies = []
+
+    async def send(self, chat_id, message):
+        """Отправляет сообщение и запоминает задержку уведомления."""
+        await asyncio.sleep(self.latency)
+        match = VERSIONED_NAME.search(message)
+        if match:
+            self.latencies.append(self.clock() - self.api.changed_at(
+                match['token'], int(match['version'])
+            ))
+        return True
+
+
+def simulate(tenants, days=1, rate=20, seed=0, clock=None):
+    """Симулирует days суток опроса tenants подписчиков и возвращает отчёт.
+    Частота запросов к API ограничена rate запросами в секунду.
+    """
+    clock = clock or VirtualClock()
+    registry = TenantRegistry()
+    for number in range(tenants):
+        registry.add(f'token-{number}', number, from_date=clock())
+    api = SimulatedApi(clock, seed=seed)
+    outbox = SimulatedOutbox(clock, api)
+    engine = homework.create_engine(
+        registry, api, outbox, budget=TokenBucket(rate, clock=clock),
+        clock=clock
+    )
+    started = time.perf_counter()
+    clock.run(run_for(engine.run_forever(), days * DAY))
+    latencies = sorted(outbox.latencies)
+    return {
+        'tenants': tenants,
+        'days': days,
+        'polls': api.polls,
+        'notifications': len(latencies),
+        'latency_p50': percentile(latencies, 0.5),
+        'latency_p99': percentile(latencies, 0.99),
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+async def run_for(coroutine, duration):
+    """Выполняет сопрограмму duration секунд и прерывает её."""
+    try:
+        await asyncio.wait_for(coroutine, duration)
+    except asyncio.TimeoutError:
+        pass
+
+
+def percentile(values, share):
+    """Значение отсортированного списка values на доле share."""
+    if not values:
+        return 0
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def main():
+    """Запускает симуляцию с параметрами командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=10_000)
+    parser.add_argument('--days', type=float, default=1)
+    parser.add_argument('--rate', type=float, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(REPORT.format(**simulate(
+        args.tenants, args.days, args.rate, args.seed
+    )))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,355 @@
+"""Локальные заменители API Практикума и Telegram Bot API для бенчмарков.
+
+Запуск отдельно от бенчмарков:
+python benchmarks/stubs.py --practicum-port 8001 --telegram-port 8002
+"""
+import argparse
+from datetime import datetime, timezone
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import re
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+CERTIFICATE_SUBJECT = '/CN=127.0.0.1'
+CERTIFICATE_SAN = 'subjectAltName=IP:127.0.0.1,DNS:localhost'
+STATUSES = ('reviewing', 'approved', 'rejected')
+VERSIONED_NAME = re.compile(r'"(?P<token>[^"]+)~(?P<version>\d+)"')
+PRACTICUM_PATH = '/api/user_api/homework_statuses/'
+STUBS_STARTED = 'Практикум: {}{}\nTelegram: {}/bot'
+
+
+class StubConfig:
+    """Поведение заглушки: задержка ответа и доли ошибок 500 и 429.
+    С etag заглушка Практикума отдаёт ETag списка работ и отвечает 304 на
+    запрос с совпадающим If-None-Match.
+    Заглушка Практикума отдаёт homeworks работ, первая из которых каждые
+    change_interval секунд сменяет статус и получает новое имя вида
+    «токен~версия», по которому заглушка Telegram считает задержку
+    уведомления от момента смены статуса.
+    С history остальные работы изменены равномерно за history секунд до
+    запуска заглушки, и она отдаёт только изменённые не раньше from_date.
+    """
+
+    def __init__(self, latency=0, error_rate=0, throttle_rate=0,
+                 homeworks=1, change_interval=None, etag=False, history=0):
+        """По умолчанию заглушка отвечает сразу, без сбоев и ограничений."""
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.homeworks = homeworks
+        self.change_interval = change_interval
+        self.etag = etag
+        self.history = history
+        self.started = time.time()
+
+    def failure(self):
+        """Возвращает код ошибки, которой нужно ответить, или None."""
+        roll = random.random()
+        if roll < self.error_rate:
+            return 500
+        if roll < self.error_rate + self.throttle_rate:
+            return 429
+        return None
+
+    def version(self, moment):
+        """Номер смены статуса, действующей в момент moment."""
+        return int((moment - self.started) // self.change_interval)
+
+    def changed_at(self, version):
+        """Момент смены статуса с номером version."""
+        return self.started + version * self.change_interval
+
+
+def create_certificate(directory):
+    """Создаёт самоподписанный сертификат для 127.0.0.1 через openssl."""
+    certfile = os.path.join(directory, 'stub.crt')
+    keyfile = os.path.join(directory, 'stub.key')
+    subprocess.run(
+        [
+            'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+            '-days', '1', '-subj', CERTIFICATE_SUBJECT,
+            '-addext', CERTIFICATE_SAN,
+            '-keyout', keyfile, '-out', certfile,
+        ],
+        check=True,
+        capture_output=True
+    )
+    return certfile, keyfile
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    """Обработчик с постоянными соединениями и ответами в JSON."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def send_json(self, data, status=200, headers=None):
+        """Отправляет data в JSON с кодом status и заголовками headers."""
+        body = json.dumps(data, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def delay(self):
+        """Выдерживает настроенную задержку ответа."""
+        if self.server.config.latency:
+            time.sleep(self.server.config.latency)
+
+    def log_message(self, format, *args):
+        """Не засоряет вывод бенчмарка журналом запросов."""
+
+
+class PracticumHandler(JSONHandler):
+    """Заменитель эндпоинта homework_statuses."""
+
+    def archive(self, from_date):
+        """Неизменные работы, изменённые не раньше from_date."""
+        config = self.server.config
+        if not config.history:
+            return [
+                {'homework_name': f'archive-{number}', 'status': 'approved'}
+                for number in range(config.homeworks - 1)
+            ]
+        step = config.history / max(config.homeworks - 1, 1)
+        homeworks = []
+        for number in range(config.homeworks - 1):
+            updated = config.started - number * step
+            if updated < from_date:
+                break
+            homeworks.append({
+                'id': number,
+                'homework_name': f'archive-{number}',
+                'status': 'approved',
+                'date_updated': datetime.fromtimestamp(
+                    updated, timezone.utc
+                ).isoformat(),
+            })
+        return homeworks
+
+    def homeworks(self, token, from_date=0):
+        """Возвращает список работ подписчика с токеном token."""
+        config = self.server.config
+        homeworks = self.archive(from_date)
+        if config.change_interval:
+            version = config.version(time.time())
+            homeworks.insert(0, {
+                'homework_name': f'{token}~{version}',
+                'status': STATUSES[version % len(STATUSES)],
+            })
+        return homeworks
+
+    def do_GET(self):
+        """Отвечает списком работ в формате API Практикума."""
+        if self.path == '/stats':
+            self.send_json(self.server.stats)
+            return
+        self.delay()
+        self.server.count('requests')
+        status = self.server.config.failure()
+        if status:
+            self.server.count(f'http_{status}')
+            self.send_json({'code': status, 'message': 'stub'}, status)
+            return
+        token = self.headers.get('Authorization', '').split()[-1]
+        query = parse_qs(urlsplit(self.path).query)
+        homeworks = self.homeworks(
+            token, float(query.get('from_date', [0])[0])
+        )
+        if not self.server.config.etag:
+            self.send_json({
+                'homeworks': homeworks,
+                'current_date': int(time.time()),
+            })
+            return
+        etag = '"{}"'.format(hashlib.md5(
+            json.dumps(homeworks).encode()
+        ).hexdigest())
+        if self.headers.get('If-None-Match') == etag:
+            self.server.count('not_modified')
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_json(
+            {'homeworks': homeworks, 'current_date': int(time.time())},
+            headers={'ETag': etag}
+        )
+
+
+class TelegramHandler(JSONHandler):
+    """Заменитель метода sendMessage Telegram Bot API."""
+
+    def do_GET(self):
+        """Отдаёт статистику доставленных сообщений."""
+        if self.path == '/stats':
+            self.send_json(self.server.stats)
+        else:
+            self.send_json({'ok': False, 'error_code': 404}, 404)
+
+    def do_POST(self):
+        """Принимает сообщение и запоминает задержку уведомления."""
+        length = int(self.headers.get('Content-Length', 0))
+        data = json.loads(self.rfile.read(length) or b'{}')
+        self.delay()
+        self.server.count('requests')
+        status = self.server.config.failure()
+        if status == 429:
+            self.server.count('http_429')
+            self.send_json({
+                'ok': False,
+                'error_code': 429,
+                'description': 'Too Many Requests: retry after 1',
+                'parameters': {'retry_after': 1},
+            }, 429)
+            return
+        if status:
+            self.server.count(f'http_{status}')
+            self.send_json({
+                'ok': False,
+                'error_code': status,
+                'description': 'Internal Server Error',
+            }, status)
+            return
+        self.server.deliver(data.get('text', ''))
+        self.send_json({'ok': True, 'result': {
+            'message_id': self.server.stats['requests'],
+            'date': int(time.time()),
+            'chat': {'id': int(data.get('chat_id', 0)), 'type': 'private'},
+            'text': data.get('text', ''),
+        }})
+
+
+class StubServer(ThreadingHTTPServer):
+    """Локальный HTTP(S) сервер, считающий соединения и запросы."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, handler, ssl_context=None, config=None, port=0):
+        """Слушает локальный адрес, порт 0 — любой свободный."""
+        super().__init__(('127.0.0.1', port), handler)
+        self.ssl_context = ssl_context
+        self.config = config or StubConfig()
+        self.connections = 0
+        self.stats = {'requests': 0, 'delivered': 0, 'latencies': []}
+        self._lock = threading.Lock()
+
+    def get_request(self):
+        """Принимает соединение и выполняет TLS-рукопожатие."""
+        sock, address = super().get_request()
+        with self._lock:
+            self.connections += 1
+        if self.ssl_context is not None:
+            sock = self.ssl_context.wrap_socket(sock, server_side=True)
+        return sock, address
+
+    def count(self, name):
+        """Увеличивает счётчик статистики name."""
+        with self._lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def deliver(self, text):
+        """Учитывает доставленное сообщение и задержку уведомления."""
+        match = VERSIONED_NAME.search(text)
+        with self._lock:
+            self.stats['delivered'] += 1
+            if match and self.config.change_interval:
+                self.stats['latencies'].append(
+                    time.time()
+                    - self.config.changed_at(int(match['version']))
+                )
+
+    def handle_error(self, request, client_address):
+        """Не печатает обрывы соединений завершившимися клиентами."""
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        """Базовый адрес сервера."""
+        scheme = 'https' if self.ssl_context else 'http'
+        return f'{scheme}://127.0.0.1:{self.server_address[1]}'
+
+    def __enter__(self):
+        """Запускает обслуживание запросов в фоновом потоке."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Останавливает сервер и закрывает его сокет."""
+        self.shutdown()
+        self.server_close()
+
+
+def https_stub(handler, directory=None, config=None):
+    """Создаёт HTTPS-заглушку и экспортирует её сертификат для requests."""
+    directory = directory or tempfile.mkdtemp()
+    certfile, keyfile = create_certificate(directory)
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(certfile, keyfile)
+    os.environ['REQUESTS_CA_BUNDLE'] = certfile
+    return StubServer(handler, context, config)
+
+
+def serve_stubs(practicum, telegram, ports=(0, 0), ready=None):
+    """Запускает обе заглушки и обслуживает запросы до завершения процесса.
+    Адреса заглушек передаются в очередь ready, если она задана.
+    """
+    with StubServer(PracticumHandler, config=practicum, port=ports[0]) as api:
+        with StubServer(
+            TelegramHandler, config=telegram, port=ports[1]
+        ) as bot_api:
+            if ready is not None:
+                ready.put((api.url, bot_api.url))
+            else:
+                print(STUBS_STARTED.format(
+                    api.url, PRACTICUM_PATH, bot_api.url
+                ))
+            threading.Event().wait()
+
+
+def main():
+    """Запускает заглушки с параметрами командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--practicum-port', type=int, default=8001)
+    parser.add_argument('--telegram-port', type=int, default=8002)
+    parser.add_argument('--api-latency', type=float, default=0)
+    parser.add_argument('--api-error-rate', type=float, default=0)
+    parser.add_argument('--api-throttle-rate', type=float, default=0)
+    parser.add_argument('--homeworks', type=int, default=1)
+    parser.add_argument('--api-etag', action='store_true')
+    parser.add_argument('--change-interval', type=float, default=60)
+    parser.add_argument('--telegram-latency', type=float, default=0)
+    parser.add_argument('--telegram-error-rate', type=float, default=0)
+    parser.add_argument('--telegram-throttle-rate', type=float, default=0)
+    args = parser.parse_args()
+    practicum = StubConfig(
+        args.api_latency, args.api_error_rate, args.api_throttle_rate,
+        args.homeworks, args.change_interval, args.api_etag
+    )
+    telegram = StubConfig(
+        args.telegram_latency, args.telegram_error_rate,
+        args.telegram_throttle_rate, change_interval=args.change_interval
+    )
+    telegram.started = practicum.started
+    serve_stubs(
+        practicum, telegram, (args.practicum_port, args.telegram_port)
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+class PracticumClient:
+    """Асинхронный клиент API Практикума для подписчиков.
+    fetch(from_date, headers) — блокирующий запрос к API, он выполняется в
+    пуле потоков ограничителя limiter. Каждая попытка проходит через
+    предохранитель breaker, временные сбои повторяются по политике retry.
+    Сессия session, если передана, закрывается вместе с клиентом. Кеш
+    ответов cache, которым пользуется fetch, доступен потребителям ответов.
+    С флагом stream в fetch передаётся индекс статусов подписчика, чтобы
+    тело ответа разбиралось потоком.
+    """
+
+    def __init__(self, fetch, limiter, retry=None, breaker=None,
+                 session=None, cache=None, stream=False):
+        """Запоминает функцию запроса, пул потоков и политики сбоев."""
+        self.fetch = fetch
+        self.limiter = limiter
+        self.retry = retry
+        self.breaker = breaker
+        self.session = session
+        self.cache = cache
+        self.stream = stream
+
+    async def _request(self, tenant):
+        if self.stream:
+            return await self.limiter.run(
+                self.fetch, tenant.from_date, tenant.headers,
+                index=tenant.statuses
+            )
+        return await self.limiter.run(
+            self.fetch, tenant.from_date, tenant.headers
+        )
+
+    async def _attempt(self, tenant):
+        if self.breaker is None:
+            return await self._request(tenant)
+        return await self.breaker.call(self._request, tenant)
+
+    async def get(self, tenant):
+        """Запрашивает изменения статусов работ подписчика."""
+        if self.retry is None:
+            return await self._attempt(tenant)
+        return await self.retry.call(self._attempt, tenant)
+
+    def close(self):
+        """Останавливает пул потоков запросов и закрывает сессию."""
+        self.limiter.shutdown()
+        if self.session is not None:
+            self.session.close()
@@ -0,0 +1,78 @@
+import asyncio
+import math
+import selectors
+
+
+class VirtualClock:
+    """Виртуальное время для тестов и симуляций опроса.
+    Экземпляр вызывается как time.monotonic и передаётся компонентам бота
+    в параметре clock. Цикл событий new_event_loop() идёт по этим часам:
+    когда всем сопрограммам остаётся только ждать, время сразу сдвигается
+    к ближайшему таймеру, поэтому asyncio.sleep и таймауты не тратят
+    реального времени. Блокирующий ввод-вывод в пуле потоков выполняется
+    как обычно, но виртуальное время его не ждёт.
+    """
+
+    def __init__(self, start=0.0):
+        """Часы, показывающие start секунд."""
+        self.now = start
+
+    def __call__(self):
+        """Текущее виртуальное время в секундах."""
+        return self.now
+
+    def advance(self, delay):
+        """Сдвигает время вперёд на delay секунд, но не меньше чем на шаг.
+        Шаг — наименьшее представимое приращение, поэтому время строго
+        растёт, даже если delay меньше точности числа.
+        """
+        self.now = max(self.now + delay, math.nextafter(self.now, math.inf))
+
+    def new_event_loop(self):
+        """Создаёт цикл событий, идущий по виртуальному времени."""
+        return VirtualEventLoop(self)
+
+    def run(self, main):
+        """Выполняет сопрограмму main в цикле по виртуальному времени."""
+        loop = self.new_event_loop()
+        try:
+            return loop.run_until_complete(main)
+        finally:
+            loop.close()
+
+
+class VirtualSelector(selectors.DefaultSelector):
+    """Селектор, который вместо ожидания таймера сдвигает время clock.
+    Каждая итерация цикла сдвигает время хотя бы на шаг, а таймеры
+    срабатывают строго после своего момента, поэтому проснувшийся по
+    таймеру всегда видит, что его время наступило.
+    """
+
+    def __init__(self, clock):
+        """Селектор, сдвигающий часы clock вместо ожидания."""
+        super().__init__()
+        self.clock = clock
+
+    def select(self, timeout=None):
+        """Возвращает готовые события, не дожидаясь таймеров."""
+        events = super().select(0)
+        if events:
+            return events
+        if timeout is None:
+            return super().select(None)
+        self.clock.advance(timeout)
+        return []
+
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    """Цикл событий asyncio, время которого задают часы clock."""
+
+    def __init__(self, clock):
+        """Цикл событий, время которого идёт по часам clock."""
+        self.clock = clock
+        super().__init__(VirtualSelector(clock))
+        self._clock_resolution = 0
+
+    def time(self):
+        """Текущее виртуальное время."""
+        return self.clock.now
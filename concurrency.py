@@ -0,0 +1,41 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+from functools import partial
+
+
+class Limiter:
+    """Выполняет блокирующие вызовы из asyncio в собственном пуле потоков.
+    Одновременно выполняется не более limit вызовов, остальные ждут
+    освобождения места, не блокируя цикл событий. Как в asyncio.to_thread,
+    вызов выполняется в копии контекста вызывающей задачи.
+    """
+
+    def __init__(self, limit, name='limiter'):
+        """Создаёт пул из limit потоков с префиксом имени name."""
+        self.limit = limit
+        self._executor = ThreadPoolExecutor(
+            max_workers=limit,
+            thread_name_prefix=name
+        )
+        self._semaphore = None
+        self.in_flight = 0
+
+    async def run(self, func, *args, **kwargs):
+        """Вызывает func(*args, **kwargs) в пуле и возвращает результат."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._executor,
+                    partial(contextvars.copy_context().run, func, *args,
+                            **kwargs)
+                )
+            finally:
+                self.in_flight -= 1
+
+    def shutdown(self):
+        """Останавливает пул потоков."""
+        self._executor.shutdown(wait=True)
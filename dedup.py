@@ -0,0 +1,67 @@
+from collections import OrderedDict
+import re
+import time
+
+VARIABLE_PARTS = re.compile(r'"[^"]*"|\'[^\']*\'|\d+(?:\.\d+)?')
+
+
+def fingerprint(error):
+    """Отпечаток ошибки: класс исключения и шаблон его сообщения.
+    Значения в кавычках и числа (адреса, параметры, отметки времени)
+    заменяются заглушками, поэтому ошибки, различающиеся только ими,
+    получают одинаковый отпечаток.
+    """
+    return type(error).__name__, VARIABLE_PARTS.sub('_', str(error))
+
+
+class ErrorCache:
+    """Ограниченный кеш отпечатков ошибок, отправленных в чаты.
+    Повтор ошибки в течение ttl секунд после уведомления подавляется и
+    учитывается. Число подавленных повторов возвращается при первом повторе
+    после окна, чтобы отправить его сводкой. Неповторяющиеся записи
+    удаляются через ещё один период ttl, при переполнении кеша вытесняются
+    самые старые.
+    """
+
+    def __init__(self, ttl=3600, maxsize=10000, clock=time.monotonic):
+        """Создаёт пустой кеш отпечатков."""
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries = OrderedDict()
+
+    def key(self, chat_id, error):
+        """Ключ ошибки error в чате chat_id."""
+        return (chat_id, *fingerprint(error))
+
+    def _evict(self, now):
+        while self._entries:
+            key, (deadline, _) = next(iter(self._entries.items()))
+            if deadline + self.ttl > now:
+                return
+            del self._entries[key]
+
+    def check(self, key):
+        """Возвращает None, если ошибку нужно подавить.
+        Иначе возвращает число подавленных повторов с прошлого уведомления.
+        """
+        now = self.clock()
+        self._evict(now)
+        entry = self._entries.get(key)
+        if entry is None:
+            return 0
+        if now < entry[0]:
+            entry[1] += 1
+            return None
+        return entry[1]
+
+    def remember(self, key):
+        """Запоминает, что об ошибке с ключом key отправлено уведомление."""
+        self._entries[key] = [self.clock() + self.ttl, 0]
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        """Число запомненных отпечатков."""
+        return len(self._entries)
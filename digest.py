@@ -0,0 +1,149 @@
+import asyncio
+
+MESSAGE_LIMIT = 4096
+SEPARATOR = '\n\n'
+
+
+def split_text(text, limit=MESSAGE_LIMIT):
+    """Делит текст на части не длиннее limit по границам строк.
+    Строка длиннее limit делится без учёта границ.
+    """
+    parts, current = [], ''
+    for line in text.splitlines(keepends=True):
+        while len(line) > limit:
+            if current:
+                parts.append(current)
+                current = ''
+            parts.append(line[:limit])
+            line = line[limit:]
+        if current and len(current) + len(line) > limit:
+            parts.append(current)
+            current = ''
+        current += line
+    if current:
+        parts.append(current)
+    return parts
+
+
+def group_messages(messages, limit=MESSAGE_LIMIT, separator=SEPARATOR):
+    """Группирует сообщения в сводки не длиннее limit.
+    Возвращает списки номеров сообщений, порядок сообщений сохраняется.
+    """
+    groups, group, length = [], [], 0
+    for number, message in enumerate(messages):
+        if group and length + len(separator) + len(message) > limit:
+            groups.append(group)
+            group, length = [], 0
+        length += (len(separator) if group else 0) + len(message)
+        group.append(number)
+    if group:
+        groups.append(group)
+    return groups
+
+
+class Coalescer:
+    """Собирает уведомления каждого чата в сводки.
+    Сообщения чата копятся window секунд с момента первого из них или до
+    max_size сообщений и уходят сводкой через сопрограмму
+    send(chat_id, сообщение). Сводка длиннее limit символов делится на
+    несколько по границам сообщений. Части сводок отправляются по порядку
+    до первого сбоя, после него остальные не отправляются. Ожидающий
+    отправки сообщения получает True, если оно целиком вошло в отправленные
+    части, иначе — результат или исключение неудавшейся отправки.
+    saved(число) вызывается с числом отправок, сэкономленных сводками,
+    которые доставлены целиком.
+    """
+
+    def __init__(self, send, window=2, max_size=20, limit=MESSAGE_LIMIT,
+                 separator=SEPARATOR, saved=None):
+        """Создаёт сборщик без накопленных сообщений."""
+        self._send = send
+        self.window = window
+        self.max_size = max_size
+        self.limit = limit
+        self.separator = separator
+        self.saved = saved or (lambda count: None)
+        self._pending = {}
+        self._timers = {}
+        self._tasks = set()
+
+    def __len__(self):
+        """Число сообщений, ожидающих отправки в сводках."""
+        return sum(len(batch) for batch in self._pending.values())
+
+    async def send(self, chat_id, message):
+        """Добавляет сообщение в сводку чата и ждёт результата её отправки."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(chat_id, [])
+        batch.append((message, future))
+        if len(batch) >= self.max_size:
+            self.flush(chat_id)
+        elif len(batch) == 1:
+            self._timers[chat_id] = loop.call_later(
+                self.window, self.flush, chat_id
+            )
+        return await future
+
+    def flush(self, chat_id):
+        """Немедленно начинает отправку накопленной сводки чата."""
+        timer = self._timers.pop(chat_id, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(chat_id, None)
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._deliver(chat_id, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send_parts(self, chat_id, parts):
+        """Отправляет части по порядку до первого сбоя.
+        Возвращает число отправленных символов и True, если отправлены все
+        части, иначе — результат или исключение неудавшейся отправки.
+        """
+        delivered = 0
+        for part in parts:
+            try:
+                sent = await self._send(chat_id, part)
+            except Exception as error:
+                return delivered, error
+            if not sent:
+                return delivered, sent
+            delivered += len(part)
+        return delivered, True
+
+    @staticmethod
+    def _resolve(future, result):
+        if future.done():
+            return
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+    async def _deliver(self, chat_id, batch):
+        messages = [message for message, _ in batch]
+        digests = [
+            (group, split_text(
+                self.separator.join(messages[number] for number in group),
+                self.limit
+            ))
+            for group in group_messages(messages, self.limit, self.separator)
+        ]
+        result, saved = True, 0
+        for group, parts in digests:
+            delivered = 0
+            if result is True:
+                delivered, result = await self._send_parts(chat_id, parts)
+            if result is True:
+                saved += max(len(group) - len(parts), 0)
+            end = 0
+            for position, number in enumerate(group):
+                end += len(messages[number])
+                if position:
+                    end += len(self.separator)
+                self._resolve(
+                    batch[number][1], True if end <= delivered else result
+                )
+        self.saved(saved)
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+
+from scheduler import AdaptiveScheduler
+
+POLLING_CYCLE_START = 'Начат цикл опроса API для %s подписчиков'
+POLLING_CYCLE_END = 'Цикл опроса %s подписчиков завершён за %.2f с'
+TENANT_POLL_ERROR = 'Сбой при опросе подписчика %s: %s'
+STATE_FLUSHED = 'Сохранено состояние %s подписчиков'
+STATE_FLUSH_ERROR = 'Сбой при сохранении состояния подписчиков: %s'
+
+
+class PollingEngine:
+    """Опрашивает API Практикума для всех подписчиков реестра.
+    Не более concurrency сопрограмм одновременно ожидают poll(tenant).
+    В постоянном режиме порядок и частоту опросов задаёт планировщик
+    scheduler, по умолчанию — адаптивный с базовым интервалом retry_time.
+    Если передано хранилище state, состояние опрошенных подписчиков
+    сохраняется пакетом раз в flush_interval секунд и в конце цикла.
+    """
+
+    def __init__(self, registry, poll, concurrency=32, retry_time=600,
+                 scheduler=None, state=None, flush_interval=60):
+        """Запоминает реестр, функцию опроса и параметры планирования."""
+        self.registry = registry
+        self.poll = poll
+        self.concurrency = concurrency
+        if scheduler is None:
+            scheduler = AdaptiveScheduler(base_interval=retry_time)
+        self.scheduler = scheduler
+        self.state = state
+        self.flush_interval = flush_interval
+        self._polling = {}
+        self._writing = asyncio.Lock()
+
+    async def _poll_safely(self, tenant):
+        finished = self._polling[tenant.token] = asyncio.Event()
+        try:
+            await self.poll(tenant)
+        except Exception as error:
+            logging.exception(TENANT_POLL_ERROR, tenant, error)
+        finally:
+            self._polling.pop(tenant.token, None)
+            finished.set()
+        if (
+            self.state is not None
+            and self.registry.get(tenant.token) is tenant
+        ):
+            self.state.mark(tenant)
+
+    async def flush_state(self):
+        """Сохраняет накопленное состояние подписчиков в пуле потоков."""
+        if self.state is None:
+            return
+        records = self.state.take()
+        if not records:
+            return
+        try:
+            await self._save(records)
+        except Exception as error:
+            logging.exception(STATE_FLUSH_ERROR, error)
+        else:
+            logging.info(STATE_FLUSHED, len(records))
+
+    async def _save(self, records):
+        async with self._writing:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.state.backend.save_many, records
+            )
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush_state()
+
+    async def _worker(self, tenants):
+        for tenant in tenants:
+            await self._poll_safely(tenant)
+
+    def add_tenants(self, entries):
+        """Добавляет подписчиков в реестр и ставит их опрос в планировщик.
+        entries — аргументы TenantRegistry.add. Курсоры подписчиков,
+        сохранённые в хранилище состояния, восстанавливаются из него.
+        """
+        tenants = [self.registry.add(*entry) for entry in entries]
+        if self.state is not None:
+            self.state.restore(tenants)
+        for tenant in tenants:
+            self.scheduler.schedule(tenant)
+
+    def remove_tenants(self, tokens):
+        """Удаляет подписчиков из реестра, их опросы больше не планируются.
+        Возвращает удалённых подписчиков.
+        """
+        return [
+            tenant for tenant in map(self.registry.remove, tokens)
+            if tenant is not None
+        ]
+
+    async def release_tenants(self, tokens):
+        """Удаляет подписчиков и сохраняет их состояние для нового владельца.
+        Начатые опросы удалённых подписчиков сначала дожидаются конца, чтобы
+        сохранённый курсор учитывал уже отправленные уведомления. Запись
+        идёт в пуле потоков по очереди со сбросами состояния, её сбой
+        выбрасывается.
+        """
+        removed = self.remove_tenants(tokens)
+        await asyncio.gather(*(
+            self._polling[tenant.token].wait()
+            for tenant in removed if tenant.token in self._polling
+        ))
+        if self.state is not None and removed:
+            await self._save(self.state.take(removed))
+
+    async def _consume(self, queue):
+        while True:
+            tenant = await queue.get()
+            if self.registry.get(tenant.token) is not tenant:
+                continue
+            await self._poll_safely(tenant)
+            if self.registry.get(tenant.token) is tenant:
+                self.scheduler.reschedule(tenant)
+
+    async def run_cycle(self):
+        """Выполняет один цикл опроса всех подписчиков."""
+        tenants = list(self.registry)
+        logging.info(POLLING_CYCLE_START, len(tenants))
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        queue = iter(tenants)
+        await asyncio.gather(*(
+            self._worker(queue)
+            for _ in range(min(self.concurrency, len(tenants)))
+        ))
+        await self.flush_state()
+        elapsed = loop.time() - started
+        logging.info(POLLING_CYCLE_END, len(tenants), elapsed)
+        return elapsed
+
+    async def run_forever(self):
+        """Опрашивает подписчиков в порядке, заданном планировщиком."""
+        for tenant in self.registry:
+            self.scheduler.schedule(tenant)
+        queue = asyncio.Queue(maxsize=self.concurrency)
+        tasks = [
+            asyncio.create_task(self._consume(queue))
+            for _ in range(self.concurrency)
+        ]
+        if self.state is not None:
+            tasks.append(asyncio.create_task(self._flush_periodically()))
+        try:
+            while True:
+                await queue.put(await self.scheduler.next())
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.state is not None:
+                self.state.flush()
+
+    def run(self):
+        """Запускает бесконечный опрос в новом цикле событий."""
+        asyncio.run(self.run_forever())
@@ -15,7 +15,39 @@ class JSONDecodeErrorException(Exception):
 
 
 class HTTPErrorException(Exception):
-    """Сервер вернул код ошибки HTTP в ответ на сделанный запрос."""
+    """Сервер временно не смог ответить: код 5xx или 429."""
+
+
+class ClientErrorException(Exception):
+    """Сервер отклонил запрос с кодом 4xx, например из-за неверного токена."""
+
 
 class DenyServiceErrorException(Exception):
     """Отказ в обслуживании от ендпоинта."""
+
+
+class CircuitOpenException(Exception):
+    """Запросы к эндпоинту приостановлены после серии сбоев."""
+
+
+class InvalidResponseException(Exception):
+    """Ответ API или событие вебхука не соответствует ожидаемой схеме."""
+
+
+class UnknownTenantException(Exception):
+    """Подписчик с переданным токеном не зарегистрирован."""
+
+
+RETRYABLE_EXCEPTIONS = (
+    ConnectionErrorException,
+    TimeoutException,
+    HTTPErrorException,
+)
+FATAL_EXCEPTIONS = (
+    URLRequiredException,
+    ClientErrorException,
+    JSONDecodeErrorException,
+    DenyServiceErrorException,
+    CircuitOpenException,
+    InvalidResponseException,
+)
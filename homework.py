@@ -1,30 +1,116 @@
-from http.client import OK
+import asyncio
+import atexit
+from functools import partial
+from itertools import count
+from http.client import NOT_MODIFIED, OK, TOO_MANY_REQUESTS
 import logging
-from logging.handlers import RotatingFileHandler
 import os
-import sys
 import time
 
 from dotenv import load_dotenv
 import requests
 import telegram
+from telegram.utils.request import Request
 
+from backfill import Backfill
+from client import PracticumClient
+from concurrency import Limiter
+from dedup import ErrorCache
+from digest import Coalescer
+from engine import PollingEngine
 from exception import (
+    ClientErrorException,
     ConnectionErrorException,
     DenyServiceErrorException,
     JSONDecodeErrorException,
     HTTPErrorException,
+    InvalidResponseException,
     TimeoutException,
+    UnknownTenantException,
     URLRequiredException
 )
+from json_stream import parse_object
+from logs import configure_logging, parse_sampling
+from metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    start_metrics_server
+)
+from profiling import SignalProfiler, Spans
+from ratelimit import SharedTokenBucket, TokenBucket
+from recording import Recorder
+from render import load_renderers, VerdictRenderer
+from response_cache import ResponseCache
+from retry import CircuitBreaker, RetryPolicy
+from scheduler import AdaptiveScheduler
+from send_queue import SendQueue
+from session import create_session
+from sharding import follow_assignments, Supervisor
+from state import open_backend, StateStore
+from tenants import TenantRegistry
+from validate import ResponseValidator
+from webhook import start_webhook_server
 
 load_dotenv()
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+TELEGRAM_SUBSCRIBERS = os.getenv('TELEGRAM_SUBSCRIBERS', '')
+TENANTS_FILE = os.getenv('TENANTS_FILE')
 TOKENS = ['PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID']
+TENANTS_FILE_TOKENS = ['TELEGRAM_TOKEN']
 RETRY_TIME = 600
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', 3.05))
+API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', 10))
+TELEGRAM_CONNECT_TIMEOUT = float(os.getenv('TELEGRAM_CONNECT_TIMEOUT', 3.05))
+TELEGRAM_READ_TIMEOUT = float(os.getenv('TELEGRAM_READ_TIMEOUT', 10))
+POLL_BUDGET = float(os.getenv('POLL_BUDGET', 60))
+METRICS_PORT = os.getenv('METRICS_PORT')
+LOG_SAMPLING = os.getenv('LOG_SAMPLING', '')
+ERROR_DEDUP_TTL = float(os.getenv('ERROR_DEDUP_TTL', 3600))
+ERROR_DEDUP_SIZE = int(os.getenv('ERROR_DEDUP_SIZE', 10000))
+SHARD_WORKERS = int(os.getenv('SHARD_WORKERS', 1))
+SHARD_RESTART_TIME = float(os.getenv('SHARD_RESTART_TIME', 5))
+LOCALES_FILE = os.getenv('LOCALES_FILE')
+VERDICT_CACHE_SIZE = int(os.getenv('VERDICT_CACHE_SIZE', 4096))
+WEBHOOK_PORT = os.getenv('WEBHOOK_PORT')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+WEBHOOK_RECONCILE_TIME = int(os.getenv('WEBHOOK_RECONCILE_TIME', 3600))
+LOG_FILE = __file__ + '.log'
+SHARD_LOG_FILE = __file__ + '.{}.log'
+PROFILE_FILE = __file__ + '.{}.{}.txt'
+REVIEWING_RETRY_TIME = int(os.getenv('REVIEWING_RETRY_TIME', 60))
+MAX_RETRY_TIME = int(os.getenv('MAX_RETRY_TIME', 3600))
+API_RATE_LIMIT = float(os.getenv('API_RATE_LIMIT', 20))
+API_RETRY_ATTEMPTS = int(os.getenv('API_RETRY_ATTEMPTS', 3))
+API_RETRY_DELAY = float(os.getenv('API_RETRY_DELAY', 1))
+API_RETRY_MAX_DELAY = float(os.getenv('API_RETRY_MAX_DELAY', 30))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_RECOVERY_TIME = float(os.getenv('CIRCUIT_RECOVERY_TIME', 60))
+STATE_BACKEND = os.getenv('STATE_BACKEND', 'sqlite')
+STATE_PATH = os.getenv('STATE_PATH')
+STATE_FLUSH_TIME = int(os.getenv('STATE_FLUSH_TIME', 60))
+POLLING_WORKERS = int(os.getenv('POLLING_WORKERS', 32))
+API_CONCURRENCY = int(os.getenv('API_CONCURRENCY', 32))
+TELEGRAM_CONCURRENCY = int(os.getenv('TELEGRAM_CONCURRENCY', 8))
+TELEGRAM_QUEUE_SIZE = int(os.getenv('TELEGRAM_QUEUE_SIZE', 1000))
+TELEGRAM_RATE_LIMIT = float(os.getenv('TELEGRAM_RATE_LIMIT', 30))
+TELEGRAM_CHAT_RATE_LIMIT = float(os.getenv('TELEGRAM_CHAT_RATE_LIMIT', 1))
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 4))
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', API_CONCURRENCY))
+HTTP_KEEP_ALIVE = os.getenv('HTTP_KEEP_ALIVE', '1') == '1'
+API_STREAMING = os.getenv('API_STREAMING', '0') == '1'
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 64 * 1024))
+BACKFILL_LAG = int(os.getenv('BACKFILL_LAG', 86400))
+BACKFILL_CONCURRENCY = int(os.getenv('BACKFILL_CONCURRENCY', 4))
+DIGEST_WINDOW = float(os.getenv('DIGEST_WINDOW', 0))
+DIGEST_SIZE = int(os.getenv('DIGEST_SIZE', 20))
+TRAFFIC_RECORD = os.getenv('TRAFFIC_RECORD')
+PROFILE_STAGES = os.getenv('PROFILE_STAGES', '0') == '1'
+SLOW_POLL_TIME = float(os.getenv('SLOW_POLL_TIME', 0))
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 VERDICTS = {
@@ -35,13 +121,14 @@ VERDICTS = {
 NO_VERDICTS = 'Новые вердикты по работам отсутствуют'
 ERROR = 'Появились новые ошибки при работе программы'
 NO_ERROR = 'Новые ошибки при работе программы отсутствуют'
-START_SENDING_MESSAGE = 'Началась отправка сообщения "{}" в чат {} Telegram'
+START_SENDING_MESSAGE = 'Началась отправка сообщения "%s" в чат %s Telegram'
 API_REQUEST_START = (
-    'Начата отправка запроса к API c url "{url}", заголовком "{headers}" и '
-    'параметрами "{params}"'
+    'Начата отправка запроса к API c url "%(url)s", заголовком "%(headers)s" '
+    'и параметрами "%(params)s"'
 )
-SENT_MESSAGE = 'Сообщение: "{}" успешно отправлено в чат {}'
-UNSENT_MESSAGE = 'Сообщение "{}" не отправлено в чат из-за ошибки: {}'
+STATE_RESTORED = 'Восстановлено состояние %s из %s подписчиков'
+SENT_MESSAGE = 'Сообщение: "%s" успешно отправлено в чат %s'
+UNSENT_MESSAGE = 'Сообщение "%s" не отправлено в чат из-за ошибки: %s'
 REQUEST_ERROR = (
     'Ошибка "{}" при запросе к API c эндпоинтом "{}", заголовком "{}" и '
     'параметрами "{}"'
@@ -66,66 +153,229 @@ MISSING_ENVIRONMENT_VARIABLES = (
     'Отсутствуют переменные окружения необходимые для работы программы'
 )
 JSON_ERROR = 'Ошибка декодирования информации от сервера в JSON формат'
-MISSING_TOKEN = 'Отсутствует токен {} для работы программы'
+MISSING_TOKEN = 'Отсутствует токен %s для работы программы'
 PROGRAM_ERROR = 'Сбой в работе программы: {}'
+REPEATED_ERROR = '{}\nС прошлого уведомления ошибка повторилась {} раз'
+SUPPRESSED_ERROR = 'Повтор ошибки в чат %s не отправлен: %s'
+POLL_BUDGET_EXCEEDED = (
+    'Проверка домашних работ не уложилась в отведённые {} с'
+)
 DENY_SERVICE = (
     'В ответе ендпоинта содержится ошибка: {error_code} - {error} - '
     '{url} - {params} - {headers}'
 )
 ERROR_CODES = ('error', 'code')
+METRICS_STARTED = 'Метрики доступны на порту %s по адресу /metrics'
+WEBHOOK_STARTED = 'Вебхук принимает события на порту %s по адресу /webhook'
+WEBHOOK_EVENT = 'Событие вебхука для чата %s: изменилось статусов %s'
+UNKNOWN_TENANT = 'Подписчик с переданным токеном не зарегистрирован'
+UNSENT_EVENT = 'Уведомления по событию вебхука в чат {} не отправлены'
+UNSENT_SUBSCRIPTION = 'Уведомление "%s" не доставлено в чат подписки %s: %s'
+INVALID_RESPONSE = 'Некорректный ответ API: {}'
+PROFILE_SAVED = 'Профиль %s сохранён в файл %s'
+SHARED_STATE_REQUIRED = (
+    'Для SHARD_WORKERS > 1 нужно общее хранилище состояния подписчиков: '
+    'задайте STATE_PATH и STATE_BACKEND=sqlite'
+)
+UNKNOWN_LOCALE = 'Для языков {} нет шаблонов уведомлений в файле {}'
 
+RENDERER = VerdictRenderer(
+    VERDICTS, CHANGED_VERDICT, UNKNOWN_STATUS, VERDICT_CACHE_SIZE
+)
+VALIDATOR = ResponseValidator(VERDICTS)
+SPANS = Spans(PROFILE_STAGES, SLOW_POLL_TIME)
+RENDERERS = (
+    load_renderers(LOCALES_FILE, RENDERER, VERDICT_CACHE_SIZE)
+    if LOCALES_FILE else {}
+)
 
-def send_message(bot, message):
-    """Отправляет сообщение в Telegram чат."""
+API_LATENCY = REGISTRY.register(Histogram(
+    'homework_api_request_seconds',
+    'Длительность запроса к API Практикума'
+))
+SEND_LATENCY = REGISTRY.register(Histogram(
+    'homework_telegram_send_seconds',
+    'Длительность отправки сообщения в Telegram'
+))
+ERRORS = REGISTRY.register(Counter(
+    'homework_errors_total',
+    'Число ошибок по классам исключений',
+    label='exception'
+))
+UNSENT_SUBSCRIPTIONS = REGISTRY.register(Counter(
+    'homework_subscription_unsent_total',
+    'Число уведомлений, не доставленных в дополнительные чаты подписчиков'
+))
+DIGEST_SAVED = REGISTRY.register(Counter(
+    'homework_digest_saved_messages_total',
+    'Число сообщений в Telegram, сэкономленных сводками уведомлений'
+))
+SUPPRESSED_ERRORS = REGISTRY.register(Counter(
+    'homework_suppressed_errors_total',
+    'Число повторов ошибок, не отправленных в Telegram',
+    label='exception'
+))
+WEBHOOK_REQUESTS = REGISTRY.register(Counter(
+    'homework_webhook_requests_total',
+    'Число запросов к вебхуку по кодам ответа',
+    label='code'
+))
+API_CACHE = REGISTRY.register(Counter(
+    'homework_api_cache_total',
+    'Число ответов API по результату кеша: not_modified — ответ 304, '
+    'unchanged — тело не изменилось, miss — новое тело',
+    label='result'
+))
+LAST_SUCCESS = REGISTRY.register(Gauge(
+    'homework_tenant_last_success_timestamp_seconds',
+    'Время последнего успешного запроса к API по чатам подписчиков',
+    label='chat_id'
+))
+
+
+def send_chat_message(bot, chat_id, message):
+    """Отправляет сообщение в указанный чат Telegram."""
+    started = time.perf_counter()
     try:
-        logging.info(
-            START_SENDING_MESSAGE.format(message, TELEGRAM_CHAT_ID)
-        )
-        bot.send_message(TELEGRAM_CHAT_ID, message)
+        logging.info(START_SENDING_MESSAGE, message, chat_id)
+        with SPANS.span('telegram'):
+            bot.send_message(
+                chat_id, message, timeout=TELEGRAM_READ_TIMEOUT
+            )
     except telegram.error.TelegramError as error:
-        logging.exception(UNSENT_MESSAGE.format(message, error))
+        ERRORS.inc(type(error).__name__)
+        logging.exception(UNSENT_MESSAGE, message, error)
         return False
     else:
-        logging.info(
-            SENT_MESSAGE.format(message, TELEGRAM_CHAT_ID))
+        logging.info(SENT_MESSAGE, message, chat_id)
         return True
+    finally:
+        SEND_LATENCY.observe(time.perf_counter() - started)
 
 
-def get_api_answer(current_timestamp):
-    """Делает запрос к эндпоинту API-сервиса и возвращает ответ API."""
+def send_message(bot, message):
+    """Отправляет сообщение в Telegram чат."""
+    return send_chat_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+def check_status_code(response, headers, params):
+    """Проверяет, что код ответа API — 200.
+    На коды 5xx и 429 выбрасывает HTTPErrorException, такой запрос стоит
+    повторить. Прочие коды, например 401 на отозванный токен, означают,
+    что повтор не поможет, и на них выбрасывается ClientErrorException.
+    """
+    status_code = response.status_code
+    if status_code == OK:
+        return
+    error = (
+        HTTPErrorException
+        if status_code >= 500 or status_code == TOO_MANY_REQUESTS else
+        ClientErrorException
+    )
+    raise error(
+        INVALID_RESPONSE_CODE.format(ENDPOINT, headers, params, status_code)
+    )
+
+
+def read_response(response, headers, params, cached=None, cache=None):
+    """Проверяет код ответа API и возвращает разобранный ответ.
+    Ответ 304 на условный запрос и тело, совпадающее с прошлым, берутся из
+    кеша cache без декодирования JSON.
+    """
+    status_code = response.status_code
+    if cached is not None and status_code == NOT_MODIFIED:
+        API_CACHE.inc('not_modified')
+        return cached.response
+    check_status_code(response, headers, params)
+    if cache is None:
+        return response.json()
+    statuses, unchanged = cache.load(headers, response)
+    API_CACHE.inc('unchanged' if unchanged else 'miss')
+    return statuses
+
+
+def stream_response(response, headers, params, index):
+    """Проверяет код ответа API и разбирает тело потоком.
+    Работы массива homeworks проверяются и сравниваются с индексом
+    статусов index по одной, по мере чтения тела. В разобранном ответе
+    остаются только первая работа, нужная планировщику, и работы с
+    изменившимся статусом, поэтому память не растёт с длиной истории.
+    """
+    with response:
+        check_status_code(response, headers, params)
+        kept, problems, positions = [], [], count()
+
+        def collect(homework):
+            position = next(positions)
+            if not VALIDATOR.item_valid(homework):
+                problems.extend(VALIDATOR.item_problems(position, homework))
+            elif not kept or index.changed(homework):
+                kept.append(homework)
+
+        try:
+            statuses, streamed = parse_object(
+                response.iter_content(STREAM_CHUNK_SIZE), 'homeworks', collect
+            )
+        except ValueError:
+            raise JSONDecodeErrorException(JSON_ERROR)
+    if problems:
+        raise InvalidResponseException(
+            INVALID_RESPONSE.format('; '.join(problems))
+        )
+    if streamed:
+        statuses['homeworks'] = kept
+    return statuses
+
+
+def request_api_answer(current_timestamp, headers, session=None, cache=None,
+                       index=None):
+    """Делает запрос к эндпоинту API-сервиса с заголовками подписчика.
+    Если передана сессия, запрос идёт через её пул постоянных соединений.
+    С кешем ответов cache запрос отправляется с валидаторами ETag и
+    Last-Modified прошлого ответа, а ответ 304 берётся из кеша. С индексом
+    статусов index тело ответа разбирается потоком.
+    """
     params = {'from_date': current_timestamp}
+    cached = None if cache is None else cache.get(headers)
     data = {
         'url': ENDPOINT,
-        'headers': HEADERS,
+        'headers': (
+            headers if cached is None else {**headers, **cached.validators()}
+        ),
         'params': params,
+        'timeout': (API_CONNECT_TIMEOUT, API_READ_TIMEOUT),
     }
+    if index is not None:
+        data['stream'] = True
     try:
-        logging.info(API_REQUEST_START.format(**data))
-        homework_statuses = requests.get(**data)
-        status_code = homework_statuses.status_code
-        if status_code != OK:
-            raise HTTPErrorException(
-                INVALID_RESPONSE_CODE.format(
-                    ENDPOINT,
-                    HEADERS,
-                    params,
-                    status_code
+        logging.info(API_REQUEST_START, data)
+        started = time.perf_counter()
+        try:
+            with SPANS.span('http'):
+                homework_statuses = (session or requests).get(**data)
+        finally:
+            API_LATENCY.observe(time.perf_counter() - started)
+        with SPANS.span('decode'):
+            statuses = (
+                read_response(
+                    homework_statuses, headers, params, cached, cache
                 )
+                if index is None else
+                stream_response(homework_statuses, headers, params, index)
             )
-        statuses = homework_statuses.json()
     except requests.exceptions.JSONDecodeError:
         raise JSONDecodeErrorException(JSON_ERROR)
+    except requests.Timeout as error:
+        raise TimeoutException(
+            REQUEST_ERROR.format(error, ENDPOINT, headers, params)
+        )
     except requests.ConnectionError as error:
         raise ConnectionErrorException(
-            REQUEST_ERROR.format(error, ENDPOINT, HEADERS, params)
+            REQUEST_ERROR.format(error, ENDPOINT, headers, params)
         )
     except requests.URLRequired as error:
         raise URLRequiredException(
-            REQUEST_ERROR.format(error, ENDPOINT, HEADERS, params)
-        )
-    except requests.Timeout as error:
-        raise TimeoutException(
-            REQUEST_ERROR.format(error, ENDPOINT, HEADERS, params)
+            REQUEST_ERROR.format(error, ENDPOINT, headers, params)
         )
     for error_code in ERROR_CODES:
         if error_code in statuses:
@@ -139,6 +389,11 @@ def get_api_answer(current_timestamp):
     return statuses
 
 
+def get_api_answer(current_timestamp):
+    """Делает запрос к эндпоинту API-сервиса и возвращает ответ API."""
+    return request_api_answer(current_timestamp, HEADERS)
+
+
 def check_response(response):
     """Проверяет ответ API на корректность.
     Возвращает список домашних работ.
@@ -156,79 +411,649 @@ def check_response(response):
 
 def parse_status(homework):
     """Извлекает из конкретной домашней работы вердикт по этой работе."""
-    name = homework['homework_name']
-    status = homework['status']
-    if status not in VERDICTS:
-        raise ValueError(UNKNOWN_STATUS.format(status))
-    return CHANGED_VERDICT.format(name, VERDICTS[status])
+    return RENDERER(homework)
+
+
+def renderer_for(tenant):
+    """Возвращает отрисовщик уведомлений на языке подписчика."""
+    return RENDERERS.get(tenant.locale, RENDERER)
+
+
+def validate_response(response):
+    """Проверяет ответ API целиком, включая каждую работу.
+    Возвращает список домашних работ. Обо всех найденных проблемах
+    сообщает одно исключение InvalidResponseException.
+    """
+    problems = VALIDATOR.problems(response)
+    if problems:
+        raise InvalidResponseException(
+            INVALID_RESPONSE.format('; '.join(problems))
+        )
+    return response['homeworks']
+
+
+def check_cached_response(cache, tenant, response):
+    """Проверяет ответ API на запрос подписчика.
+    Ответ, взятый из кеша cache и уже проверенный, повторно не проверяется.
+    """
+    if cache is None:
+        return validate_response(response)
+    return cache.check(tenant.headers, response, validate_response)
 
 
 def check_tokens():
     """Проверяет доступность переменных окружения необходимых для работы бота.
     Если отсутствует хотя бы одна переменная — возвращает False, иначе — True.
+    При работе с файлом подписчиков обязателен только токен Telegram.
     """
-    missed_tokens = [token for token in TOKENS if not globals()[token]]
+    tokens = TENANTS_FILE_TOKENS if TENANTS_FILE else TOKENS
+    missed_tokens = [token for token in tokens if not globals()[token]]
     if missed_tokens:
-        logging.exception(MISSING_TOKEN.format(missed_tokens))
+        logging.exception(MISSING_TOKEN, missed_tokens)
     return not missed_tokens
 
 
+async def send_to(outbox, chat_id, message):
+    """Ставит сообщение в очередь отправки outbox и ждёт отправки."""
+    with SPANS.span('send'):
+        return await outbox.send(chat_id, message)
+
+
+def render_report(render, homework):
+    """Собирает уведомление о статусе работы отрисовщиком render."""
+    with SPANS.span('render'):
+        return render(homework)
+
+
+async def send_report(tenant, report, outbox):
+    """Отправляет подписчику сообщение, если оно отличается от предыдущего."""
+    if report == tenant.last_report:
+        return False
+    if not await send_to(outbox, tenant.chat_id, report):
+        return False
+    tenant.last_report = report
+    return True
+
+
+def check_deadline(deadline, budget):
+    """Выбрасывает TimeoutException, если срок проверки истёк.
+    budget — отведённое на проверку время, которое попадёт в сообщение.
+    """
+    if (
+        deadline is not None
+        and asyncio.get_running_loop().time() > deadline
+    ):
+        raise TimeoutException(POLL_BUDGET_EXCEEDED.format(budget))
+
+
+async def fetch_within_budget(client, tenant, budget):
+    """Запрашивает API, прерывая запрос с повторами по истечении budget."""
+    try:
+        return await asyncio.wait_for(client.get(tenant), budget)
+    except asyncio.TimeoutError:
+        raise TimeoutException(POLL_BUDGET_EXCEEDED.format(budget))
+
+
+async def fan_out(tenant, report, outbox):
+    """Отправляет уведомление в основной чат подписчика и в чаты подписок.
+    Пока уведомление не доставлено в основной чат, чаты подписок его не
+    получают, поэтому повтор отправки их не задублирует. Затем оно
+    одновременно рассылается в чаты подписок: сбой одного чата не мешает
+    остальным, учитывается в метрике и не повторяется.
+    """
+    if not await send_to(outbox, tenant.chat_id, report):
+        return False
+    if not tenant.subscribers:
+        return True
+    results = await asyncio.gather(
+        *(
+            send_to(outbox, chat_id, report)
+            for chat_id in tenant.subscribers
+        ),
+        return_exceptions=True
+    )
+    for chat_id, result in zip(tenant.subscribers, results):
+        if result is not True:
+            UNSENT_SUBSCRIPTIONS.inc()
+            logging.warning(UNSENT_SUBSCRIPTION, report, chat_id, result)
+    return True
+
+
+async def send_verdicts(tenant, changes, outbox, deadline=None,
+                        budget=None):
+    """Отправляет подписчику по сообщению на каждое изменение статуса.
+    Сообщение собирается один раз и рассылается во все чаты подписчика.
+    Статус работы запоминается в индексе только после успешной отправки.
+    Уже поставленные в очередь сообщения не отменяются, но после истечения
+    срока deadline, отведённого на проверку в budget секунд, новые не
+    отправляются. Если outbox — сборщик сводок, уведомления отправляются
+    сводками.
+    """
+    render = renderer_for(tenant)
+    if isinstance(outbox, Coalescer):
+        check_deadline(deadline, budget)
+        return await send_digest(
+            tenant, changes,
+            [render_report(render, homework) for homework in changes],
+            outbox
+        )
+    for homework in changes:
+        check_deadline(deadline, budget)
+        report = render_report(render, homework)
+        if not await fan_out(tenant, report, outbox):
+            return False
+        tenant.statuses.apply(homework)
+        tenant.last_report = report
+    return True
+
+
+async def send_digest(tenant, changes, reports, digest):
+    """Отправляет уведомления об изменениях через сводки digest.
+    Уведомления ставятся в сводки все сразу и в порядке изменений. Статус
+    работы запоминается, если сводка с её уведомлением отправлена.
+    """
+    results = await asyncio.gather(*(
+        fan_out(tenant, report, digest) for report in reports
+    ))
+    for homework, report, sent in zip(changes, reports, results):
+        if sent:
+            tenant.statuses.apply(homework)
+            tenant.last_report = report
+    return all(results)
+
+
+def update_activity(tenant, homeworks):
+    """Запоминает данные ответа API, нужные планировщику опроса."""
+    if homeworks:
+        tenant.last_status = homeworks[0].get('status')
+        tenant.idle_polls = 0
+    else:
+        tenant.idle_polls += 1
+
+
+async def report_error(tenant, error, outbox, errors=None):
+    """Отправляет подписчику сообщение об ошибке.
+    С кешем errors повторы ошибки с тем же отпечатком подавляются на время
+    его окна, а их число сообщается вместе с первым повтором после окна.
+    Без кеша подавляется только повтор предыдущего сообщения подписчику.
+    """
+    message = PROGRAM_ERROR.format(error)
+    if errors is None:
+        return (
+            message != tenant.last_report
+            and await send_to(outbox, tenant.chat_id, message)
+        )
+    key = errors.key(tenant.chat_id, error)
+    repeats = errors.check(key)
+    if repeats is None:
+        SUPPRESSED_ERRORS.inc(type(error).__name__)
+        logging.info(SUPPRESSED_ERROR, tenant.chat_id, message)
+        return False
+    if repeats:
+        message = REPEATED_ERROR.format(message, repeats)
+    if not await send_to(outbox, tenant.chat_id, message):
+        return False
+    errors.remember(key)
+    return True
+
+
+async def poll_tenant(tenant, client, outbox, budget=None,
+                      errors=None, digest=None):
+    """Выполняет один цикл проверки домашних работ подписчика.
+    Запрос к API выполняется клиентом client, сообщения ставятся в очередь
+    отправки outbox. Уведомление отправляется по каждой работе, статус
+    которой изменился, а со сборщиком digest — сводками. Проверка, не
+    уложившаяся в budget секунд, прерывается с TimeoutException. Ошибки
+    отправляются через кеш errors. Этапы проверки учитываются в отрезках
+    SPANS, а проверка дольше SLOW_POLL_TIME секунд попадает в журнал.
+    """
+    with SPANS.cycle(tenant.chat_id):
+        await poll_stages(tenant, client, outbox, budget, errors, digest)
+
+
+async def poll_stages(tenant, client, outbox, budget, errors, digest):
+    """Этапы проверки подписчика: запрос, проверка ответа и уведомления."""
+    deadline = (
+        None if budget is None
+        else asyncio.get_running_loop().time() + budget
+    )
+    try:
+        response = await fetch_within_budget(client, tenant, budget)
+        LAST_SUCCESS.set(time.time(), tenant.chat_id)
+        with SPANS.span('validate'):
+            homeworks = check_cached_response(client.cache, tenant, response)
+        update_activity(tenant, homeworks)
+        async with tenant.lock:
+            changes = tenant.statuses.diff(homeworks)
+            if changes:
+                sent = await send_verdicts(
+                    tenant, changes, digest or outbox, deadline, budget
+                )
+            else:
+                sent = await send_report(tenant, NO_VERDICTS, outbox)
+            if sent:
+                tenant.from_date = response.get(
+                    'current_date', tenant.from_date
+                )
+        if not sent:
+            logging.info(NO_VERDICTS)
+    except Exception as error:
+        ERRORS.inc(type(error).__name__)
+        logging.exception(PROGRAM_ERROR.format(error))
+        if await report_error(tenant, error, outbox, errors):
+            logging.info(ERROR)
+        else:
+            logging.info(NO_ERROR)
+
+
+async def ingest(registry, outbox, token, payload, state=None, digest=None):
+    """Обрабатывает событие вебхука о статусах работ подписчика.
+    Данные проверяются по тем же правилам, что и ответ API, и если хотя бы
+    одна работа некорректна, ни одно уведомление не отправляется.
+    Отправленные уведомления запоминаются в индексе статусов подписчика
+    под его блокировкой, поэтому опрос API их не повторяет, даже если идёт
+    одновременно. Возвращает число изменений.
+    """
+    tenant = registry.get(token)
+    if tenant is None:
+        raise UnknownTenantException(UNKNOWN_TENANT)
+    homeworks = validate_response(payload)
+    async with tenant.lock:
+        changes = tenant.statuses.diff(homeworks)
+        logging.info(WEBHOOK_EVENT, tenant.chat_id, len(changes))
+        if not await send_verdicts(tenant, changes, digest or outbox):
+            raise ConnectionErrorException(
+                UNSENT_EVENT.format(tenant.chat_id)
+            )
+    if state is not None:
+        state.mark(tenant)
+    return len(changes)
+
+
+async def emit_backfill(outbox, state, tenant, changes, current_date):
+    """Отправляет подписчику догруженные изменения и сдвигает его курсор.
+    Курсор сдвигается, только если отправлены все изменения. Изменения,
+    которые, пока шла догрузка, уже отправил вебхук, пропускаются.
+    """
+    async with tenant.lock:
+        changes = [
+            homework for homework in changes
+            if tenant.statuses.changed(homework)
+        ]
+        if not await send_verdicts(tenant, changes, outbox):
+            return False
+        if current_date is not None:
+            tenant.from_date = current_date
+    if state is not None:
+        state.mark(tenant)
+    return True
+
+
+async def catch_up(engine, client, outbox):
+    """Догружает статусы, пропущенные подписчиками, пока бот не работал.
+    Подписчики, курсор которых отстал больше чем на BACKFILL_LAG секунд,
+    догружаются до начала опроса одним запросом каждый. Запросы идут через
+    пул клиента client, но без кеша ответов, и делят ведро частоты запросов
+    с опросом. В потоковом режиме клиента ответы разбираются потоком.
+    Возвращает число догруженных подписчиков.
+    """
+    if not BACKFILL_LAG:
+        return 0
+    backfill = Backfill(
+        partial(
+            client.limiter.run,
+            partial(request_api_answer, session=client.session)
+        ),
+        lag=BACKFILL_LAG,
+        concurrency=BACKFILL_CONCURRENCY,
+        budget=engine.scheduler.budget,
+        check=validate_response,
+        stream=client.stream
+    )
+    tenants = await backfill.run(
+        engine.registry, partial(emit_backfill, outbox, engine.state)
+    )
+    await engine.flush_state()
+    return tenants
+
+
+def build_registry(from_date):
+    """Собирает реестр подписчиков из файла TENANTS_FILE.
+    Подписчик из переменных окружения добавляется в реестр, если они заданы,
+    вместе с чатами подписок TELEGRAM_SUBSCRIBERS. Если его токен уже есть
+    в файле, чаты из окружения подписываются на подписчика из файла, а его
+    подписки и язык сохраняются.
+    Для каждого языка подписчиков должны быть шаблоны в LOCALES_FILE.
+    """
+    if TENANTS_FILE:
+        registry = TenantRegistry.from_file(TENANTS_FILE, from_date)
+    else:
+        registry = TenantRegistry()
+    if PRACTICUM_TOKEN and TELEGRAM_CHAT_ID:
+        registry.add(
+            PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, from_date,
+            subscribers=filter(None, TELEGRAM_SUBSCRIBERS.split(','))
+        )
+    unknown = {tenant.locale for tenant in registry} - {None, *RENDERERS}
+    if unknown:
+        raise ValueError(
+            UNKNOWN_LOCALE.format(', '.join(sorted(unknown)), LOCALES_FILE)
+        )
+    return registry
+
+
+def register_queue_metrics(client, outbox, scheduler):
+    """Регистрирует метрики глубины очередей бота."""
+    REGISTRY.register(Gauge(
+        'homework_api_in_flight',
+        'Число выполняющихся запросов к API',
+        func=lambda: client.limiter.in_flight
+    ))
+    REGISTRY.register(Gauge(
+        'homework_scheduled_tenants',
+        'Число подписчиков, ожидающих очередного опроса',
+        func=lambda: len(scheduler)
+    ))
+    REGISTRY.register(Gauge(
+        'homework_telegram_queue_depth',
+        'Число сообщений в очереди отправки в Telegram',
+        func=lambda: len(outbox)
+    ))
+
+
+def create_bot(base_url=None):
+    """Создаёт бота Telegram с пулом соединений и таймаутами."""
+    return telegram.Bot(
+        token=TELEGRAM_TOKEN,
+        base_url=base_url,
+        request=Request(
+            con_pool_size=TELEGRAM_CONCURRENCY,
+            connect_timeout=TELEGRAM_CONNECT_TIMEOUT,
+            read_timeout=TELEGRAM_READ_TIMEOUT
+        )
+    )
+
+
+def create_outbox(bot, budget=None, recorder=None):
+    """Создаёт очередь отправки сообщений в Telegram.
+    Общую частоту отправки ограничивает ведро budget, если оно передано.
+    Отправки записываются в recorder, если он передан.
+    """
+    send = partial(send_chat_message, bot)
+    if recorder is not None:
+        send = recorder.record_sends(send)
+    return SendQueue(
+        send,
+        workers=TELEGRAM_CONCURRENCY,
+        maxsize=TELEGRAM_QUEUE_SIZE,
+        rate=TELEGRAM_RATE_LIMIT,
+        chat_rate=TELEGRAM_CHAT_RATE_LIMIT,
+        bucket=budget
+    )
+
+
+def create_client(recorder=None):
+    """Создаёт клиент API Практикума с пулом соединений и кешем ответов.
+    В потоковом режиме API_STREAMING кеш ответов не используется: тело
+    ответа не хранится целиком. Запросы и ответы записываются в recorder,
+    если он передан.
+    """
+    session = create_session(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        keep_alive=HTTP_KEEP_ALIVE
+    )
+    if recorder is not None:
+        session.hooks['response'].append(recorder.record_response)
+    cache = None if API_STREAMING else ResponseCache()
+    return PracticumClient(
+        partial(request_api_answer, session=session, cache=cache),
+        Limiter(API_CONCURRENCY, name='api'),
+        retry=RetryPolicy(
+            attempts=API_RETRY_ATTEMPTS,
+            base_delay=API_RETRY_DELAY,
+            max_delay=API_RETRY_MAX_DELAY
+        ),
+        breaker=CircuitBreaker(
+            failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+            recovery_time=CIRCUIT_RECOVERY_TIME
+        ),
+        session=session,
+        cache=cache,
+        stream=API_STREAMING
+    )
+
+
+def open_recorder(name=None):
+    """Открывает запись обмена с API и Telegram в файл TRAFFIC_RECORD.
+    У шарда name файл записи свой. Возвращает None, если запись выключена.
+    """
+    if not TRAFFIC_RECORD:
+        return None
+    if name is None:
+        return Recorder(TRAFFIC_RECORD)
+    return Recorder(f'{TRAFFIC_RECORD}.{name}')
+
+
+def close_all(client, outbox, state, recorder):
+    """Закрывает клиент API, очередь отправки, хранилище и запись обмена."""
+    client.close()
+    outbox.close()
+    if state is not None:
+        state.backend.close()
+    if recorder is not None:
+        recorder.close()
+
+
+def save_profile(mode, report):
+    """Сохраняет отчёт профиля mode вместе с таблицей этапов опроса."""
+    path = PROFILE_FILE.format(mode, os.getpid())
+    with open(path, 'w', encoding='utf-8') as output:
+        output.write(report + '\n\n' + SPANS.summary() + '\n')
+    logging.info(PROFILE_SAVED, mode, path)
+
+
+def restore_state(registry, path=None):
+    """Открывает хранилище состояния и восстанавливает курсоры подписчиков.
+    По умолчанию хранилище открывается по пути STATE_PATH. Возвращает None,
+    если хранилище не настроено.
+    """
+    path = path or STATE_PATH
+    if not path:
+        return None
+    state = StateStore(open_backend(STATE_BACKEND, path))
+    logging.info(STATE_RESTORED, state.restore(registry), len(registry))
+    return state
+
+
+def polling_intervals():
+    """Интервалы опроса: базовый, на время проверки работы и наибольший.
+    Когда события приходят вебхуком, опрос API лишь изредка сверяет
+    состояние подписчиков раз в WEBHOOK_RECONCILE_TIME секунд.
+    """
+    if WEBHOOK_PORT:
+        return (WEBHOOK_RECONCILE_TIME,) * 3
+    return RETRY_TIME, REVIEWING_RETRY_TIME, MAX_RETRY_TIME
+
+
+def create_digest(outbox):
+    """Создаёт сборщик сводок уведомлений или None, если сводки выключены.
+    Уведомления чата копятся DIGEST_WINDOW секунд или до DIGEST_SIZE штук.
+    """
+    if not DIGEST_WINDOW:
+        return None
+    return Coalescer(
+        outbox.send,
+        window=DIGEST_WINDOW,
+        max_size=DIGEST_SIZE,
+        saved=DIGEST_SAVED.inc
+    )
+
+
+def create_engine(registry, client, outbox, state=None, budget=None,
+                  digest=None, clock=time.monotonic):
+    """Создаёт движок опроса подписчиков с адаптивным планировщиком.
+    Повторы ошибок в чаты подписчиков подавляются общим кешем отпечатков,
+    уведомления о статусах отправляются через сборщик сводок digest.
+    Частоту запросов к API ограничивает ведро budget, по умолчанию —
+    собственное ведро процесса на API_RATE_LIMIT запросов в секунду.
+    Планировщик, ведро и кеш ошибок идут по часам clock, а ожидания —
+    по времени цикла событий, поэтому с VirtualClock и его циклом опрос
+    выполняется в виртуальном времени.
+    """
+    if budget is None:
+        budget = TokenBucket(API_RATE_LIMIT, clock=clock)
+    base_interval, reviewing_interval, max_interval = polling_intervals()
+    scheduler = AdaptiveScheduler(
+        base_interval=base_interval,
+        reviewing_interval=reviewing_interval,
+        max_interval=max_interval,
+        budget=budget,
+        clock=clock
+    )
+    return PollingEngine(
+        registry,
+        partial(
+            poll_tenant,
+            client=client,
+            outbox=outbox,
+            budget=POLL_BUDGET,
+            errors=ErrorCache(ERROR_DEDUP_TTL, ERROR_DEDUP_SIZE, clock),
+            digest=digest
+        ),
+        concurrency=POLLING_WORKERS,
+        scheduler=scheduler,
+        state=state,
+        flush_interval=STATE_FLUSH_TIME
+    )
+
+
+async def serve_shard(name, inbox, done, api_budget, telegram_budget,
+                      bot_url=None):
+    """Опрашивает подписчиков, которых супервизор выдал шарду name.
+    Подписчики добавляются и снимаются командами из очереди inbox, снятие
+    подтверждается в очередь done после сохранения их состояния. Частоты
+    запросов к API и отправки в Telegram ограничены вёдрами, общими для
+    всех шардов. Хранилище состояния общее для всех шардов, поэтому
+    переехавший подписчик продолжает опрос с сохранённого курсора.
+    """
+    recorder = open_recorder(name)
+    outbox = create_outbox(create_bot(bot_url), telegram_budget, recorder)
+    client = create_client(recorder)
+    registry = TenantRegistry()
+    state = restore_state(registry)
+    engine = create_engine(
+        registry, client, outbox, state, api_budget, create_digest(outbox)
+    )
+    follow_assignments(inbox, engine, name, done)
+    try:
+        await engine.run_forever()
+    finally:
+        close_all(client, outbox, state, recorder)
+
+
+def run_shard(name, inbox, done, api_budget, telegram_budget):
+    """Точка входа процесса-шарда со своим журналом."""
+    logging.getLogger().handlers.clear()
+    listener = configure_logging(
+        SHARD_LOG_FILE.format(name),
+        sampling=parse_sampling(LOG_SAMPLING, globals()),
+        spans=SPANS
+    )
+    SignalProfiler(save_profile).install()
+    try:
+        asyncio.run(
+            serve_shard(name, inbox, done, api_budget, telegram_budget)
+        )
+    finally:
+        listener.stop()
+
+
+def run_supervisor(registry):
+    """Распределяет подписчиков реестра по SHARD_WORKERS процессам."""
+    Supervisor(
+        run_shard,
+        [
+            (
+                tenant.token, tenant.chat_id, tenant.from_date,
+                tenant.locale, tenant.subscribers
+            )
+            for tenant in registry
+        ],
+        workers=SHARD_WORKERS,
+        args=(
+            SharedTokenBucket(API_RATE_LIMIT),
+            SharedTokenBucket(TELEGRAM_RATE_LIMIT),
+        ),
+        restart_delay=SHARD_RESTART_TIME
+    ).run()
+
+
+async def serve(engine, outbox, state=None, client=None, digest=None):
+    """Опрашивает подписчиков и принимает события вебхука.
+    Вебхук запускается, только если задан WEBHOOK_PORT. С клиентом client
+    перед опросом догружаются статусы, пропущенные за время простоя.
+    Уведомления о статусах отправляются через сборщик сводок digest.
+    """
+    server = None
+    if WEBHOOK_PORT:
+        server = start_webhook_server(
+            int(WEBHOOK_PORT),
+            partial(
+                ingest, engine.registry, outbox, state=state, digest=digest
+            ),
+            asyncio.get_running_loop(),
+            secret=WEBHOOK_SECRET,
+            count=lambda code: WEBHOOK_REQUESTS.inc(str(code))
+        )
+        logging.info(WEBHOOK_STARTED, WEBHOOK_PORT)
+    try:
+        if client is not None:
+            await catch_up(engine, client, digest or outbox)
+        await engine.run_forever()
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
 def main():
     """Основная логика работы бота."""
     if not check_tokens():
         logging.critical(MISSING_ENVIRONMENT_VARIABLES, exc_info=True)
         raise NameError(MISSING_ENVIRONMENT_VARIABLES)
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    server_variable = int(time.time())
-    prev_report = {}
-    current_report = {}
-    while True:
-        try:
-            response = get_api_answer(server_variable)
-            homeworks = check_response(response)
-            if homeworks:
-                current_report['key'] = parse_status(homeworks[0])
-            else:
-                current_report['key'] = NO_VERDICTS
-            if (
-                    current_report != prev_report
-                    and send_message(bot, current_report['key'])
-            ):
-                prev_report = current_report.copy()
-                server_variable = response.get(
-                    'current_date',
-                    server_variable
-                )
-            else:
-                logging.info(NO_VERDICTS)
-        except Exception as error:
-            message = PROGRAM_ERROR.format(error)
-            current_report['key'] = message
-            logging.exception(message)
-            if current_report != prev_report and send_message(bot, message):
-                logging.info(ERROR)
-            else:
-                logging.info(NO_ERROR)
-        finally:
-            time.sleep(RETRY_TIME)
+    if SHARD_WORKERS > 1:
+        if not STATE_PATH or STATE_BACKEND != 'sqlite':
+            raise ValueError(SHARED_STATE_REQUIRED)
+        run_supervisor(build_registry(int(time.time())))
+        return
+    recorder = open_recorder()
+    outbox = create_outbox(create_bot(), recorder=recorder)
+    client = create_client(recorder)
+    registry = build_registry(int(time.time()))
+    state = restore_state(registry)
+    digest = create_digest(outbox)
+    engine = create_engine(
+        registry, client, outbox, state, digest=digest
+    )
+    if METRICS_PORT:
+        register_queue_metrics(client, outbox, engine.scheduler)
+        start_metrics_server(int(METRICS_PORT))
+        logging.info(METRICS_STARTED, METRICS_PORT)
+    try:
+        asyncio.run(serve(engine, outbox, state, client, digest))
+    finally:
+        close_all(client, outbox, state, recorder)
 
 
 if __name__ == '__main__':
-    logging.basicConfig(
-        format='%(asctime)s - %(name)s '
-               '- (%(filename)s).%(funcName)s(%(lineno)d) '
-               '- %(levelname)s - %(message)s',
-        level=logging.INFO,
-        handlers=[
-            RotatingFileHandler(
-                __file__ + '.log',
-                maxBytes=50000000,
-                backupCount=5,
-                encoding='utf-8'
-            ),
-            logging.StreamHandler(sys.stdout)
-        ]
+    listener = configure_logging(
+        LOG_FILE,
+        sampling=parse_sampling(LOG_SAMPLING, globals()),
+        spans=SPANS
     )
+    SignalProfiler(save_profile).install()
+    atexit.register(listener.stop)
     logger = logging.getLogger(__name__)
     main()
 
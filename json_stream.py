@@ -0,0 +1,109 @@
+import codecs
+import json
+
+WHITESPACE = ' \t\n\r'
+UNEXPECTED_END = 'Поток JSON оборвался на позиции {}'
+UNEXPECTED_CHAR = 'Ожидался символ {!r}, получен {!r} на позиции {}'
+DECODER = json.JSONDecoder()
+
+
+class ChunkReader:
+    """Читает JSON-значения из потока кусков байтов.
+    В памяти хранится только непрочитанный остаток текущего куска и
+    значение, которое ещё не разобрано целиком.
+    """
+
+    def __init__(self, chunks, encoding='utf-8'):
+        """Готовит разбор кусков chunks в кодировке encoding."""
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._buffer = ''
+        self._position = 0
+        self._consumed = 0
+
+    def _fill(self):
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            if text:
+                self._consumed += self._position
+                self._buffer = self._buffer[self._position:] + text
+                self._position = 0
+                return True
+        return False
+
+    def peek(self):
+        """Возвращает следующий значащий символ, не забирая его."""
+        while True:
+            buffer, position = self._buffer, self._position
+            while position < len(buffer) and buffer[position] in WHITESPACE:
+                position += 1
+            self._position = position
+            if position < len(buffer):
+                return buffer[position]
+            if not self._fill():
+                raise ValueError(
+                    UNEXPECTED_END.format(self._consumed + position)
+                )
+
+    def expect(self, char):
+        """Забирает следующий значащий символ, равный char."""
+        found = self.peek()
+        if found != char:
+            raise ValueError(UNEXPECTED_CHAR.format(
+                char, found, self._consumed + self._position
+            ))
+        self._position += 1
+
+    def value(self):
+        """Разбирает и возвращает следующее JSON-значение целиком."""
+        self.peek()
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._position = end
+            return value
+
+
+def stream_array(reader, on_item):
+    """Передаёт в on_item элементы JSON-массива по мере их разбора."""
+    reader.expect('[')
+    if reader.peek() == ']':
+        reader.expect(']')
+        return
+    while True:
+        on_item(reader.value())
+        if reader.peek() == ']':
+            reader.expect(']')
+            return
+        reader.expect(',')
+
+
+def parse_object(chunks, key, on_item):
+    """Разбирает JSON-объект из потока chunks, не собирая массив key.
+    Каждый элемент массива под ключом key передаётся в on_item сразу после
+    разбора. Возвращает словарь остальных ключей объекта и признак того,
+    что массив key был разобран потоково. Если под ключом key не массив,
+    значение попадает в словарь как есть.
+    """
+    reader = ChunkReader(chunks)
+    envelope, streamed = {}, False
+    reader.expect('{')
+    if reader.peek() == '}':
+        return envelope, streamed
+    while True:
+        name = reader.value()
+        reader.expect(':')
+        if name == key and reader.peek() == '[':
+            stream_array(reader, on_item)
+            streamed = True
+        else:
+            envelope[name] = reader.value()
+        if reader.peek() == '}':
+            return envelope, streamed
+        reader.expect(',')
@@ -0,0 +1,107 @@
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import queue
+import sys
+
+LOG_FORMAT = (
+    '%(asctime)s - %(name)s - (%(filename)s).%(funcName)s(%(lineno)d) '
+    '- %(levelname)s - %(message)s'
+)
+INVALID_SAMPLING = (
+    'Правило выборки журнала "{}" должно иметь вид ИМЯ_ШАБЛОНА=N'
+)
+
+
+class LazyQueueHandler(QueueHandler):
+    """Передаёт записи журнала в очередь, не форматируя их.
+    Сообщение собирается из шаблона и аргументов уже в потоке слушателя
+    очереди, поэтому поток, пишущий в журнал, не тратит время на
+    форматирование и не ждёт записи на диск. С отрезками spans время
+    передачи записей учитывается в этапе logging.
+    """
+
+    def __init__(self, queue, spans=None):
+        """Обработчик, передающий записи в очередь queue."""
+        super().__init__(queue)
+        self.spans = spans
+
+    def handle(self, record):
+        """Передаёт запись в очередь, учитывая время передачи."""
+        if self.spans is None:
+            return super().handle(record)
+        with self.spans.span('logging'):
+            return super().handle(record)
+
+    def prepare(self, record):
+        """Возвращает запись без изменений."""
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает только каждую n-ю запись уровня INFO с данным шаблоном.
+    rates — словарь шаблон сообщения -> n, записи с прочими шаблонами и
+    записи других уровней пропускаются всегда.
+    """
+
+    def __init__(self, rates):
+        """Счёт записей каждого шаблона начинается с нуля."""
+        super().__init__()
+        self.rates = rates
+        self._counters = dict.fromkeys(rates, 0)
+
+    def filter(self, record):
+        """Решает, попадёт ли запись в журнал."""
+        rate = self.rates.get(record.msg)
+        if rate is None or record.levelno != logging.INFO:
+            return True
+        count = self._counters[record.msg]
+        self._counters[record.msg] = count + 1
+        return count % rate == 0
+
+
+def parse_sampling(spec, templates):
+    """Разбирает правила выборки вида "ИМЯ=N,ИМЯ=N".
+    Имена шаблонов ищутся в словаре templates, например globals() модуля.
+    """
+    rates = {}
+    for rule in filter(None, (rule.strip() for rule in spec.split(','))):
+        name, _, rate = rule.partition('=')
+        if name not in templates or not rate.isdigit():
+            raise ValueError(INVALID_SAMPLING.format(rule))
+        rates[templates[name]] = max(int(rate), 1)
+    return rates
+
+
+def configure_logging(path, level=logging.INFO, sampling=None,
+                      stream=sys.stdout, max_bytes=50000000, backup_count=5,
+                      spans=None):
+    """Настраивает неблокирующее журналирование в файл path и поток stream.
+    Записи попадают в очередь, а на диск и в поток их пишет отдельный
+    поток слушателя. Время передачи записей в очередь учитывается в
+    отрезках spans, если они переданы. Возвращает запущенного слушателя,
+    которого нужно остановить при завершении программы.
+    """
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [
+        RotatingFileHandler(
+            path,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding='utf-8'
+        ),
+        logging.StreamHandler(stream),
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    records = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(records, spans)
+    if sampling:
+        queue_handler.addFilter(SamplingFilter(sampling))
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,199 @@
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Metric:
+    """Метрика в формате Prometheus.
+    Каждый поток пишет в собственный срез значений без блокировок, срезы
+    суммируются только при чтении метрик.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, label=None):
+        """Метрика без значений; label — имя её метки, если она есть."""
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _new_shard(self):
+        return {}
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = self._new_shard()
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def _labels(self, value, extra=''):
+        pairs = []
+        if self.label is not None:
+            pairs.append(f'{self.label}="{value}"')
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def samples(self):
+        """Возвращает строки с текущими значениями метрики."""
+        raise NotImplementedError
+
+    def render(self):
+        """Возвращает метрику в текстовом формате Prometheus."""
+        return '\n'.join([
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+            *self.samples(),
+        ])
+
+
+class Counter(Metric):
+    """Счётчик событий, при заданном label — в разрезе значений метки."""
+
+    kind = 'counter'
+
+    def inc(self, label_value='', amount=1):
+        """Увеличивает счётчик."""
+        shard = self._shard()
+        shard[label_value] = shard.get(label_value, 0) + amount
+
+    def values(self):
+        """Возвращает суммы счётчика по значениям метки."""
+        totals = {}
+        for shard in list(self._shards):
+            for label_value, amount in dict(shard).items():
+                totals[label_value] = totals.get(label_value, 0) + amount
+        return totals
+
+    def samples(self):
+        """Возвращает строки с текущими значениями счётчика."""
+        return [
+            f'{self.name}{self._labels(label_value)} {amount}'
+            for label_value, amount in sorted(self.values().items())
+        ]
+
+
+class Gauge(Metric):
+    """Текущее значение: задаётся вызовом set или функцией func."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, label=None, func=None):
+        """Значение без метки можно вычислять при сборе функцией func."""
+        super().__init__(name, documentation, label)
+        self.func = func
+        self._values = {}
+
+    def set(self, value, label_value=''):
+        """Запоминает значение."""
+        self._values[label_value] = value
+
+    def samples(self):
+        """Возвращает строки с текущими значениями."""
+        if self.func is not None:
+            return [f'{self.name} {self.func()}']
+        return [
+            f'{self.name}{self._labels(label_value)} {value}'
+            for label_value, value in sorted(dict(self._values).items())
+        ]
+
+
+class Histogram(Metric):
+    """Распределение величины, например длительности вызовов, по корзинам."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        """Гистограмма с верхними границами корзин buckets."""
+        super().__init__(name, documentation)
+        self.buckets = tuple(buckets)
+
+    def _new_shard(self):
+        return [0] * (len(self.buckets) + 2)
+
+    def observe(self, value):
+        """Учитывает значение."""
+        shard = self._shard()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def totals(self):
+        """Возвращает число значений по корзинам и сумму значений."""
+        totals = [0] * (len(self.buckets) + 2)
+        for shard in list(self._shards):
+            for index, value in enumerate(list(shard)):
+                totals[index] += value
+        return totals
+
+    def samples(self):
+        """Возвращает строки с накопленными значениями корзин."""
+        totals = self.totals()
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + ('+Inf',), totals):
+            cumulative += count
+            labels = self._labels('', f'le="{bound}"')
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        lines.append(f'{self.name}_sum {totals[-1]}')
+        lines.append(f'{self.name}_count {cumulative}')
+        return lines
+
+
+class Registry:
+    """Набор метрик, отдаваемых одним эндпоинтом."""
+
+    def __init__(self):
+        """Создаёт пустой набор метрик."""
+        self.metrics = []
+
+    def register(self, metric):
+        """Добавляет метрику в набор и возвращает её."""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        return '\n'.join(metric.render() for metric in self.metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Отдаёт метрики реестра сервера по адресу /metrics."""
+
+    def do_GET(self):
+        """Отвечает текстом метрик или кодом 404."""
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Не пишет в журнал каждое чтение метрик."""
+
+
+def start_metrics_server(port, registry=REGISTRY, host='0.0.0.0'):
+    """Запускает эндпоинт метрик в фоновом потоке и возвращает сервер."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True
+    ).start()
+    return server
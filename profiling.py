@@ -0,0 +1,232 @@
+import cProfile
+from contextlib import contextmanager
+import contextvars
+import io
+import logging
+import pstats
+import signal
+import threading
+import time
+import tracemalloc
+
+PROFILES = ('cpu', 'memory')
+PROFILE_SIGNALS = {'cpu': 'SIGUSR1', 'memory': 'SIGUSR2'}
+UNKNOWN_PROFILE = 'Неизвестный профиль "{}", доступны: {}'
+STAGE_HEADER = 'этап         число     всего, с   максимум, с'
+STAGE_ROW = '{:<10} {:>7} {:>12.3f} {:>13.3f}'
+SLOW_CYCLE = 'Цикл %s занял %.3f с, этапы: %s'
+CYCLE = contextvars.ContextVar('cycle', default=None)
+
+
+def cpu_report(profiler, limit):
+    """Отчёт cProfile: limit функций с наибольшим суммарным временем."""
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats(
+        'cumulative'
+    ).print_stats(limit)
+    return output.getvalue()
+
+
+def memory_report(snapshot, limit):
+    """Отчёт tracemalloc: limit строк кода, выделивших больше памяти."""
+    return '\n'.join(
+        str(statistic)
+        for statistic in snapshot.statistics('lineno')[:limit]
+    )
+
+
+@contextmanager
+def profile(mode, report, limit=25):
+    """Профилирует блок кода и передаёт текст отчёта в report(текст).
+    mode — 'cpu' для cProfile, 'memory' для tracemalloc, None — без
+    профилирования и без накладных расходов.
+    """
+    if mode is None:
+        yield
+        return
+    if mode not in PROFILES:
+        raise ValueError(UNKNOWN_PROFILE.format(mode, ', '.join(PROFILES)))
+    if mode == 'cpu':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            report(cpu_report(profiler, limit))
+        return
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        report(memory_report(snapshot, limit))
+
+
+def format_trace(trace):
+    """Отрезки цикла строкой вида "этап 0.123, этап 0.045"."""
+    return ', '.join(f'{stage} {duration:.3f}' for stage, duration in trace)
+
+
+def log_slow_cycle(name, elapsed, trace):
+    """Пишет в журнал медленный цикл с его отрезками."""
+    logging.warning(SLOW_CYCLE, name, elapsed, format_trace(trace))
+
+
+class NullSpan:
+    """Отрезок, который ничего не измеряет."""
+
+    def __enter__(self):
+        """Ничего не засекает."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Ничего не учитывает и не подавляет исключений."""
+        return None
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    """Отрезок времени этапа stage, измеряемый блоком with."""
+
+    __slots__ = ('spans', 'stage', 'started')
+
+    def __init__(self, spans, stage):
+        """Отрезок этапа stage, учитываемый в spans."""
+        self.spans = spans
+        self.stage = stage
+
+    def __enter__(self):
+        """Засекает начало отрезка."""
+        self.started = self.spans.clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Учитывает длительность отрезка в spans."""
+        self.spans.add(self.stage, self.spans.clock() - self.started)
+
+
+class Spans:
+    """Время этапов опроса: число, сумма и максимум по каждому этапу.
+    Отрезки этапов, измеренные внутри цикла cycle, в том числе в пуле
+    потоков, запоминаются и для цикла. Цикл дольше slow секунд передаётся
+    в dump(имя, длительность, отрезки), по умолчанию — в журнал
+    предупреждением. Выключенные отрезки и циклы ничего
+    не измеряют.
+    """
+
+    def __init__(self, enabled=False, slow=0, dump=None,
+                 clock=time.perf_counter):
+        """Статистика этапов пока пуста."""
+        self.enabled = enabled
+        self.slow = slow
+        self.dump = dump or log_slow_cycle
+        self.clock = clock
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def span(self, stage):
+        """Возвращает отрезок этапа stage для блока with."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, stage)
+
+    def add(self, stage, duration):
+        """Учитывает отрезок этапа stage длительностью duration секунд."""
+        with self._lock:
+            count, total, longest = self._stages.get(stage, (0, 0, 0))
+            self._stages[stage] = (
+                count + 1, total + duration, max(longest, duration)
+            )
+        trace = CYCLE.get()
+        if trace is not None:
+            trace.append((stage, duration))
+
+    def cycle(self, name):
+        """Измеряет цикл name, например опрос подписчика, с его отрезками."""
+        if not self.enabled:
+            return NULL_SPAN
+        return self._cycle(name)
+
+    @contextmanager
+    def _cycle(self, name):
+        trace = []
+        token = CYCLE.set(trace)
+        started = self.clock()
+        try:
+            yield
+        finally:
+            CYCLE.reset(token)
+            elapsed = self.clock() - started
+            if self.slow and elapsed >= self.slow:
+                self.dump(name, elapsed, trace)
+
+    def stats(self):
+        """Возвращает словарь этап -> (число, сумма, максимум)."""
+        with self._lock:
+            return dict(self._stages)
+
+    def summary(self):
+        """Таблица этапов в порядке убывания суммарного времени."""
+        rows = sorted(
+            self.stats().items(), key=lambda item: item[1][1], reverse=True
+        )
+        return '\n'.join([STAGE_HEADER, *(
+            STAGE_ROW.format(stage, *values) for stage, values in rows
+        )])
+
+
+class SignalProfiler:
+    """Снимает профиль работающего процесса по сигналу.
+    Первый сигнал включает профилирование, второй выключает его и передаёт
+    текст отчёта в report(профиль, текст). Профиль cpu — cProfile потока
+    цикла событий, memory — снимок выделений памяти tracemalloc.
+    """
+
+    def __init__(self, report, limit=25):
+        """Профили снимаются только по сигналу или вызову toggle."""
+        self.report = report
+        self.limit = limit
+        self._active = {}
+
+    def toggle(self, mode):
+        """Включает профиль mode или выключает его и сдаёт отчёт."""
+        if mode not in PROFILES:
+            raise ValueError(UNKNOWN_PROFILE.format(mode, ', '.join(PROFILES)))
+        if mode not in self._active:
+            self._active[mode] = self._start(mode)
+            return
+        profiler = self._active.pop(mode)
+        if mode == 'cpu':
+            profiler.disable()
+            self.report(mode, cpu_report(profiler, self.limit))
+            return
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        self.report(mode, memory_report(snapshot, self.limit))
+
+    def _start(self, mode):
+        if mode == 'memory':
+            tracemalloc.start()
+            return None
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def install(self, signals=PROFILE_SIGNALS):
+        """Назначает обработчики сигналов профилей.
+        signals — словарь профиль -> имя сигнала. Сигналы, которых нет на
+        платформе, например в Windows, пропускаются. Возвращает имена
+        назначенных сигналов.
+        """
+        installed = []
+        for mode, name in signals.items():
+            signum = getattr(signal, name, None)
+            if signum is None:
+                continue
+            signal.signal(signum, lambda *args, mode=mode: self.toggle(mode))
+            installed.append(name)
+        return installed
@@ -0,0 +1,79 @@
+import asyncio
+import multiprocessing
+import time
+
+ROUNDING_ERROR = 1e-9
+
+
+class TokenBucket:
+    """Ограничивает частоту событий алгоритмом «ведро с токенами».
+    Ведро пополняется со скоростью rate токенов в секунду и вмещает не более
+    burst токенов, каждое событие забирает один токен.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        """Ведро создаётся полным."""
+        self.rate = rate
+        self.burst = burst or max(rate, 1)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(
+            self.burst,
+            self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def try_acquire(self):
+        """Забирает токен и возвращает 0 либо возвращает время ожидания."""
+        self._refill()
+        if self._tokens >= 1 - ROUNDING_ERROR:
+            self._tokens = max(self._tokens - 1, 0)
+            return 0
+        return (1 - self._tokens) / self.rate
+
+    async def acquire(self):
+        """Ждёт появления токена и забирает его."""
+        while True:
+            delay = self.try_acquire()
+            if not delay:
+                return
+            await asyncio.sleep(delay)
+
+
+class SharedTokenBucket(TokenBucket):
+    """Ведро с токенами, общее для нескольких процессов.
+    Число токенов и время пополнения хранятся в разделяемой памяти
+    multiprocessing и меняются под её блокировкой, поэтому процессы,
+    получившие ведро при запуске, делят между собой одну частоту rate.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic,
+                 context=multiprocessing):
+        """Полное ведро в разделяемой памяти контекста context."""
+        self._shared = context.Array('d', 2)
+        super().__init__(rate, burst, clock)
+
+    @property
+    def _tokens(self):
+        return self._shared[0]
+
+    @_tokens.setter
+    def _tokens(self, value):
+        self._shared[0] = value
+
+    @property
+    def _updated(self):
+        return self._shared[1]
+
+    @_updated.setter
+    def _updated(self, value):
+        self._shared[1] = value
+
+    def try_acquire(self):
+        """Забирает токен под межпроцессной блокировкой."""
+        with self._shared.get_lock():
+            return super().try_acquire()
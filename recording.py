@@ -0,0 +1,120 @@
+import hashlib
+import json
+import re
+import threading
+import time
+
+import requests
+
+SECRET_HEADERS = ('authorization', 'proxy-authorization', 'cookie')
+SECRET_TOKEN = re.compile(r'(OAuth )([^\s\'",}]+)')
+SEPARATORS = (',', ':')
+
+
+def fingerprint(secret):
+    """Отпечаток секрета, по которому нельзя восстановить сам секрет.
+    По отпечаткам токенов различаются подписчики записи.
+    """
+    return 'sha256:' + hashlib.sha256(secret.encode()).hexdigest()[:16]
+
+
+def sanitize_headers(headers):
+    """Заменяет значения секретных заголовков их отпечатками."""
+    return {
+        name: fingerprint(value) if name.lower() in SECRET_HEADERS else value
+        for name, value in headers.items()
+    }
+
+
+def sanitize_text(text):
+    """Заменяет токены OAuth в тексте их отпечатками.
+    Токен попадает в текст, например, в сообщениях об ошибках запроса.
+    """
+    return SECRET_TOKEN.sub(
+        lambda match: match[1] + fingerprint(match[2]), text
+    )
+
+
+class Recorder:
+    """Дописывает обмен бота с API Практикума и Telegram в файл path.
+    Каждая запись — строка компактного JSON с видом kind и моментом at по
+    часам clock. Токены в заголовках и сообщениях заменяются отпечатками.
+    Файл только дописывается, поэтому записи нескольких запусков идут в нём
+    подряд. Писать можно из любого потока.
+    """
+
+    def __init__(self, path, clock=time.time):
+        """Открывает файл path для дозаписи."""
+        self.path = path
+        self.clock = clock
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, kind, **fields):
+        """Дописывает запись вида kind."""
+        line = json.dumps(
+            {'kind': kind, 'at': self.clock(), **fields},
+            ensure_ascii=False, separators=SEPARATORS
+        )
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def record_response(self, response, *args, **kwargs):
+        """Хук ответа сессии requests: записывает запрос и ответ API.
+        Тело читается целиком, в том числе у потокового ответа: дальше оно
+        разбирается из памяти.
+        """
+        self.write(
+            'api',
+            url=response.url,
+            headers=sanitize_headers(response.request.headers),
+            status=response.status_code,
+            elapsed=response.elapsed.total_seconds(),
+            body=response.text
+        )
+        return response
+
+    def record_sends(self, send):
+        """Оборачивает send(chat_id, сообщение), записывая каждую отправку."""
+        def recorded(chat_id, message):
+            started = time.perf_counter()
+            sent = send(chat_id, message)
+            self.write(
+                'send',
+                chat_id=chat_id,
+                message=sanitize_text(message),
+                sent=sent,
+                elapsed=time.perf_counter() - started
+            )
+            return sent
+        return recorded
+
+    def close(self):
+        """Закрывает файл записи."""
+        self._file.close()
+
+
+def read_records(path, kind=None):
+    """Читает записи из файла path, только вида kind, если он передан.
+    Оборванная при остановке процесса последняя строка пропускается.
+    """
+    with open(path, encoding='utf-8') as records:
+        for line in records:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if kind is None or record['kind'] == kind:
+                yield record
+
+
+def recorded_response(record):
+    """Собирает из записи вида api ответ requests с записанным телом."""
+    response = requests.Response()
+    response.status_code = record['status']
+    response.url = record['url']
+    response.encoding = 'utf-8'
+    response._content = record['body'].encode('utf-8')
+    response._content_consumed = True
+    return response
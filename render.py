@@ -0,0 +1,71 @@
+from functools import lru_cache
+import json
+
+PLACEHOLDER = '\0'
+INVALID_LOCALE = 'Язык "{}" файла шаблонов "{}" должен быть словарём'
+
+
+def compile_template(template, verdict):
+    """Подставляет вердикт в шаблон и делит его по месту имени работы.
+    Имя работы — первое поле шаблона, вердикт — второе.
+    """
+    return tuple(template.format(PLACEHOLDER, verdict).split(PLACEHOLDER))
+
+
+class VerdictRenderer:
+    """Собирает уведомления о смене статуса работы.
+    Вердикты verdicts подставляются в шаблон template заранее, поэтому
+    сообщение склеивается из готовых частей и имени работы без разбора
+    шаблона. Готовые сообщения для пар (работа, статус) кешируются,
+    не более maxsize, давно не использованные вытесняются. Для неизвестного
+    статуса выбрасывается ValueError с сообщением по шаблону unknown_status.
+    """
+
+    def __init__(self, verdicts, template, unknown_status, maxsize=4096):
+        """Заранее собирает части шаблона для каждого статуса."""
+        self.verdicts = dict(verdicts)
+        self.template = template
+        self.unknown_status = unknown_status
+        self._parts = {
+            status: compile_template(template, verdict)
+            for status, verdict in self.verdicts.items()
+        }
+        self.render = lru_cache(maxsize)(self._render)
+
+    def _render(self, name, status):
+        try:
+            parts = self._parts[status]
+        except KeyError:
+            raise ValueError(self.unknown_status.format(status))
+        return str(name).join(parts)
+
+    def __call__(self, homework):
+        """Возвращает уведомление о статусе работы homework."""
+        return self.render(homework['homework_name'], homework['status'])
+
+    def derive(self, verdicts=None, template=None, maxsize=4096):
+        """Создаёт отрисовщик с заменёнными вердиктами и шаблоном."""
+        return VerdictRenderer(
+            {**self.verdicts, **(verdicts or {})},
+            template or self.template,
+            self.unknown_status,
+            maxsize
+        )
+
+
+def load_renderers(path, default, maxsize=4096):
+    """Загружает из JSON-файла path шаблоны уведомлений по языкам.
+    Файл — словарь язык -> {"template": шаблон, "verdicts": вердикты}, оба
+    ключа необязательны и дополняют отрисовщик default. Возвращает словарь
+    язык -> отрисовщик.
+    """
+    with open(path, encoding='utf-8') as file:
+        locales = json.load(file)
+    renderers = {}
+    for locale, overrides in locales.items():
+        if not isinstance(overrides, dict):
+            raise ValueError(INVALID_LOCALE.format(locale, path))
+        renderers[locale] = default.derive(
+            overrides.get('verdicts'), overrides.get('template'), maxsize
+        )
+    return renderers
@@ -0,0 +1,100 @@
+import hashlib
+import re
+
+CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*(\d+)')
+
+
+class CachedResponse:
+    """Последний ответ API подписчику и его валидаторы."""
+
+    __slots__ = (
+        'etag', 'last_modified', 'digest', 'response', 'homeworks'
+    )
+
+    def __init__(self, etag, last_modified, digest, response):
+        """Разобранный список работ появляется после первой проверки."""
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.response = response
+        self.homeworks = None
+
+    def validators(self):
+        """Заголовки условного запроса, поддерживаемые сервером."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+def digest(body):
+    """Хеш тела ответа без поля current_date и значение этого поля.
+    current_date меняется в каждом ответе, поэтому в хеш не входит.
+    """
+    match = CURRENT_DATE.match(body, max(body.rfind(b'"current_date"'), 0))
+    if match is None:
+        return hashlib.blake2b(body, digest_size=16).digest(), None
+    view = memoryview(body)
+    body_hash = hashlib.blake2b(view[:match.start()], digest_size=16)
+    body_hash.update(view[match.end():])
+    return body_hash.digest(), int(match[1])
+
+
+class ResponseCache:
+    """Кеш последних ответов API по подписчикам.
+    Хранит по одному ответу на заголовок авторизации. Если тело ответа,
+    кроме current_date, совпадает с прошлым, даже при другом курсоре
+    from_date, JSON не декодируется: возвращается разобранный ранее
+    словарь, а список работ, уже проверенный check_response, не
+    проверяется повторно.
+    """
+
+    def __init__(self):
+        """Создаёт пустой кеш ответов."""
+        self._entries = {}
+
+    def __len__(self):
+        """Число подписчиков, ответы которых в кеше."""
+        return len(self._entries)
+
+    @staticmethod
+    def key(headers):
+        """Ключ кеша для заголовков запроса подписчика."""
+        return headers.get('Authorization')
+
+    def get(self, headers):
+        """Возвращает последний ответ подписчику или None."""
+        return self._entries.get(self.key(headers))
+
+    def load(self, headers, response):
+        """Возвращает разобранный ответ requests и признак попадания в кеш.
+        Если тело ответа совпадает с сохранённым, JSON не декодируется.
+        """
+        body_digest, current_date = digest(response.content)
+        entry = self.get(headers)
+        if entry is not None and entry.digest == body_digest:
+            if current_date is not None:
+                entry.response['current_date'] = current_date
+            return entry.response, True
+        statuses = response.json()
+        self._entries[self.key(headers)] = CachedResponse(
+            response.headers.get('ETag'),
+            response.headers.get('Last-Modified'),
+            body_digest,
+            statuses
+        )
+        return statuses, False
+
+    def check(self, headers, response, check):
+        """Проверяет ответ функцией check и возвращает её результат.
+        Для ответа из кеша результат проверки запоминается и повторно
+        check не вызывается.
+        """
+        entry = self.get(headers)
+        if entry is None or entry.response is not response:
+            return check(response)
+        if entry.homeworks is None:
+            entry.homeworks = check(response)
+        return entry.homeworks
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import random
+import time
+
+from exception import CircuitOpenException, RETRYABLE_EXCEPTIONS
+
+RETRY_ATTEMPT = (
+    'Попытка %s из %s запроса к API не удалась: %s. Повтор через %.1f с'
+)
+CIRCUIT_OPENED = (
+    'Запросы к API приостановлены на %s с после %s сбоев подряд'
+)
+CIRCUIT_CLOSED = 'Запросы к API возобновлены: пробный запрос прошёл успешно'
+CIRCUIT_OPEN = 'Запросы к API приостановлены ещё на {:.0f} с'
+CIRCUIT_PROBING = (
+    'Запросы к API приостановлены до ответа на пробный запрос'
+)
+
+
+class RetryPolicy:
+    """Повторяет вызов при временных сбоях с экспоненциальной задержкой.
+    Задержка перед попыткой n выбирается случайно от 0 до
+    min(max_delay, base_delay * 2 ** n), чтобы подписчики не повторяли
+    запросы одновременно. Вызов выполняется хотя бы один раз: attempts
+    меньше единицы означает вызов без повторов.
+    """
+
+    def __init__(self, attempts=3, base_delay=1, max_delay=30,
+                 retryable=RETRYABLE_EXCEPTIONS, random=random.random):
+        """Запоминает число попыток и границы задержек."""
+        self.attempts = max(attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable = retryable
+        self._random = random
+
+    def delay(self, attempt):
+        """Возвращает задержку перед повтором после попытки attempt."""
+        return self._random() * min(
+            self.max_delay,
+            self.base_delay * 2 ** attempt
+        )
+
+    async def call(self, func, *args):
+        """Ожидает func(*args), повторяя вызов при временных сбоях."""
+        for attempt in range(1, self.attempts + 1):
+            try:
+                return await func(*args)
+            except self.retryable as error:
+                if attempt == self.attempts:
+                    raise
+                delay = self.delay(attempt)
+                logging.warning(
+                    RETRY_ATTEMPT, attempt, self.attempts, error, delay
+                )
+                await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """Размыкает цепь после серии временных сбоев эндпоинта.
+    После failure_threshold сбоев подряд вызовы сразу завершаются
+    CircuitOpenException. Через recovery_time секунд пропускается один
+    пробный вызов: при успехе цепь замыкается, при сбое — снова размыкается.
+    Прочие исключения означают, что эндпоинт отвечает, и сбоем не считаются.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, recovery_time=30,
+                 failures=RETRYABLE_EXCEPTIONS, clock=time.monotonic):
+        """Выключатель создаётся замкнутым и без сбоев."""
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.failures = failures
+        self._clock = clock
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened = 0
+
+    def _allow(self):
+        if self.state == self.CLOSED:
+            return True
+        if (
+                self.state == self.OPEN
+                and self._clock() - self._opened >= self.recovery_time
+        ):
+            self.state = self.HALF_OPEN
+            return True
+        return False
+
+    def _record_success(self):
+        if self.state == self.HALF_OPEN:
+            logging.info(CIRCUIT_CLOSED)
+        self.state = self.CLOSED
+        self._failures = 0
+
+    def _record_failure(self):
+        self._failures += 1
+        if (
+                self.state == self.HALF_OPEN
+                or self._failures >= self.failure_threshold
+        ):
+            if self.state != self.OPEN:
+                logging.error(
+                    CIRCUIT_OPENED, self.recovery_time, self._failures
+                )
+            self.state = self.OPEN
+            self._opened = self._clock()
+
+    async def call(self, func, *args):
+        """Ожидает func(*args), если цепь не разомкнута."""
+        if not self._allow():
+            if self.state == self.HALF_OPEN:
+                raise CircuitOpenException(CIRCUIT_PROBING)
+            raise CircuitOpenException(CIRCUIT_OPEN.format(
+                self._opened + self.recovery_time - self._clock()
+            ))
+        try:
+            result = await func(*args)
+        except asyncio.CancelledError:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self._opened = self._clock()
+            raise
+        except self.failures:
+            self._record_failure()
+            raise
+        except Exception:
+            self._record_success()
+            raise
+        self._record_success()
+        return result
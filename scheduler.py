@@ -0,0 +1,87 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+
+def wake(waiter):
+    """Будит ожидающего, если он ещё ждёт."""
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AdaptiveScheduler:
+    """Планирует опрос подписчиков с индивидуальными интервалами.
+    Пока работа на проверке (статус reviewing), подписчик опрашивается раз в
+    reviewing_interval секунд. Каждый пустой ответ API подряд увеличивает
+    интервал в backoff раз, но не больше max_interval. Общая частота
+    запросов к API ограничивается ведром токенов budget.
+    """
+
+    def __init__(self, base_interval=600, reviewing_interval=60,
+                 max_interval=3600, backoff=2, budget=None,
+                 clock=time.monotonic):
+        """Создаёт планировщик без запланированных опросов."""
+        self.base_interval = base_interval
+        self.reviewing_interval = reviewing_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.budget = budget
+        self._clock = clock
+        self._heap = []
+        self._counter = itertools.count()
+        self._waiter = None
+
+    def __len__(self):
+        """Число запланированных опросов."""
+        return len(self._heap)
+
+    def interval(self, tenant):
+        """Возвращает интервал до следующего опроса подписчика."""
+        if tenant.last_status == 'reviewing':
+            return self.reviewing_interval
+        return min(
+            self.base_interval * self.backoff ** tenant.idle_polls,
+            self.max_interval
+        )
+
+    def schedule(self, tenant, delay=0):
+        """Ставит опрос подписчика через delay секунд.
+        Ожидающий next() будится, только если этот опрос стал ближайшим.
+        """
+        entry = (self._clock() + delay, next(self._counter), tenant)
+        heapq.heappush(self._heap, entry)
+        waiter = self._waiter
+        if self._heap[0] is entry and waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def reschedule(self, tenant):
+        """Ставит следующий опрос подписчика по его текущему интервалу."""
+        self.schedule(tenant, self.interval(tenant))
+
+    async def _wait(self, timeout):
+        loop = asyncio.get_running_loop()
+        self._waiter = waiter = loop.create_future()
+        timer = None
+        if timeout is not None:
+            timer = loop.call_later(timeout, wake, waiter)
+        try:
+            await waiter
+        finally:
+            self._waiter = None
+            if timer is not None:
+                timer.cancel()
+
+    async def next(self):
+        """Дожидается подписчика, которого пора опросить, и возвращает его."""
+        while True:
+            if not self._heap:
+                await self._wait(None)
+                continue
+            delay = self._heap[0][0] - self._clock()
+            if delay > 0:
+                await self._wait(delay)
+                continue
+            if self.budget is not None:
+                await self.budget.acquire()
+            return heapq.heappop(self._heap)[2]
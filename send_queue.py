@@ -0,0 +1,141 @@
+import asyncio
+from collections import deque
+import time
+
+from concurrency import Limiter
+from ratelimit import TokenBucket
+
+
+class SendQueue:
+    """Очередь исходящих сообщений Telegram.
+    Сообщения отправляются пулом из workers обработчиков вызовом
+    send(chat_id, message) в отдельных потоках. Общая частота отправки
+    ограничена rate сообщениями в секунду, частота отправки в один чат —
+    chat_rate. Сообщения в один чат уходят в порядке постановки в очередь.
+    У каждого чата своя очередь ожидающих сообщений, а обработчики берут
+    чаты из очереди готовых, то есть получивших токен своего ведра, поэтому
+    пачка сообщений в один чат не задерживает остальные чаты.
+    Когда в очереди maxsize сообщений, постановка ждёт освобождения места.
+    Вместо общего ограничения rate можно передать готовое ведро bucket,
+    например общее для нескольких процессов.
+    """
+
+    def __init__(self, send, workers=8, maxsize=1000, rate=30, chat_rate=1,
+                 chat_burst=3, clock=time.monotonic, bucket=None):
+        """Обработчики запускаются при первой постановке сообщения."""
+        self._send = send
+        self.workers = workers
+        self.maxsize = maxsize
+        if bucket is None:
+            bucket = TokenBucket(rate, clock=clock)
+        self.bucket = bucket
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self._clock = clock
+        self._chats = {}
+        self._pending = {}
+        self._timers = {}
+        self._size = 0
+        self._unfinished = 0
+        self._limiter = Limiter(workers, name='telegram')
+        self._ready = None
+        self._slots = None
+        self._finished = None
+        self._tasks = []
+
+    def __len__(self):
+        """Число сообщений, ещё не взятых обработчиками."""
+        return self._size
+
+    def _start(self):
+        self._ready = asyncio.Queue()
+        if self.maxsize > 0:
+            self._slots = asyncio.Semaphore(self.maxsize)
+        self._finished = asyncio.Event()
+        self._finished.set()
+        self._tasks = [
+            asyncio.create_task(self._work()) for _ in range(self.workers)
+        ]
+
+    def _chat(self, chat_id):
+        if chat_id not in self._chats:
+            self._chats[chat_id] = TokenBucket(
+                self.chat_rate, self.chat_burst, self._clock
+            )
+        return self._chats[chat_id]
+
+    def _schedule(self, chat_id):
+        delay = self._chat(chat_id).try_acquire()
+        if delay:
+            self._timers[chat_id] = asyncio.get_running_loop().call_later(
+                delay, self._schedule, chat_id
+            )
+            return
+        self._timers.pop(chat_id, None)
+        self._ready.put_nowait(chat_id)
+
+    async def put(self, chat_id, message):
+        """Ставит сообщение в очередь и возвращает future с результатом."""
+        if self._ready is None:
+            self._start()
+        if self._slots is not None:
+            await self._slots.acquire()
+        future = asyncio.get_running_loop().create_future()
+        self._size += 1
+        self._unfinished += 1
+        self._finished.clear()
+        if chat_id in self._pending:
+            self._pending[chat_id].append((message, future))
+        else:
+            self._pending[chat_id] = deque([(message, future)])
+            self._schedule(chat_id)
+        return future
+
+    async def send(self, chat_id, message):
+        """Ставит сообщение в очередь и ждёт результата отправки."""
+        return await (await self.put(chat_id, message))
+
+    def _take(self, chat_id):
+        message, future = self._pending[chat_id].popleft()
+        self._size -= 1
+        if self._slots is not None:
+            self._slots.release()
+        return message, future
+
+    def _done(self, chat_id):
+        if self._pending[chat_id]:
+            self._schedule(chat_id)
+        else:
+            del self._pending[chat_id]
+        self._unfinished -= 1
+        if not self._unfinished:
+            self._finished.set()
+
+    async def _work(self):
+        while True:
+            chat_id = await self._ready.get()
+            message, future = self._take(chat_id)
+            try:
+                await self.bucket.acquire()
+                result = await self._limiter.run(self._send, chat_id, message)
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._done(chat_id)
+
+    async def join(self):
+        """Ждёт отправки всех сообщений из очереди."""
+        if self._finished is not None:
+            await self._finished.wait()
+
+    def close(self):
+        """Останавливает обработчики очереди и пул потоков отправки."""
+        for timer in self._timers.values():
+            timer.cancel()
+        for task in self._tasks:
+            task.cancel()
+        self._limiter.shutdown()
@@ -0,0 +1,22 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def create_session(pool_connections=10, pool_maxsize=32, keep_alive=True):
+    """Создаёт сессию requests с пулом постоянных соединений.
+    pool_connections — число хостов, для которых хранятся пулы соединений,
+    pool_maxsize — предельное число соединений с одним хостом: при его
+    достижении запросы ждут освобождения соединения, а не открывают новое.
+    Без keep_alive сервер закрывает соединение после каждого ответа.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=True
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
@@ -0,0 +1,261 @@
+import asyncio
+from bisect import bisect, insort
+from functools import partial
+import hashlib
+import logging
+import multiprocessing
+from multiprocessing.connection import wait
+import queue
+import threading
+import time
+
+ADD = 'add'
+REMOVE = 'remove'
+SHARD_STARTED = 'Запущен шард %s (pid %s)'
+SHARD_DIED = 'Шард %s завершился с кодом %s, подписчики перераспределены'
+SHARDS_REBALANCED = 'Распределение подписчиков по шардам: %s'
+COMMAND_FAILED = 'Сбой команды %s супервизора для %s подписчиков: %s'
+REMOVAL_TIMEOUT = (
+    'Шарды %s не подтвердили снятие подписчиков за %s с, подписчики '
+    'выданы новым шардам без сохранённого состояния'
+)
+
+
+def stable_hash(key):
+    """Хеш строки, одинаковый во всех процессах и запусках."""
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Кольцо согласованного хеширования.
+    Каждый узел занимает replicas точек кольца, ключ принадлежит узлу
+    ближайшей следующей точки. При добавлении или удалении узла переезжают
+    только ключи, попавшие на его точки.
+    """
+
+    def __init__(self, nodes=(), replicas=64):
+        """Кольцо с узлами nodes, у каждого replicas точек."""
+        self.replicas = replicas
+        self._points = []
+        self._nodes = {}
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self):
+        """Число узлов на кольце."""
+        return len(set(self._nodes.values()))
+
+    def add(self, node):
+        """Добавляет узел на кольцо."""
+        for replica in range(self.replicas):
+            point = stable_hash(f'{node}#{replica}')
+            if point not in self._nodes:
+                insort(self._points, point)
+            self._nodes[point] = node
+
+    def remove(self, node):
+        """Убирает узел с кольца."""
+        for replica in range(self.replicas):
+            point = stable_hash(f'{node}#{replica}')
+            if self._nodes.get(point) == node:
+                del self._nodes[point]
+                self._points.remove(point)
+
+    def node(self, key):
+        """Возвращает узел, которому принадлежит ключ key."""
+        if not self._points:
+            raise LookupError(key)
+        index = bisect(self._points, stable_hash(key)) % len(self._points)
+        return self._nodes[self._points[index]]
+
+
+def follow_assignments(inbox, engine, name=None, done=None):
+    """Применяет к движку engine команды супервизора из очереди inbox.
+    Очередь читается в фоновом потоке, команды выполняются в цикле
+    событий, из которого вызвана функция. Сохранив состояние снятых
+    подписчиков, шард name подтверждает снятие в очередь done записью
+    (имя, токены). Сбой команды пишется в журнал, а снятие при этом не
+    подтверждается.
+    """
+    loop = asyncio.get_running_loop()
+
+    async def apply(command, payload):
+        if command == ADD:
+            engine.add_tenants(payload)
+            return
+        await engine.release_tenants(payload)
+        if done is not None:
+            done.put((name, payload))
+
+    def report(command, payload, future):
+        if not future.cancelled() and future.exception() is not None:
+            error = future.exception()
+            logging.error(
+                COMMAND_FAILED, command, len(payload), error, exc_info=error
+            )
+
+    def listen():
+        while True:
+            command, payload = inbox.get()
+            asyncio.run_coroutine_threadsafe(
+                apply(command, payload), loop
+            ).add_done_callback(partial(report, command, payload))
+
+    thread = threading.Thread(target=listen, name='shard-inbox', daemon=True)
+    thread.start()
+    return thread
+
+
+class Supervisor:
+    """Распределяет подписчиков по workers процессам-шардам.
+    Подписчик закрепляется за шардом согласованным хешированием токена.
+    Каждый шард запускается вызовом target(имя, очередь, done, *args) в
+    отдельном процессе и получает через очередь команды (ADD, записи
+    подписчиков) и (REMOVE, токены). Снятие подписчиков шард подтверждает
+    в общую очередь done, сохранив их состояние, и только после этого, но
+    не дольше removal_timeout секунд, подписчики выдаются новым шардам.
+    Когда шард завершается, его подписчики сразу переходят к остальным
+    шардам, а через restart_delay секунд шард запускается заново и
+    забирает своих подписчиков обратно.
+    """
+
+    def __init__(self, target, tenants, workers=2, args=(),
+                 restart_delay=1, replicas=64, context=multiprocessing,
+                 removal_timeout=10):
+        """Запоминает подписчиков, шарды запускает метод start."""
+        self.target = target
+        self.tenants = {entry[0]: tuple(entry) for entry in tenants}
+        self.names = [f'shard-{number}' for number in range(workers)]
+        self.args = args
+        self.restart_delay = restart_delay
+        self.ring = HashRing(replicas=replicas)
+        self._context = context
+        self.removal_timeout = removal_timeout
+        self._done = context.Queue()
+        self._processes = {}
+        self._inboxes = {}
+        self._assigned = {}
+        self._restarts = {}
+
+    def assignment(self):
+        """Возвращает словарь шард -> множество токенов его подписчиков."""
+        desired = {name: set() for name in self._processes}
+        for token in self.tenants:
+            desired[self.ring.node(token)].add(token)
+        return desired
+
+    def _await_removals(self, removals):
+        deadline = time.monotonic() + self.removal_timeout
+        while removals:
+            try:
+                name, tokens = self._done.get(
+                    timeout=max(deadline - time.monotonic(), 0)
+                )
+            except queue.Empty:
+                logging.warning(
+                    REMOVAL_TIMEOUT, sorted(removals), self.removal_timeout
+                )
+                return
+            if removals.get(name) == tokens:
+                del removals[name]
+
+    def rebalance(self):
+        """Рассылает шардам изменения их наборов подписчиков.
+        Сначала подписчики снимаются со старых шардов, и только когда те
+        сохранят их состояние, выдаются новым: один подписчик не
+        опрашивается дважды, а новый владелец продолжает с его курсора.
+        """
+        desired = self.assignment()
+        removals = {}
+        for name, tokens in desired.items():
+            removed = self._assigned.get(name, set()) - tokens
+            if removed:
+                removals[name] = sorted(removed)
+                self._inboxes[name].put((REMOVE, removals[name]))
+        self._await_removals(removals)
+        for name, tokens in desired.items():
+            added = tokens - self._assigned.get(name, set())
+            if added:
+                self._inboxes[name].put(
+                    (ADD, [self.tenants[token] for token in sorted(added)])
+                )
+        self._assigned = desired
+        logging.info(SHARDS_REBALANCED, {
+            name: len(tokens) for name, tokens in sorted(desired.items())
+        })
+
+    def _spawn(self, name):
+        inbox = self._context.Queue()
+        process = self._context.Process(
+            target=self.target,
+            args=(name, inbox, self._done, *self.args),
+            name=name,
+            daemon=True
+        )
+        process.start()
+        logging.info(SHARD_STARTED, name, process.pid)
+        self._processes[name] = process
+        self._inboxes[name] = inbox
+        self._assigned[name] = set()
+        self.ring.add(name)
+
+    def start(self):
+        """Запускает все шарды и раздаёт им подписчиков."""
+        for name in self.names:
+            self._spawn(name)
+        self.rebalance()
+
+    def _bury(self, name):
+        process = self._processes.pop(name)
+        self._inboxes.pop(name).close()
+        self._assigned.pop(name)
+        self.ring.remove(name)
+        self._restarts[name] = time.monotonic() + self.restart_delay
+        logging.warning(SHARD_DIED, name, process.exitcode)
+
+    def _restart_due(self):
+        now = time.monotonic()
+        due = [name for name, at in self._restarts.items() if at <= now]
+        for name in due:
+            del self._restarts[name]
+            self._spawn(name)
+        return due
+
+    def _timeout(self, deadline):
+        moments = list(self._restarts.values())
+        if deadline is not None:
+            moments.append(deadline)
+        if not moments:
+            return None
+        return max(min(moments) - time.monotonic(), 0)
+
+    def watch(self, duration=None):
+        """Следит за шардами duration секунд или бесконечно."""
+        deadline = None if duration is None else time.monotonic() + duration
+        while deadline is None or time.monotonic() < deadline:
+            sentinels = {
+                process.sentinel: name
+                for name, process in self._processes.items()
+            }
+            ready = wait(list(sentinels), self._timeout(deadline))
+            for sentinel in ready:
+                self._bury(sentinels[sentinel])
+            if ready or self._restart_due():
+                if self._processes:
+                    self.rebalance()
+
+    def stop(self):
+        """Останавливает все шарды."""
+        for process in self._processes.values():
+            process.terminate()
+        for process in self._processes.values():
+            process.join()
+        self._processes.clear()
+
+    def run(self, duration=None):
+        """Запускает шарды и следит за ними до остановки."""
+        self.start()
+        try:
+            self.watch(duration)
+        finally:
+            self.stop()
@@ -0,0 +1,158 @@
+import json
+import os
+import sqlite3
+
+UNKNOWN_STATE_BACKEND = (
+    'Неизвестное хранилище состояния "{}", доступные хранилища: {}'
+)
+
+
+class StateBackend:
+    """Хранилище курсоров from_date и последних отправленных сообщений."""
+
+    def load_all(self):
+        """Возвращает словарь токен -> (from_date, last_report)."""
+        raise NotImplementedError
+
+    def save_many(self, records):
+        """Сохраняет записи (токен, from_date, last_report) одним пакетом."""
+        raise NotImplementedError
+
+    def close(self):
+        """Освобождает ресурсы хранилища."""
+
+
+class SQLiteStateBackend(StateBackend):
+    """Хранит состояние подписчиков в SQLite в режиме журнала WAL."""
+
+    def __init__(self, path):
+        """Открывает базу path и создаёт таблицу состояния."""
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS tenant_state ('
+            'token TEXT PRIMARY KEY, from_date INTEGER, last_report TEXT)'
+        )
+        self._connection.commit()
+
+    def load_all(self):
+        """Читает состояние всех подписчиков одним запросом."""
+        rows = self._connection.execute(
+            'SELECT token, from_date, last_report FROM tenant_state'
+        )
+        return {
+            token: (from_date, last_report)
+            for token, from_date, last_report in rows
+        }
+
+    def save_many(self, records):
+        """Сохраняет записи в одной транзакции."""
+        with self._connection:
+            self._connection.executemany(
+                'INSERT INTO tenant_state (token, from_date, last_report) '
+                'VALUES (?, ?, ?) ON CONFLICT(token) DO UPDATE SET '
+                'from_date = excluded.from_date, '
+                'last_report = excluded.last_report',
+                records
+            )
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        self._connection.close()
+
+
+class FileStateBackend(StateBackend):
+    """Хранит состояние подписчиков в JSON-файле.
+    Файл перезаписывается атомарно: сначала пишется временный файл, затем
+    он заменяет основной.
+    """
+
+    def __init__(self, path):
+        """Читает файл состояния path, если он есть."""
+        self.path = path
+        self._state = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                self._state = json.load(file)
+
+    def load_all(self):
+        """Возвращает состояние, прочитанное из файла."""
+        return {
+            token: tuple(record) for token, record in self._state.items()
+        }
+
+    def save_many(self, records):
+        """Дополняет состояние записями и перезаписывает файл."""
+        for token, from_date, last_report in records:
+            self._state[token] = [from_date, last_report]
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(self._state, file, ensure_ascii=False)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+
+
+BACKENDS = {
+    'sqlite': SQLiteStateBackend,
+    'file': FileStateBackend,
+}
+
+
+def open_backend(kind, path):
+    """Открывает хранилище состояния вида kind по пути path."""
+    if kind not in BACKENDS:
+        raise ValueError(
+            UNKNOWN_STATE_BACKEND.format(kind, ', '.join(BACKENDS))
+        )
+    return BACKENDS[kind](path)
+
+
+class StateStore:
+    """Копит изменения состояния подписчиков и сохраняет их пакетом."""
+
+    def __init__(self, backend):
+        """Хранилище без изменений, ожидающих сохранения."""
+        self.backend = backend
+        self._dirty = {}
+
+    def __len__(self):
+        """Число подписчиков, ожидающих сохранения."""
+        return len(self._dirty)
+
+    def mark(self, tenant):
+        """Отмечает подписчика для сохранения при следующем сбросе."""
+        self._dirty[tenant.token] = tenant
+
+    def take(self, tenants=None):
+        """Забирает накопленные изменения в виде списка записей.
+        С tenants забираются записи только этих подписчиков, даже если
+        они не отмечены, остальные изменения ждут очередного сброса.
+        """
+        if tenants is None:
+            tenants, self._dirty = self._dirty.values(), {}
+        else:
+            for tenant in tenants:
+                self._dirty.pop(tenant.token, None)
+        return [
+            (tenant.token, tenant.from_date, tenant.last_report)
+            for tenant in tenants
+        ]
+
+    def flush(self):
+        """Сохраняет накопленные изменения одним пакетом."""
+        records = self.take()
+        if records:
+            self.backend.save_many(records)
+        return len(records)
+
+    def restore(self, registry):
+        """Восстанавливает курсоры всех подписчиков одним чтением."""
+        state = self.backend.load_all()
+        restored = 0
+        for tenant in registry:
+            if tenant.token in state:
+                tenant.from_date, tenant.last_report = state[tenant.token]
+                restored += 1
+        return restored
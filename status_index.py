@@ -0,0 +1,40 @@
+class StatusIndex:
+    """Последние известные статусы домашних работ подписчика.
+    Работы различаются по id, а при его отсутствии — по homework_name.
+    """
+
+    __slots__ = ('_statuses',)
+
+    def __init__(self):
+        """Создаёт пустой индекс."""
+        self._statuses = {}
+
+    def __len__(self):
+        """Число работ в индексе."""
+        return len(self._statuses)
+
+    def diff(self, homeworks):
+        """Возвращает работы, статус которых изменился.
+        API отдаёт работы от новых к старым, поэтому изменения возвращаются
+        в обратном порядке — от старых к новым. Индекс не меняется, пока
+        изменение не подтверждено вызовом apply.
+        """
+        statuses = self._statuses
+        return [
+            homework for homework in reversed(homeworks)
+            if statuses.get(
+                homework.get('id', homework.get('homework_name'))
+            ) != homework.get('status')
+        ]
+
+    def changed(self, homework):
+        """Проверяет, изменился ли статус работы."""
+        return self._statuses.get(
+            homework.get('id', homework.get('homework_name'))
+        ) != homework.get('status')
+
+    def apply(self, homework):
+        """Запоминает статус работы."""
+        self._statuses[
+            homework.get('id', homework.get('homework_name'))
+        ] = homework.get('status')
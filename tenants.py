@@ -0,0 +1,130 @@
+import asyncio
+
+from status_index import StatusIndex
+
+INVALID_TENANT_LINE = (
+    'Строка {} файла подписчиков "{}" должна содержать токен Практикума, '
+    'идентификаторы чатов Telegram через запятую и, при необходимости, язык '
+    'уведомлений, разделённые пробелом'
+)
+
+
+class Tenant:
+    """Подписчик бота: токен Практикума, чат Telegram и курсор опроса API.
+    locale — язык уведомлений подписчика, None — язык по умолчанию.
+    subscribers — дополнительные чаты, например наставников и групп, которые
+    получают уведомления о статусах работ вместе с основным чатом chat_id.
+    lock удерживается от сравнения статусов с индексом до их запоминания,
+    чтобы опрос, вебхук и догрузка не отправили одно изменение дважды.
+    """
+
+    __slots__ = (
+        'token', 'chat_id', 'from_date', 'last_report', 'last_status',
+        'idle_polls', 'statuses', 'locale', 'subscribers', 'lock'
+    )
+
+    def __init__(self, token, chat_id, from_date=0, last_report=None,
+                 locale=None, subscribers=()):
+        """Новый подписчик с пустым индексом статусов."""
+        self.token = token
+        self.chat_id = chat_id
+        self.from_date = from_date
+        self.locale = locale
+        self.subscribers = tuple(subscribers)
+        self.last_report = last_report
+        self.last_status = None
+        self.idle_polls = 0
+        self.statuses = StatusIndex()
+        self.lock = asyncio.Lock()
+
+    @property
+    def chats(self):
+        """Все чаты, получающие уведомления подписчика."""
+        return (self.chat_id, *self.subscribers)
+
+    def subscribe(self, chat_id):
+        """Добавляет чат в подписки, если он ещё не получает уведомления."""
+        if chat_id not in self.chats:
+            self.subscribers += (chat_id,)
+
+    @property
+    def headers(self):
+        """Заголовки запроса к API Практикума с токеном подписчика."""
+        return {'Authorization': f'OAuth {self.token}'}
+
+    def __repr__(self):
+        """Описание для журнала, без токена подписчика."""
+        return f'Tenant(chat_id={self.chat_id!r}, from_date={self.from_date})'
+
+
+class TenantRegistry:
+    """Реестр подписчиков, опрашиваемых одним процессом бота.
+    Подписчики различаются по токену Практикума, поэтому сколько бы чатов
+    ни следило за токеном, API опрашивается по нему один раз.
+    """
+
+    def __init__(self):
+        """Создаёт пустой реестр."""
+        self._tenants = {}
+
+    def add(self, token, chat_id, from_date=0, locale=None, subscribers=()):
+        """Регистрирует подписчика и возвращает его.
+        Если подписчик с токеном token уже есть, он не заменяется: чаты
+        chat_id и subscribers подписываются на его уведомления, а язык
+        locale задаётся, только если язык подписчика ещё не выбран. Курсор
+        и индекс статусов подписчика сохраняются.
+        """
+        tenant = self._tenants.get(token)
+        if tenant is None:
+            tenant = self._tenants[token] = Tenant(
+                token, chat_id, from_date,
+                locale=locale, subscribers=subscribers
+            )
+            return tenant
+        for chat in (chat_id, *subscribers):
+            tenant.subscribe(chat)
+        if tenant.locale is None:
+            tenant.locale = locale
+        return tenant
+
+    def remove(self, token):
+        """Удаляет подписчика по токену и возвращает его или None."""
+        return self._tenants.pop(token, None)
+
+    def get(self, token):
+        """Возвращает подписчика по токену Практикума или None."""
+        return self._tenants.get(token)
+
+    def __iter__(self):
+        """Обходит снимок реестра, его можно менять во время обхода."""
+        return iter(list(self._tenants.values()))
+
+    def __len__(self):
+        """Число подписчиков в реестре."""
+        return len(self._tenants)
+
+    @classmethod
+    def from_file(cls, path, from_date=0):
+        """Загружает подписчиков из файла.
+        Каждая непустая строка файла — токен Практикума, идентификаторы чатов
+        Telegram через запятую и необязательный язык уведомлений через
+        пробел, строки с символа # считаются комментариями. Первый чат токена
+        основной, остальные, в том числе из повторных строк того же токена,
+        подписываются на его уведомления.
+        """
+        registry = cls()
+        with open(path, encoding='utf-8') as file:
+            for number, line in enumerate(file, start=1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                fields = line.split()
+                if len(fields) not in (2, 3):
+                    raise ValueError(INVALID_TENANT_LINE.format(number, path))
+                token, chats, *locale = fields
+                chat_id, *subscribers = filter(None, chats.split(','))
+                registry.add(
+                    token, chat_id, from_date, *locale,
+                    subscribers=subscribers
+                )
+        return registry
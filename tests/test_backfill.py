@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime, timezone
+
+from backfill import Backfill
+from tenants import TenantRegistry
+
+DAY = 86400
+NOW = 10 * DAY
+
+
+def iso(moment):
+    return datetime.fromtimestamp(moment, timezone.utc).isoformat()
+
+
+HISTORY = [
+    {'id': 3, 'homework_name': 'c', 'status': 'approved',
+     'date_updated': iso(9 * DAY + 5)},
+    {'id': 2, 'homework_name': 'b', 'status': 'rejected',
+     'date_updated': iso(4 * DAY)},
+    {'id': 1, 'homework_name': 'a', 'status': 'reviewing',
+     'date_updated': iso(2 * DAY + 1)},
+]
+
+
+def test_backfill_emits_missed_changes_in_order():
+    registry = TenantRegistry()
+    behind = registry.add('behind', 1, from_date=DAY)
+    registry.add('fresh', 2, from_date=NOW - 10)
+    broken = registry.add('broken', 3, from_date=0)
+    requests = []
+
+    async def request(from_date, headers):
+        requests.append((headers['Authorization'], from_date))
+        if headers['Authorization'] == 'OAuth broken':
+            raise ConnectionError('сбой')
+        return {
+            'homeworks': [
+                homework for homework in HISTORY
+                if datetime.fromisoformat(
+                    homework['date_updated']
+                ).timestamp() >= from_date
+            ],
+            'current_date': NOW,
+        }
+
+    emitted = []
+
+    async def emit(tenant, changes, current_date):
+        emitted.append((tenant.token, changes, current_date))
+
+    backfill = Backfill(request, lag=DAY, concurrency=3, clock=lambda: NOW)
+    tenants = asyncio.run(backfill.run(registry, emit))
+
+    assert tenants == 2
+    assert sorted(requests) == [('OAuth behind', DAY), ('OAuth broken', 0)]
+    assert emitted == [('behind', HISTORY[::-1], NOW)]
+    assert behind.from_date == DAY and broken.from_date == 0
+
+
+def test_backfill_skips_known_statuses():
+    registry = TenantRegistry()
+    tenant = registry.add('token', 1, from_date=0)
+    tenant.statuses.apply(HISTORY[1])
+
+    async def request(from_date, headers):
+        return {'homeworks': HISTORY, 'current_date': NOW}
+
+    backfill = Backfill(request, lag=3 * DAY, clock=lambda: NOW)
+    changes, current_date = asyncio.run(backfill.collect(tenant))
+    assert changes == [HISTORY[2], HISTORY[0]]
+    assert current_date == NOW
+
+
+def test_backfill_streams_with_status_index():
+    registry = TenantRegistry()
+    tenant = registry.add('token', 1, from_date=0)
+    indexes = []
+
+    async def request(from_date, headers, index=None):
+        indexes.append(index)
+        return {'homeworks': HISTORY, 'current_date': NOW}
+
+    backfill = Backfill(request, stream=True, clock=lambda: NOW)
+    changes, _ = asyncio.run(backfill.collect(tenant))
+    assert indexes == [tenant.statuses]
+    assert changes == HISTORY[::-1]
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import pytest
+
+import homework
+from clock import VirtualClock
+from ratelimit import TokenBucket
+from scheduler import AdaptiveScheduler
+from tenants import Tenant, TenantRegistry
+
+
+class SilentApi:
+
+    cache = None
+
+    def __init__(self):
+        self.polls = {}
+
+    async def get(self, tenant):
+        self.polls[tenant.token] = self.polls.get(tenant.token, 0) + 1
+        await asyncio.sleep(0.2)
+        return {'homeworks': [], 'current_date': 0}
+
+
+class NullOutbox:
+
+    async def send(self, chat_id, message):
+        return True
+
+
+def test_virtual_clock_skips_idle_time():
+    clock = VirtualClock()
+
+    async def sleep_a_day():
+        await asyncio.sleep(86400)
+        return asyncio.get_running_loop().time()
+
+    started = time.perf_counter()
+    assert clock.run(sleep_a_day()) == pytest.approx(86400)
+    assert clock() == pytest.approx(86400)
+    assert time.perf_counter() - started < 1
+
+
+def test_scheduler_wakes_for_earlier_tenant_only():
+    clock = VirtualClock()
+    scheduler = AdaptiveScheduler(clock=clock)
+    scheduler.schedule(Tenant('late', 1), 100)
+
+    async def take():
+        loop = asyncio.get_running_loop()
+        loop.call_later(10, scheduler.schedule, Tenant('later', 2), 200)
+        loop.call_later(20, scheduler.schedule, Tenant('early', 3), 30)
+        tenant = await scheduler.next()
+        return tenant.token, loop.time()
+
+    assert clock.run(take()) == ('early', pytest.approx(50))
+
+
+def test_engine_polls_many_tenants_in_virtual_time():
+    clock = VirtualClock()
+    registry = TenantRegistry()
+    for number in range(10_000):
+        registry.add(f'token-{number}', number)
+    api = SilentApi()
+    engine = homework.create_engine(
+        registry, api, NullOutbox(), budget=TokenBucket(100, clock=clock),
+        clock=clock
+    )
+
+    async def run_for(duration):
+        try:
+            await asyncio.wait_for(engine.run_forever(), duration)
+        except asyncio.TimeoutError:
+            pass
+
+    clock.run(run_for(3600))
+    assert len(api.polls) == 10_000
+    assert sum(api.polls.values()) <= 100 * 3600 + 100
@@ -0,0 +1,73 @@
+import asyncio
+
+from clock import VirtualClock
+from dedup import ErrorCache, fingerprint
+from exception import HTTPErrorException, TimeoutException
+import homework
+from tenants import Tenant
+
+
+class FakeOutbox:
+
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, chat_id, message):
+        self.messages.append((chat_id, message))
+        return True
+
+
+def test_fingerprint_ignores_variable_details():
+    first = HTTPErrorException('Запрос "url?from_date=1" вернул код 500')
+    second = HTTPErrorException('Запрос "url?from_date=2" вернул код 502')
+    assert fingerprint(first) == fingerprint(second)
+    assert fingerprint(first) != fingerprint(TimeoutException(str(first)))
+
+
+class TestErrorCache:
+
+    def test_suppresses_repeats_within_window_and_counts_them(self):
+        clock = VirtualClock()
+        cache = ErrorCache(ttl=10, clock=clock)
+        key = cache.key(7, TimeoutException('1'))
+        assert cache.check(key) == 0
+        cache.remember(key)
+        assert cache.check(key) is None
+        assert cache.check(cache.key(7, TimeoutException('2'))) is None
+        assert cache.check(cache.key(8, TimeoutException('1'))) == 0
+        clock.now = 10
+        assert cache.check(key) == 2
+
+    def test_memory_is_bounded(self):
+        clock = VirtualClock()
+        cache = ErrorCache(ttl=10, maxsize=3, clock=clock)
+        for chat_id in range(5):
+            cache.remember(cache.key(chat_id, TimeoutException('1')))
+        assert len(cache) == 3
+        clock.now = 20
+        cache.check(cache.key(0, TimeoutException('1')))
+        assert len(cache) == 0
+
+
+def test_alternating_error_is_reported_once_per_window():
+    clock = VirtualClock()
+    errors = ErrorCache(ttl=10, clock=clock)
+    outbox, tenant = FakeOutbox(), Tenant('token', 7)
+
+    async def scenario():
+        for number in range(3):
+            error = TimeoutException(f'таймаут {number}')
+            await homework.report_error(tenant, error, outbox, errors)
+            tenant.last_report = homework.NO_VERDICTS
+        clock.now = 10
+        await homework.report_error(
+            tenant, TimeoutException('таймаут 3'), outbox, errors
+        )
+
+    asyncio.run(scenario())
+    assert outbox.messages == [
+        (7, homework.PROGRAM_ERROR.format('таймаут 0')),
+        (7, homework.REPEATED_ERROR.format(
+            homework.PROGRAM_ERROR.format('таймаут 3'), 2
+        )),
+    ]
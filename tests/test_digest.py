@@ -0,0 +1,112 @@
+import asyncio
+
+import homework
+from digest import Coalescer, group_messages, split_text
+from tenants import Tenant
+
+
+class RecordingSend:
+
+    def __init__(self, failing_chat=None):
+        self.messages = []
+        self.failing_chat = failing_chat
+
+    async def __call__(self, chat_id, message):
+        await asyncio.sleep(0)
+        self.messages.append((chat_id, message))
+        return chat_id != self.failing_chat
+
+
+def test_split_text_respects_line_boundaries_and_limit():
+    assert split_text('aaa\nbbb\nccc', limit=8) == ['aaa\nbbb\n', 'ccc']
+    assert split_text('x' * 10, limit=4) == ['xxxx', 'xxxx', 'xx']
+    assert all(len(part) <= 4096 for part in split_text('y\n' * 5000))
+
+
+def test_group_messages_keeps_order_within_limit():
+    assert group_messages(['aaa', 'bbb', 'ccc'], limit=8, separator='--') == [
+        [0, 1], [2]
+    ]
+    assert group_messages([], limit=8) == []
+
+
+def test_coalescer_sends_one_digest_per_chat_window():
+    send, saved = RecordingSend(), []
+    coalescer = Coalescer(send, window=0.01, max_size=3, saved=saved.append)
+
+    async def burst():
+        return await asyncio.gather(
+            *(coalescer.send(1, f'm{number}') for number in range(4)),
+            coalescer.send(2, 'other')
+        )
+
+    assert asyncio.run(burst()) == [True] * 5
+    assert sorted(send.messages) == [
+        (1, 'm0\n\nm1\n\nm2'), (1, 'm3'), (2, 'other')
+    ]
+    assert sorted(saved) == [0, 0, 2]
+
+
+def test_failed_digest_saves_nothing():
+    send, saved = RecordingSend(failing_chat=1), []
+    coalescer = Coalescer(send, window=0.01, saved=saved.append)
+
+    async def burst():
+        return await asyncio.gather(
+            *(coalescer.send(1, f'm{number}') for number in range(5))
+        )
+
+    assert asyncio.run(burst()) == [False] * 5
+    assert saved == [0]
+
+
+def test_coalescer_splits_digest_at_message_limit():
+    send = RecordingSend()
+    coalescer = Coalescer(send, window=0.01, limit=10, separator='|')
+
+    async def burst():
+        return await asyncio.gather(
+            *(coalescer.send(1, message) for message in ('aaaa', 'bbbb', 'cc'))
+        )
+
+    asyncio.run(burst())
+    assert send.messages == [(1, 'aaaa|bbbb'), (1, 'cc')]
+
+
+def test_coalescer_stops_at_first_failed_part():
+    sent = []
+
+    async def send(chat_id, message):
+        sent.append(message)
+        return message != 'cccc'
+
+    coalescer = Coalescer(send, window=0.01, limit=10, separator='|')
+    messages = ('aaaa', 'bbbb', 'cccc\ncccc\ncccc', 'dd')
+
+    async def burst():
+        return await asyncio.gather(
+            *(coalescer.send(1, message) for message in messages)
+        )
+
+    assert asyncio.run(burst()) == [True, True, False, False]
+    assert sent == ['aaaa|bbbb', 'cccc\ncccc\n', 'cccc']
+
+
+def test_send_verdicts_through_digest_applies_delivered_statuses():
+    send = RecordingSend(failing_chat=8)
+    tenant = Tenant('token', 7, subscribers=(8,))
+    changes = [
+        {'id': number, 'homework_name': f'hw{number}', 'status': 'approved'}
+        for number in range(3)
+    ]
+
+    async def deliver():
+        return await homework.send_verdicts(
+            tenant, changes, Coalescer(send, window=0.01)
+        )
+
+    assert asyncio.run(deliver())
+    reports = [homework.parse_status(change) for change in changes]
+    digest = '\n\n'.join(reports)
+    assert send.messages == [(7, digest), (8, digest)]
+    assert tenant.statuses.diff(changes) == []
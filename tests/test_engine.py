@@ -0,0 +1,159 @@
+import asyncio
+import time
+
+import pytest
+
+from concurrency import Limiter
+from engine import PollingEngine
+from scheduler import AdaptiveScheduler
+from tenants import TenantRegistry
+
+
+class TestTenantRegistry:
+
+    def test_from_file(self, tmp_path):
+        path = tmp_path / 'tenants.txt'
+        path.write_text(
+            '# токен чат\n'
+            'token-1 101\n'
+            '\n'
+            'token-2 102\n',
+            encoding='utf-8'
+        )
+        registry = TenantRegistry.from_file(path, from_date=42)
+        assert len(registry) == 2
+        tenant = registry.get('token-2')
+        assert tenant.chat_id == '102'
+        assert tenant.from_date == 42
+        assert tenant.headers == {'Authorization': 'OAuth token-2'}
+
+    def test_from_file_subscriptions_share_one_tenant(self, tmp_path):
+        path = tmp_path / 'tenants.txt'
+        path.write_text(
+            'token-1 101,102\n'
+            'token-1 103\n'
+            'token-1 101\n',
+            encoding='utf-8'
+        )
+        registry = TenantRegistry.from_file(path)
+        assert len(registry) == 1
+        assert registry.get('token-1').chats == ('101', '102', '103')
+
+    def test_from_file_invalid_line(self, tmp_path):
+        path = tmp_path / 'tenants.txt'
+        path.write_text('token-1\n', encoding='utf-8')
+        with pytest.raises(ValueError):
+            TenantRegistry.from_file(path)
+
+    def test_add_merges_into_existing_tenant(self):
+        registry = TenantRegistry()
+        tenant = registry.add('token', 1, from_date=10, subscribers=(2,))
+        tenant.statuses.apply({'homework_name': 'hw', 'status': 'approved'})
+        assert registry.add('token', 3, locale='en') is tenant
+        assert tenant.chats == (1, 2, 3)
+        assert tenant.locale == 'en'
+        assert tenant.from_date == 10
+        assert len(tenant.statuses) == 1
+
+    def test_tenant_has_no_dict(self):
+        tenant = TenantRegistry().add('token', 1)
+        assert not hasattr(tenant, '__dict__'), (
+            'Подписчик должен хранить состояние в __slots__'
+        )
+
+
+class TestPollingEngine:
+
+    def test_run_cycle_polls_every_tenant(self):
+        registry = TenantRegistry()
+        for number in range(100):
+            registry.add(f'token-{number}', number)
+        polled = []
+
+        async def poll(tenant):
+            await asyncio.sleep(0)
+            polled.append(tenant.chat_id)
+
+        engine = PollingEngine(registry, poll, concurrency=8)
+        asyncio.run(engine.run_cycle())
+        assert sorted(polled) == list(range(100))
+
+    def test_run_cycle_survives_poll_errors(self):
+        registry = TenantRegistry()
+        registry.add('broken', 1)
+        registry.add('healthy', 2)
+        polled = []
+
+        async def poll(tenant):
+            if tenant.token == 'broken':
+                raise RuntimeError('сбой')
+            polled.append(tenant.token)
+
+        engine = PollingEngine(registry, poll, concurrency=2)
+        asyncio.run(engine.run_cycle())
+        assert polled == ['healthy']
+
+    def test_run_forever_repolls_with_given_scheduler(self):
+        registry = TenantRegistry()
+        registry.add('token', 1)
+        polled = []
+
+        async def poll(tenant):
+            polled.append(tenant.token)
+
+        scheduler = AdaptiveScheduler(base_interval=0.01, max_interval=0.01)
+        engine = PollingEngine(registry, poll, scheduler=scheduler)
+        assert engine.scheduler is scheduler
+
+        async def run():
+            try:
+                await asyncio.wait_for(engine.run_forever(), 0.2)
+            except asyncio.TimeoutError:
+                pass
+
+        asyncio.run(run())
+        assert len(polled) > 3
+
+    def test_tenants_are_added_and_removed_while_running(self):
+        registry = TenantRegistry()
+        registry.add('old', 1)
+        polled = []
+
+        async def poll(tenant):
+            polled.append(tenant.token)
+
+        scheduler = AdaptiveScheduler(base_interval=0.01, max_interval=0.01)
+        engine = PollingEngine(registry, poll, scheduler=scheduler)
+
+        async def run():
+            task = asyncio.create_task(engine.run_forever())
+            await asyncio.sleep(0.05)
+            engine.remove_tenants(['old'])
+            engine.add_tenants([('new', 2, 0)])
+            await asyncio.sleep(0.01)
+            polled.clear()
+            await asyncio.sleep(0.1)
+            task.cancel()
+
+        asyncio.run(run())
+        assert set(polled) == {'new'}
+
+
+class TestLimiter:
+
+    def test_bounds_blocking_calls(self):
+        limiter = Limiter(3)
+        peak = []
+
+        def blocking():
+            peak.append(limiter.in_flight)
+            time.sleep(0.01)
+
+        async def run():
+            await asyncio.gather(*(limiter.run(blocking) for _ in range(20)))
+
+        try:
+            asyncio.run(run())
+        finally:
+            limiter.shutdown()
+        assert max(peak) <= 3
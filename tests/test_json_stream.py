@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+import homework
+from exception import InvalidResponseException, JSONDecodeErrorException
+from json_stream import parse_object
+from status_index import StatusIndex
+
+
+def chunked(data, size):
+    body = json.dumps(data, ensure_ascii=False).encode()
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+class StreamResponse:
+
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.closed = True
+
+    def iter_content(self, chunk_size):
+        return iter(
+            self.body[start:start + chunk_size]
+            for start in range(0, len(self.body), chunk_size)
+        )
+
+
+@pytest.mark.parametrize('size', [1, 2, 7, 4096])
+def test_parse_object_streams_items_across_chunks(size):
+    data = {
+        'before': {'nested': [1, 2]},
+        'homeworks': [
+            {'homework_name': 'работа', 'status': 'approved'},
+            12345,
+            'строка',
+        ],
+        'current_date': 1700000000,
+    }
+    items = []
+    envelope, streamed = parse_object(
+        chunked(data, size), 'homeworks', items.append
+    )
+    assert streamed
+    assert items == data['homeworks']
+    assert envelope == {
+        'before': {'nested': [1, 2]}, 'current_date': 1700000000
+    }
+
+
+def test_parse_object_handles_empty_and_non_array_values():
+    items = []
+    assert parse_object(
+        chunked({'homeworks': []}, 3), 'homeworks', items.append
+    ) == ({}, True)
+    assert parse_object(
+        chunked({'homeworks': 'нет'}, 3), 'homeworks', items.append
+    ) == ({'homeworks': 'нет'}, False)
+    assert parse_object(chunked({}, 1), 'homeworks', items.append) == (
+        {}, False
+    )
+    assert items == []
+
+
+def test_parse_object_rejects_truncated_body():
+    with pytest.raises(ValueError):
+        parse_object([b'{"homeworks": [{"a": 1}, '], 'homeworks', print)
+
+
+def test_stream_response_keeps_first_and_changed_homeworks():
+    index = StatusIndex()
+    index.apply({'id': 2, 'status': 'reviewing'})
+    index.apply({'id': 3, 'status': 'approved'})
+    homeworks = [
+        {'id': 3, 'homework_name': 'c', 'status': 'approved'},
+        {'id': 2, 'homework_name': 'b', 'status': 'approved'},
+        {'id': 1, 'homework_name': 'a', 'status': 'approved'},
+        {'id': 3, 'homework_name': 'c', 'status': 'approved'},
+    ]
+    body = json.dumps({'homeworks': homeworks, 'current_date': 5}).encode()
+    response = StreamResponse(body)
+    statuses = homework.stream_response(response, {}, {}, index)
+    assert response.closed
+    assert statuses == {'homeworks': homeworks[:3], 'current_date': 5}
+
+
+def test_stream_response_reports_invalid_items_and_json():
+    body = json.dumps({'homeworks': [
+        {'homework_name': 'a', 'status': 'approved'},
+        {'status': 'unknown'},
+    ]}).encode()
+    with pytest.raises(InvalidResponseException, match='1'):
+        homework.stream_response(StreamResponse(body), {}, {}, StatusIndex())
+    with pytest.raises(JSONDecodeErrorException):
+        homework.stream_response(
+            StreamResponse(b'{"homeworks": [oops]}'), {}, {}, StatusIndex()
+        )
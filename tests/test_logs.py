@@ -0,0 +1,34 @@
+import logging
+
+import pytest
+
+from logs import LazyQueueHandler, parse_sampling, SamplingFilter
+
+TEMPLATE = 'Отправлено сообщение %s'
+
+
+def make_record(msg, level=logging.INFO):
+    return logging.LogRecord('test', level, __file__, 1, msg, ('текст',), None)
+
+
+class TestLogs:
+
+    def test_sampling_passes_every_nth_info_record(self):
+        sampling = SamplingFilter({TEMPLATE: 3})
+        passed = [sampling.filter(make_record(TEMPLATE)) for _ in range(7)]
+        assert passed == [True, False, False, True, False, False, True]
+        assert sampling.filter(make_record(TEMPLATE, logging.ERROR))
+        assert sampling.filter(make_record('Другое сообщение'))
+
+    def test_parse_sampling(self):
+        templates = {'SENT_MESSAGE': TEMPLATE}
+        assert parse_sampling('SENT_MESSAGE=10', templates) == {TEMPLATE: 10}
+        assert parse_sampling('', templates) == {}
+        with pytest.raises(ValueError):
+            parse_sampling('UNKNOWN=10', templates)
+
+    def test_queue_handler_does_not_format(self):
+        record = make_record(TEMPLATE)
+        prepared = LazyQueueHandler(None).prepare(record)
+        assert prepared.msg == TEMPLATE
+        assert prepared.args == ('текст',)
@@ -0,0 +1,53 @@
+import threading
+from urllib.request import urlopen
+
+from metrics import Counter, Gauge, Histogram, Registry, start_metrics_server
+
+
+class TestMetrics:
+
+    def test_counter_sums_thread_shards(self):
+        counter = Counter('errors_total', 'Ошибки', label='exception')
+
+        def work():
+            for _ in range(1000):
+                counter.inc('TimeoutException')
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc('HTTPErrorException')
+        assert counter.values() == {
+            'TimeoutException': 4000, 'HTTPErrorException': 1
+        }
+        assert 'errors_total{exception="TimeoutException"} 4000' in (
+            counter.render()
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram('latency_seconds', 'Задержка', buckets=(1, 2))
+        for value in (0.5, 1, 1.5, 3):
+            histogram.observe(value)
+        lines = histogram.samples()
+        assert lines == [
+            'latency_seconds_bucket{le="1"} 2',
+            'latency_seconds_bucket{le="2"} 3',
+            'latency_seconds_bucket{le="+Inf"} 4',
+            'latency_seconds_sum 6.0',
+            'latency_seconds_count 4',
+        ]
+
+    def test_metrics_endpoint(self):
+        registry = Registry()
+        registry.register(Gauge('queue_depth', 'Очередь', func=lambda: 7))
+        server = start_metrics_server(0, registry, host='127.0.0.1')
+        try:
+            url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+            with urlopen(url) as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert 'queue_depth 7' in body
@@ -0,0 +1,220 @@
+import asyncio
+import time
+
+from client import PracticumClient
+from concurrency import Limiter
+import homework
+from retry import CircuitBreaker, RetryPolicy
+from status_index import StatusIndex
+from tenants import Tenant
+
+
+class FakeApi:
+
+    cache = None
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    async def get(self, tenant):
+        return self.responses.pop(0)
+
+
+class SlowApi:
+
+    cache = None
+
+    async def get(self, tenant):
+        await asyncio.sleep(1)
+
+
+class DirectOutbox:
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def send(self, chat_id, message):
+        return homework.send_chat_message(self.bot, chat_id, message)
+
+
+class FakeBot:
+
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.messages.append((chat_id, text))
+
+
+class SlowBot(FakeBot):
+
+    def send_message(self, chat_id, text, **kwargs):
+        time.sleep(0.02)
+        super().send_message(chat_id, text, **kwargs)
+
+
+class CountingApi:
+
+    cache = None
+
+    def __init__(self, response):
+        self.response = response
+        self.requests = 0
+
+    async def get(self, tenant):
+        self.requests += 1
+        return self.response
+
+
+class StatusResponse:
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def json(self):
+        return {'homeworks': [], 'current_date': 100}
+
+
+class TokenCheckingFetch:
+
+    def __init__(self, revoked):
+        self.revoked = revoked
+        self.calls = 0
+
+    def __call__(self, from_date, headers):
+        self.calls += 1
+        status = 401 if headers['Authorization'].endswith(self.revoked) else 200
+        return homework.read_response(StatusResponse(status), headers, {})
+
+
+class FlakyBot(FakeBot):
+
+    def __init__(self, failing_chat):
+        super().__init__()
+        self.failing_chat = failing_chat
+
+    def send_message(self, chat_id, text, **kwargs):
+        if chat_id == self.failing_chat:
+            raise homework.telegram.error.NetworkError('сбой')
+        super().send_message(chat_id, text, **kwargs)
+
+
+def poll(bot, tenant, api, budget=None):
+    asyncio.run(
+        homework.poll_tenant(tenant, api, DirectOutbox(bot), budget)
+    )
+
+
+class TestPollTenant:
+
+    def test_notifies_every_changed_homework(self):
+        bot, tenant = FakeBot(), Tenant('token', 7)
+        api = FakeApi(
+            {
+                'homeworks': [
+                    {'id': 2, 'homework_name': 'hw2', 'status': 'reviewing'},
+                    {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+                ],
+                'current_date': 100,
+            },
+            {
+                'homeworks': [
+                    {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+                    {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+                ],
+                'current_date': 200,
+            },
+        )
+        poll(bot, tenant, api)
+        assert [text for _, text in bot.messages] == [
+            homework.parse_status({'homework_name': 'hw1',
+                                   'status': 'approved'}),
+            homework.parse_status({'homework_name': 'hw2',
+                                   'status': 'reviewing'}),
+        ]
+        assert tenant.from_date == 100
+        poll(bot, tenant, api)
+        assert len(bot.messages) == 3
+        assert bot.messages[-1][1].startswith(
+            'Изменился статус проверки работы "hw2"'
+        )
+        assert tenant.from_date == 200
+
+    def test_empty_response_reports_no_verdicts_once(self):
+        bot, tenant = FakeBot(), Tenant('token', 7)
+        empty = {'homeworks': [], 'current_date': 100}
+        poll(bot, tenant, FakeApi(empty, empty))
+        poll(bot, tenant, FakeApi(empty))
+        assert bot.messages == [(7, homework.NO_VERDICTS)]
+
+    def test_budget_exceeded_is_reported_as_timeout(self):
+        bot, tenant = FakeBot(), Tenant('token', 7)
+        poll(bot, tenant, SlowApi(), budget=0.01)
+        assert bot.messages == [(7, homework.PROGRAM_ERROR.format(
+            homework.POLL_BUDGET_EXCEEDED.format(0.01)
+        ))]
+        assert tenant.from_date == 0
+
+    def test_budget_exceeded_between_verdicts_names_poll_budget(self):
+        bot, tenant = SlowBot(), Tenant('token', 7)
+        api = FakeApi({
+            'homeworks': [
+                {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+            ],
+            'current_date': 100,
+        })
+        poll(bot, tenant, api, budget=0.01)
+        assert bot.messages[-1] == (7, homework.PROGRAM_ERROR.format(
+            homework.POLL_BUDGET_EXCEEDED.format(0.01)
+        ))
+        assert len(bot.messages) == 2
+        assert tenant.from_date == 0
+
+    def test_verdict_fans_out_to_subscribed_chats(self):
+        bot = FlakyBot(failing_chat=9)
+        tenant = Tenant('token', 7, subscribers=(8, 9))
+        api = CountingApi({
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+            ],
+            'current_date': 100,
+        })
+        poll(bot, tenant, api)
+        report = homework.parse_status(
+            {'homework_name': 'hw1', 'status': 'approved'}
+        )
+        assert api.requests == 1
+        assert bot.messages == [(7, report), (8, report)]
+        assert tenant.statuses.diff(api.response['homeworks']) == []
+        assert tenant.from_date == 100
+
+
+    def test_revoked_token_does_not_trip_shared_breaker(self):
+        bot, fetch = FakeBot(), TokenCheckingFetch('revoked')
+        client = PracticumClient(
+            fetch, Limiter(2),
+            retry=RetryPolicy(attempts=3, base_delay=0),
+            breaker=CircuitBreaker(failure_threshold=2, recovery_time=60)
+        )
+        revoked, healthy = Tenant('revoked', 7), Tenant('healthy', 8)
+        try:
+            for _ in range(2):
+                poll(bot, revoked, client)
+            assert fetch.calls == 2
+            poll(bot, healthy, client)
+        finally:
+            client.close()
+        assert client.breaker.state == CircuitBreaker.CLOSED
+        assert bot.messages[-1] == (8, homework.NO_VERDICTS)
+
+
+class TestStatusIndex:
+
+    def test_diff_does_not_change_index_until_apply(self):
+        index = StatusIndex()
+        homeworks = [{'homework_name': 'hw', 'status': 'reviewing'}]
+        assert index.diff(homeworks) == homeworks
+        assert index.diff(homeworks) == homeworks
+        index.apply(homeworks[0])
+        assert index.diff(homeworks) == []
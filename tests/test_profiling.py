@@ -0,0 +1,77 @@
+import asyncio
+import os
+import signal
+
+import pytest
+
+from clock import VirtualClock
+from concurrency import Limiter
+from profiling import NULL_SPAN, SignalProfiler, Spans
+
+
+def test_disabled_spans_measure_nothing():
+    spans = Spans()
+    assert spans.span('http') is NULL_SPAN
+    with spans.cycle('poll'), spans.span('http'):
+        pass
+    assert spans.stats() == {}
+
+
+def test_spans_aggregate_count_total_and_max():
+    clock = VirtualClock()
+    spans = Spans(enabled=True, clock=clock)
+    for duration in (1, 3):
+        with spans.span('http'):
+            clock.now += duration
+    assert spans.stats() == {'http': (2, 4, 3)}
+    assert 'http' in spans.summary()
+
+
+def test_slow_cycle_is_dumped_with_stages_from_threads():
+    dumps = []
+    spans = Spans(
+        enabled=True, slow=0.01,
+        dump=lambda name, elapsed, trace: dumps.append((name, trace))
+    )
+    limiter = Limiter(2)
+
+    def fetch():
+        with spans.span('http'):
+            pass
+
+    async def poll(name, delay):
+        with spans.cycle(name):
+            await limiter.run(fetch)
+            with spans.span('send'):
+                await asyncio.sleep(delay)
+
+    async def both():
+        await asyncio.gather(poll('fast', 0), poll('slow', 0.02))
+
+    asyncio.run(both())
+    limiter.shutdown()
+    assert [name for name, _ in dumps] == ['slow']
+    assert [stage for stage, _ in dumps[0][1]] == ['http', 'send']
+
+
+@pytest.mark.skipif(
+    not hasattr(signal, 'SIGUSR2'), reason='нет сигнала SIGUSR2'
+)
+def test_signal_toggles_memory_profile():
+    reports = []
+    profiler = SignalProfiler(
+        lambda mode, text: reports.append(mode), limit=3
+    )
+    previous = {
+        signum: signal.getsignal(signum)
+        for signum in (signal.SIGUSR1, signal.SIGUSR2)
+    }
+    try:
+        assert 'SIGUSR2' in profiler.install()
+        os.kill(os.getpid(), signal.SIGUSR2)
+        [object() for _ in range(100)]
+        os.kill(os.getpid(), signal.SIGUSR2)
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+    assert reports == ['memory']
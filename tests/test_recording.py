@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import homework
+from profiling import profile
+from recording import (
+    fingerprint,
+    read_records,
+    recorded_response,
+    Recorder,
+    sanitize_headers,
+    sanitize_text
+)
+from tenants import Tenant
+
+
+class Sent:
+
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, chat_id, message):
+        self.messages.append(message)
+        return True
+
+
+def test_sanitize_replaces_tokens_with_fingerprints():
+    headers = sanitize_headers({'Authorization': 'OAuth secret', 'X': '1'})
+    assert headers == {'Authorization': fingerprint('OAuth secret'), 'X': '1'}
+    text = sanitize_text("{'Authorization': 'OAuth secret'}")
+    assert 'secret' not in text
+    assert fingerprint('secret') in text
+
+
+def test_recorder_appends_sends_and_skips_torn_line(tmp_path):
+    path = tmp_path / 'traffic.jsonl'
+    recorder = Recorder(path, clock=lambda: 1.0)
+    send = recorder.record_sends(lambda chat_id, message: True)
+    assert send(7, 'Сбой: OAuth secret')
+    recorder.close()
+    with open(path, 'a', encoding='utf-8') as records:
+        records.write('{"kind":"se')
+    [record] = read_records(path)
+    assert record['kind'] == 'send'
+    assert record['at'] == 1.0
+    assert record['chat_id'] == 7 and record['sent'] is True
+    assert 'secret' not in record['message']
+
+
+def test_recorded_response_replays_through_poll_tenant():
+    homeworks = [{'homework_name': 'hw', 'status': 'approved'}]
+    record = {
+        'kind': 'api', 'at': 0, 'url': 'http://api/?from_date=0',
+        'headers': {}, 'status': 200,
+        'body': json.dumps({'homeworks': homeworks, 'current_date': 5}),
+    }
+
+    class Client:
+        cache = None
+
+        async def get(self, tenant):
+            return homework.read_response(recorded_response(record), {}, {})
+
+    tenant, outbox = Tenant('token', 1), Sent()
+    asyncio.run(homework.poll_tenant(tenant, Client(), outbox))
+    assert outbox.messages == [homework.parse_status(homeworks[0])]
+    assert tenant.from_date == 5
+
+
+def test_profile_reports_only_when_enabled():
+    reports = []
+    with profile(None, reports.append):
+        sum(range(10))
+    assert reports == []
+    with profile('cpu', reports.append, limit=3):
+        sum(range(10))
+    with profile('memory', reports.append, limit=3):
+        [object() for _ in range(10)]
+    assert len(reports) == 2
+    assert 'function calls' in reports[0]
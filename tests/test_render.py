@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+import homework
+from render import load_renderers, VerdictRenderer
+from tenants import TenantRegistry
+
+VERDICTS = {'approved': 'Принята {}.', 'rejected': 'Отклонена.'}
+TEMPLATE = 'Работа "{}": {}'
+
+
+def test_renders_same_message_as_format():
+    renderer = VerdictRenderer(VERDICTS, TEMPLATE, 'Статус {}')
+    for status, verdict in VERDICTS.items():
+        assert renderer({'homework_name': 'hw', 'status': status}) == (
+            TEMPLATE.format('hw', verdict)
+        )
+    with pytest.raises(ValueError, match='Статус unknown'):
+        renderer({'homework_name': 'hw', 'status': 'unknown'})
+    with pytest.raises(KeyError):
+        renderer({'status': 'approved'})
+
+
+def test_cache_is_bounded():
+    renderer = VerdictRenderer(VERDICTS, TEMPLATE, 'Статус {}', maxsize=2)
+    for number in range(5):
+        renderer({'homework_name': number, 'status': 'approved'})
+    renderer({'homework_name': 4, 'status': 'approved'})
+    info = renderer.render.cache_info()
+    assert (info.currsize, info.hits) == (2, 1)
+
+
+def test_locale_overrides_extend_default(tmp_path):
+    path = tmp_path / 'locales.json'
+    path.write_text(json.dumps({
+        'en': {
+            'template': 'Homework "{}": {}',
+            'verdicts': {'approved': 'Approved.'},
+        },
+    }), encoding='utf-8')
+    default = VerdictRenderer(VERDICTS, TEMPLATE, 'Статус {}')
+    english = load_renderers(path, default)['en']
+    assert english({'homework_name': 'hw', 'status': 'approved'}) == (
+        'Homework "hw": Approved.'
+    )
+    assert english({'homework_name': 'hw', 'status': 'rejected'}) == (
+        'Homework "hw": Отклонена.'
+    )
+
+
+def test_tenants_get_renderer_of_their_locale(tmp_path, monkeypatch):
+    path = tmp_path / 'tenants.txt'
+    path.write_text('token-1 1\ntoken-2 2 en\n', encoding='utf-8')
+    registry = TenantRegistry.from_file(path)
+    english = homework.RENDERER.derive(template='Homework "{}": {}')
+    monkeypatch.setattr(homework, 'RENDERERS', {'en': english})
+    assert homework.renderer_for(registry.get('token-1')) is (
+        homework.RENDERER
+    )
+    assert homework.renderer_for(registry.get('token-2')) is english
+    monkeypatch.setattr(homework, 'RENDERERS', {})
+    monkeypatch.setattr(homework, 'TENANTS_FILE', str(path))
+    with pytest.raises(ValueError):
+        homework.build_registry(0)
+
+
+def test_env_tenant_merges_into_file_tenant(tmp_path, monkeypatch):
+    path = tmp_path / 'tenants.txt'
+    path.write_text('token-1 1,2 en\n', encoding='utf-8')
+    monkeypatch.setattr(homework, 'RENDERERS', {'en': homework.RENDERER})
+    monkeypatch.setattr(homework, 'TENANTS_FILE', str(path))
+    monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'token-1')
+    monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', '3')
+    monkeypatch.setattr(homework, 'TELEGRAM_SUBSCRIBERS', '2,4')
+    registry = homework.build_registry(0)
+    assert len(registry) == 1
+    tenant = registry.get('token-1')
+    assert tenant.chats == ('1', '2', '3', '4')
+    assert tenant.locale == 'en'
@@ -0,0 +1,81 @@
+import json
+
+import homework
+from response_cache import digest, ResponseCache
+from tenants import Tenant
+
+
+class FakeResponse:
+
+    def __init__(self, status_code=200, data=None, headers=None):
+        self.status_code = status_code
+        self.content = json.dumps(data).encode() if data is not None else b''
+        self.headers = headers or {}
+        self.decoded = 0
+
+    def json(self):
+        self.decoded += 1
+        return json.loads(self.content)
+
+
+class FakeSession:
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, **data):
+        self.requests.append(data['headers'])
+        return self.responses.pop(0)
+
+
+HEADERS = {'Authorization': 'OAuth token'}
+
+
+def test_digest_ignores_current_date():
+    first, first_date = digest(b'{"homeworks": [], "current_date": 1}')
+    second, second_date = digest(b'{"homeworks": [], "current_date": 22}')
+    assert first == second
+    assert (first_date, second_date) == (1, 22)
+    assert digest(b'{"homeworks": [1], "current_date": 1}')[0] != first
+
+
+def test_not_modified_response_is_taken_from_cache():
+    cache = ResponseCache()
+    session = FakeSession(
+        FakeResponse(
+            data={'homeworks': [], 'current_date': 1},
+            headers={'ETag': '"v1"', 'Last-Modified': 'Mon'}
+        ),
+        FakeResponse(304),
+    )
+    first = homework.request_api_answer(0, HEADERS, session, cache)
+    second = homework.request_api_answer(0, HEADERS, session, cache)
+    assert second is first
+    assert session.requests[1] == {
+        **HEADERS, 'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon'
+    }
+
+
+def test_unchanged_body_is_not_decoded_or_checked_again():
+    cache = ResponseCache()
+    responses = [
+        FakeResponse(data={'homeworks': [], 'current_date': date})
+        for date in (1, 2)
+    ]
+    session = FakeSession(*responses)
+    first = homework.request_api_answer(0, HEADERS, session, cache)
+    second = homework.request_api_answer(1, HEADERS, session, cache)
+    assert second is first
+    assert second['current_date'] == 2
+    assert [response.decoded for response in responses] == [1, 0]
+    checks = []
+
+    def check(response):
+        checks.append(response)
+        return homework.check_response(response)
+
+    tenant = Tenant('token', 7)
+    for _ in range(2):
+        assert cache.check(tenant.headers, second, check) == []
+    assert len(checks) == 1
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from clock import VirtualClock
+from exception import (
+    CircuitOpenException,
+    DenyServiceErrorException,
+    FATAL_EXCEPTIONS,
+    RETRYABLE_EXCEPTIONS,
+    TimeoutException
+)
+from retry import CircuitBreaker, CIRCUIT_PROBING, RetryPolicy
+
+
+class Flaky:
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_exceptions_are_classified():
+    assert not set(RETRYABLE_EXCEPTIONS) & set(FATAL_EXCEPTIONS)
+
+
+class TestRetryPolicy:
+
+    def test_retries_transient_errors(self):
+        func = Flaky(TimeoutException('1'), TimeoutException('2'), 'ok')
+        policy = RetryPolicy(attempts=3, base_delay=0)
+        assert asyncio.run(policy.call(func)) == 'ok'
+        assert func.calls == 3
+
+    def test_does_not_retry_fatal_errors(self):
+        func = Flaky(DenyServiceErrorException('отказ'), 'ok')
+        policy = RetryPolicy(attempts=3, base_delay=0)
+        with pytest.raises(DenyServiceErrorException):
+            asyncio.run(policy.call(func))
+        assert func.calls == 1
+
+    def test_zero_attempts_still_call_once(self):
+        func = Flaky(TimeoutException('сбой'))
+        with pytest.raises(TimeoutException):
+            asyncio.run(RetryPolicy(attempts=0, base_delay=0).call(func))
+        assert func.calls == 1
+
+    def test_delay_is_jittered_and_capped(self):
+        policy = RetryPolicy(base_delay=1, max_delay=5, random=lambda: 1)
+        assert [policy.delay(n) for n in range(1, 5)] == [2, 4, 5, 5]
+        policy = RetryPolicy(base_delay=1, max_delay=5, random=lambda: 0.5)
+        assert policy.delay(1) == 1
+
+
+class TestCircuitBreaker:
+
+    def test_opens_and_recovers_through_half_open_probe(self):
+        clock = VirtualClock()
+        breaker = CircuitBreaker(
+            failure_threshold=2, recovery_time=10, clock=clock
+        )
+        failing = Flaky(*[TimeoutException('сбой')] * 2)
+
+        async def scenario():
+            for _ in range(2):
+                with pytest.raises(TimeoutException):
+                    await breaker.call(failing)
+            assert breaker.state == CircuitBreaker.OPEN
+            with pytest.raises(CircuitOpenException):
+                await breaker.call(Flaky('ok'))
+            clock.now = 10
+            assert await breaker.call(Flaky('ok')) == 'ok'
+            assert breaker.state == CircuitBreaker.CLOSED
+
+        asyncio.run(scenario())
+
+    def test_failed_probe_reopens(self):
+        clock = VirtualClock()
+        breaker = CircuitBreaker(
+            failure_threshold=1, recovery_time=10, clock=clock
+        )
+
+        async def scenario():
+            with pytest.raises(TimeoutException):
+                await breaker.call(Flaky(TimeoutException('сбой')))
+            clock.now = 10
+            with pytest.raises(TimeoutException):
+                await breaker.call(Flaky(TimeoutException('сбой')))
+            assert breaker.state == CircuitBreaker.OPEN
+            with pytest.raises(CircuitOpenException):
+                await breaker.call(Flaky('ok'))
+
+        asyncio.run(scenario())
+
+    def test_calls_during_probe_are_rejected_without_negative_time(self):
+        clock = VirtualClock()
+        breaker = CircuitBreaker(
+            failure_threshold=1, recovery_time=10, clock=clock
+        )
+
+        async def scenario():
+            with pytest.raises(TimeoutException):
+                await breaker.call(Flaky(TimeoutException('сбой')))
+            clock.now = 30
+            release = asyncio.Event()
+
+            async def probe():
+                await release.wait()
+                return 'ok'
+
+            task = asyncio.create_task(breaker.call(probe))
+            await asyncio.sleep(0)
+            with pytest.raises(CircuitOpenException, match=CIRCUIT_PROBING):
+                await breaker.call(Flaky('ok'))
+            release.set()
+            assert await task == 'ok'
+
+        asyncio.run(scenario())
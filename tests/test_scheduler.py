@@ -0,0 +1,52 @@
+import asyncio
+
+from clock import VirtualClock
+from ratelimit import TokenBucket
+from scheduler import AdaptiveScheduler
+from tenants import Tenant
+
+
+class TestAdaptiveScheduler:
+
+    def test_reviewing_is_polled_faster(self):
+        scheduler = AdaptiveScheduler(base_interval=600, reviewing_interval=60)
+        tenant = Tenant('token', 1)
+        tenant.last_status = 'reviewing'
+        assert scheduler.interval(tenant) == 60
+
+    def test_idle_tenant_backs_off_exponentially(self):
+        scheduler = AdaptiveScheduler(
+            base_interval=600, max_interval=3600, backoff=2
+        )
+        tenant = Tenant('token', 1)
+        intervals = []
+        for _ in range(5):
+            intervals.append(scheduler.interval(tenant))
+            tenant.idle_polls += 1
+        assert intervals == [600, 1200, 2400, 3600, 3600]
+
+    def test_next_returns_due_tenants_in_order(self):
+        clock = VirtualClock()
+        scheduler = AdaptiveScheduler(clock=clock)
+        late, early = Tenant('late', 1), Tenant('early', 2)
+        scheduler.schedule(late, 10)
+        scheduler.schedule(early, 5)
+        clock.now = 10
+
+        async def take_two():
+            return [await scheduler.next(), await scheduler.next()]
+
+        order = asyncio.run(take_two())
+        assert [tenant.token for tenant in order] == ['early', 'late']
+
+
+class TestTokenBucket:
+
+    def test_limits_rate(self):
+        clock = VirtualClock()
+        bucket = TokenBucket(rate=10, burst=2, clock=clock)
+        assert bucket.try_acquire() == 0
+        assert bucket.try_acquire() == 0
+        assert bucket.try_acquire() == 0.1
+        clock.now = 0.1
+        assert bucket.try_acquire() == 0
@@ -0,0 +1,117 @@
+import asyncio
+from functools import partial
+import threading
+import time
+
+import homework
+from send_queue import SendQueue
+
+
+class FakeBot:
+    """Подделка telegram.Bot, запоминающая время отправки сообщений."""
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send_message(self, chat_id, text, **kwargs):
+        time.sleep(self.delay)
+        with self._lock:
+            self.sent.append((time.monotonic(), chat_id, text))
+
+
+def run_queue(queue, coroutine):
+    async def main():
+        try:
+            return await coroutine(queue)
+        finally:
+            queue.close()
+
+    return asyncio.run(main())
+
+
+def make_queue(bot, **kwargs):
+    return SendQueue(partial(homework.send_chat_message, bot), **kwargs)
+
+
+class TestSendQueue:
+
+    def test_keeps_order_within_chat(self):
+        bot = FakeBot()
+        queue = make_queue(bot, workers=4, chat_rate=1000, chat_burst=1000)
+
+        async def send_all(queue):
+            return await asyncio.gather(*(
+                queue.send(chat_id, f'{chat_id}-{number}')
+                for number in range(20) for chat_id in (1, 2)
+            ))
+
+        assert all(run_queue(queue, send_all))
+        for chat_id in (1, 2):
+            texts = [text for _, chat, text in bot.sent if chat == chat_id]
+            assert texts == [f'{chat_id}-{number}' for number in range(20)]
+
+    def test_limits_per_chat_rate(self):
+        bot = FakeBot()
+        queue = make_queue(bot, workers=4, chat_rate=50, chat_burst=1)
+
+        async def send_all(queue):
+            await asyncio.gather(*(queue.send(1, str(n)) for n in range(6)))
+
+        run_queue(queue, send_all)
+        moments = [moment for moment, _, _ in bot.sent]
+        assert moments[-1] - moments[0] >= 5 / 50 * 0.9, (
+            'Сообщения в один чат должны отправляться не чаще chat_rate'
+        )
+
+    def test_burst_to_one_chat_does_not_delay_others(self):
+        bot = FakeBot()
+        queue = make_queue(bot, workers=4, rate=100, chat_rate=5)
+
+        async def send_all(queue):
+            started = time.monotonic()
+            burst = [await queue.put(1, str(n)) for n in range(12)]
+            await queue.send(2, 'other')
+            waited = time.monotonic() - started
+            await asyncio.gather(*burst)
+            return waited
+
+        assert run_queue(queue, send_all) < 13 / 100 + 0.1, (
+            'Пачка сообщений в один чат не должна задерживать другие чаты '
+            'дольше общего ограничения rate'
+        )
+        texts = [text for _, chat, text in bot.sent if chat == 1]
+        assert texts == [str(n) for n in range(12)]
+
+    def test_limits_global_rate(self):
+        bot = FakeBot()
+        queue = make_queue(bot, workers=8, rate=50, chat_rate=1000)
+
+        async def send_all(queue):
+            await asyncio.gather(*(
+                queue.send(chat_id, 'text') for chat_id in range(100)
+            ))
+
+        run_queue(queue, send_all)
+        moments = [moment for moment, _, _ in bot.sent]
+        assert moments[-1] - moments[0] >= 50 / 50 * 0.9, (
+            'Общая частота отправки не должна превышать rate'
+        )
+
+    def test_back_pressure_when_full(self):
+        bot = FakeBot(delay=0.05)
+        queue = make_queue(bot, workers=1, maxsize=2, chat_rate=1000)
+
+        async def overflow(queue):
+            futures = [await queue.put(1, str(n)) for n in range(3)]
+            started = time.monotonic()
+            futures.append(await queue.put(1, 'last'))
+            waited = time.monotonic() - started
+            await asyncio.gather(*futures)
+            return waited
+
+        assert run_queue(queue, overflow) >= 0.04, (
+            'Постановка в заполненную очередь должна ждать освобождения места'
+        )
+        assert len(bot.sent) == 4
@@ -0,0 +1,195 @@
+import asyncio
+import multiprocessing
+import queue
+import sqlite3
+
+from engine import PollingEngine
+from ratelimit import SharedTokenBucket
+from scheduler import AdaptiveScheduler
+from sharding import ADD, follow_assignments, HashRing, REMOVE, Supervisor
+from state import open_backend, StateStore
+from tenants import TenantRegistry
+
+TOKENS = [f'token-{number}' for number in range(1000)]
+
+
+def record_commands(name, inbox, done, events):
+    while True:
+        command, payload = inbox.get()
+        events.put((name, command, payload))
+        if command == REMOVE:
+            done.put((name, payload))
+
+
+async def serve_cursors(name, inbox, done, events, path):
+    registry = TenantRegistry()
+    engine = PollingEngine(
+        registry, poll_cursor,
+        scheduler=AdaptiveScheduler(base_interval=0.01, max_interval=0.01),
+        state=StateStore(open_backend('sqlite', path)),
+        flush_interval=0.05
+    )
+    add, release = engine.add_tenants, engine.release_tenants
+
+    def add_tenants(entries):
+        add(entries)
+        events.put((name, ADD, cursors(registry, entries)))
+
+    async def release_tenants(tokens):
+        tenants = {token: registry.get(token) for token in tokens}
+        await release(tokens)
+        events.put((name, REMOVE, {
+            token: tenant.from_date for token, tenant in tenants.items()
+        }))
+
+    engine.add_tenants, engine.release_tenants = add_tenants, release_tenants
+    follow_assignments(inbox, engine, name, done)
+    await engine.run_forever()
+
+
+async def poll_cursor(tenant):
+    await asyncio.sleep(0.05)
+    tenant.from_date += 1
+
+
+def cursors(registry, entries):
+    return {
+        entry[0]: registry.get(entry[0]).from_date for entry in entries
+    }
+
+
+def track_cursors(name, inbox, done, events, path):
+    asyncio.run(serve_cursors(name, inbox, done, events, path))
+
+
+def drain(events):
+    received = []
+    while True:
+        try:
+            received.append(events.get(timeout=0.5))
+        except queue.Empty:
+            return received
+
+
+def acquire_tokens(bucket, results):
+    results.put(sum(not bucket.try_acquire() for _ in range(100)))
+
+
+class TestHashRing:
+
+    def test_spreads_keys_over_nodes(self):
+        ring = HashRing(['a', 'b', 'c', 'd'])
+        owners = [ring.node(token) for token in TOKENS]
+        assert all(owners.count(node) > 150 for node in 'abcd')
+
+    def test_only_keys_of_removed_node_move(self):
+        ring = HashRing(['a', 'b', 'c'])
+        before = {token: ring.node(token) for token in TOKENS}
+        ring.remove('b')
+        for token in TOKENS:
+            if before[token] != 'b':
+                assert ring.node(token) == before[token]
+            else:
+                assert ring.node(token) in 'ac'
+        ring.add('b')
+        assert {token: ring.node(token) for token in TOKENS} == before
+
+
+def test_shared_bucket_limits_all_processes():
+    bucket = SharedTokenBucket(rate=0.001, burst=50)
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=acquire_tokens, args=(bucket, results))
+        for _ in range(3)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert sum(results.get() for _ in processes) == 50
+
+
+def test_supervisor_rebalances_tenants_of_dead_shard():
+    events = multiprocessing.Queue()
+    supervisor = Supervisor(
+        record_commands,
+        [(token, number, 0) for number, token in enumerate(TOKENS[:100])],
+        workers=2,
+        args=(events,),
+        restart_delay=0.2
+    )
+    supervisor.start()
+    try:
+        assigned = {}
+        for name, command, payload in drain(events):
+            assert command == ADD
+            assigned[name] = {entry[0] for entry in payload}
+        assert assigned['shard-0'] | assigned['shard-1'] == set(TOKENS[:100])
+        assert not assigned['shard-0'] & assigned['shard-1']
+        supervisor._processes['shard-0'].kill()
+        supervisor.watch(duration=1)
+        received = drain(events)
+        assert received[0] == ('shard-1', ADD, [
+            (token, TOKENS.index(token), 0)
+            for token in sorted(assigned['shard-0'])
+        ])
+        assert ('shard-1', REMOVE, sorted(assigned['shard-0'])) in received
+        assert supervisor.assignment() == assigned
+    finally:
+        supervisor.stop()
+
+
+def test_moved_tenants_keep_their_cursors(tmp_path):
+    events = multiprocessing.Queue()
+    supervisor = Supervisor(
+        track_cursors,
+        [(token, number, 0) for number, token in enumerate(TOKENS[:20])],
+        workers=2,
+        args=(events, str(tmp_path / 'state.db')),
+        restart_delay=0.5
+    )
+    supervisor.start()
+    try:
+        drain(events)
+        moved = supervisor.assignment()['shard-0']
+        supervisor._processes['shard-0'].kill()
+        supervisor.watch(duration=1.5)
+        received = drain(events)
+        [taken] = [
+            payload for name, command, payload in received
+            if name == 'shard-1' and command == ADD
+        ]
+        [released] = [
+            payload for name, command, payload in received
+            if name == 'shard-1' and command == REMOVE
+        ]
+        [returned] = [
+            payload for name, command, payload in received
+            if name == 'shard-0' and command == ADD
+        ]
+        assert set(taken) == set(released) == set(returned) == moved
+        assert all(taken[token] > 0 for token in moved)
+        assert returned == released
+    finally:
+        supervisor.stop()
+
+
+def test_failed_removal_is_logged_and_not_acknowledged(caplog):
+    inbox, done = queue.Queue(), queue.Queue()
+
+    class LockedEngine:
+
+        async def release_tenants(self, tokens):
+            raise sqlite3.OperationalError('database is locked')
+
+    async def scenario():
+        follow_assignments(inbox, LockedEngine(), 'shard-0', done)
+        inbox.put((REMOVE, ['token-0']))
+        for _ in range(100):
+            if caplog.records:
+                return
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert 'database is locked' in caplog.text
+    assert done.empty()
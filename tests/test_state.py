@@ -0,0 +1,36 @@
+import pytest
+
+from state import open_backend, StateStore
+from tenants import TenantRegistry
+
+
+@pytest.mark.parametrize('kind', ['sqlite', 'file'])
+def test_state_survives_restart(tmp_path, kind):
+    path = str(tmp_path / f'state.{kind}')
+    registry = TenantRegistry()
+    first = registry.add('token-1', 1, from_date=100)
+    second = registry.add('token-2', 2, from_date=100)
+    store = StateStore(open_backend(kind, path))
+    store.mark(first)
+    first.from_date, first.last_report = 200, 'Работа взята на проверку'
+    store.mark(second)
+    assert store.flush() == 2
+    assert store.flush() == 0
+    store.backend.close()
+
+    restarted = TenantRegistry()
+    restarted.add('token-1', 1, from_date=999)
+    restarted.add('token-2', 2, from_date=999)
+    restarted.add('token-3', 3, from_date=999)
+    store = StateStore(open_backend(kind, path))
+    assert store.restore(restarted) == 2
+    store.backend.close()
+    assert restarted.get('token-1').from_date == 200
+    assert restarted.get('token-1').last_report == 'Работа взята на проверку'
+    assert restarted.get('token-2').from_date == 100
+    assert restarted.get('token-3').from_date == 999
+
+
+def test_unknown_backend(tmp_path):
+    with pytest.raises(ValueError):
+        open_backend('redis', str(tmp_path / 'state'))
@@ -0,0 +1,54 @@
+import pytest
+
+from exception import InvalidResponseException
+import homework
+from validate import ResponseValidator
+
+VALIDATOR = ResponseValidator(('approved', 'rejected'))
+
+
+def test_valid_response_has_no_problems():
+    assert VALIDATOR.problems({'homeworks': [
+        {'homework_name': 'hw', 'status': 'approved'},
+    ]}) == []
+    assert VALIDATOR.problems({'homeworks': []}) == []
+
+
+@pytest.mark.parametrize('response', [[], {}, {'homeworks': {}}])
+def test_envelope_problems(response):
+    assert len(VALIDATOR.problems(response)) == 1
+
+
+def test_reports_every_problem_at_once():
+    problems = VALIDATOR.problems({'homeworks': [
+        {'homework_name': 'hw0', 'status': 'approved'},
+        {'status': 'approved'},
+        {'homework_name': 'hw2', 'status': 'unknown'},
+        'hw3',
+        {'homework_name': 'hw4', 'status': ['approved']},
+        {},
+        {'homework_name': ['hw6'], 'status': 'approved'},
+        {'homework_name': 7, 'status': 'approved'},
+    ]})
+    assert problems == [
+        'у работы 1 нет ключа "homework_name"',
+        "у работы 2 неизвестный статус 'unknown'",
+        'работа 3 имеет тип str вместо словаря',
+        "у работы 4 неизвестный статус ['approved']",
+        'у работы 5 нет ключа "homework_name"',
+        'у работы 5 нет ключа "status"',
+        'у работы 6 название имеет тип list вместо строки',
+    ]
+
+
+def test_validate_response_raises_with_all_problems():
+    with pytest.raises(InvalidResponseException) as error:
+        homework.validate_response({'homeworks': [{}, {'status': 'x'}]})
+    assert str(error.value).count('нет ключа') == 3
+
+
+def test_unhashable_name_is_rejected_before_rendering():
+    with pytest.raises(InvalidResponseException, match='название'):
+        homework.validate_response({'homeworks': [
+            {'homework_name': {'name': 'hw'}, 'status': 'approved'},
+        ]})
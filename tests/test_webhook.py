@@ -0,0 +1,159 @@
+import asyncio
+from functools import partial
+import socket
+
+import requests
+
+import homework
+from tenants import TenantRegistry
+from webhook import start_webhook_server, WebhookHandler
+
+SECRET = 'secret'
+
+
+class FakeOutbox:
+
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, chat_id, message):
+        self.messages.append((chat_id, message))
+        return True
+
+
+def post_events(events):
+    registry, outbox = TenantRegistry(), FakeOutbox()
+    registry.add('token', 7)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        server = start_webhook_server(
+            0,
+            partial(homework.ingest, registry, outbox),
+            loop,
+            secret=SECRET,
+            host='127.0.0.1'
+        )
+        url = f'http://127.0.0.1:{server.server_address[1]}/webhook'
+        responses = []
+        try:
+            for token, secret, payload in events:
+                responses.append(await loop.run_in_executor(None, partial(
+                    requests.post,
+                    url,
+                    json=payload,
+                    headers={
+                        'Authorization': f'OAuth {token}',
+                        'X-Webhook-Secret': secret,
+                    },
+                    timeout=5
+                )))
+        finally:
+            server.shutdown()
+            server.server_close()
+        return responses
+
+    responses = asyncio.run(scenario())
+    return [response.status_code for response in responses], outbox.messages
+
+
+def test_event_is_notified_once():
+    payload = {'homeworks': [{'homework_name': 'hw', 'status': 'approved'}]}
+    codes, messages = post_events([
+        ('token', SECRET, payload),
+        ('token', SECRET, payload),
+    ])
+    assert codes == [200, 200]
+    assert messages == [(7, homework.parse_status(payload['homeworks'][0]))]
+
+
+def test_invalid_events_are_rejected_without_notifications():
+    codes, messages = post_events([
+        ('token', SECRET, {'homeworks': [
+            {'homework_name': 'hw1', 'status': 'approved'},
+            {'homework_name': 'hw2', 'status': 'unknown'},
+        ]}),
+        ('token', SECRET, {'homeworks': {}}),
+        ('token', SECRET, {}),
+        ('other', SECRET, {'homeworks': []}),
+        ('token', 'wrong', {'homeworks': []}),
+    ])
+    assert codes == [400, 400, 400, 404, 401]
+    assert messages == []
+
+
+def test_event_racing_poll_is_notified_once():
+    payload = {'homeworks': [{'homework_name': 'hw', 'status': 'approved'}]}
+    registry = TenantRegistry()
+    tenant = registry.add('token', 7)
+
+    class SlowOutbox(FakeOutbox):
+
+        async def send(self, chat_id, message):
+            await asyncio.sleep(0.01)
+            return await super().send(chat_id, message)
+
+    class Client:
+        cache = None
+
+        async def get(self, tenant):
+            return dict(payload, current_date=5)
+
+    outbox = SlowOutbox()
+
+    async def race():
+        await asyncio.gather(
+            homework.poll_tenant(tenant, Client(), outbox),
+            homework.ingest(registry, outbox, 'token', payload)
+        )
+
+    asyncio.run(race())
+    assert outbox.messages == [
+        (7, homework.parse_status(payload['homeworks'][0]))
+    ]
+
+
+def send_raw(content_length):
+    registry, outbox = TenantRegistry(), FakeOutbox()
+    registry.add('token', 7)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        server = start_webhook_server(
+            0, partial(homework.ingest, registry, outbox), loop,
+            secret=SECRET, host='127.0.0.1'
+        )
+        request = (
+            'POST /webhook HTTP/1.1\r\n'
+            'Authorization: OAuth token\r\n'
+            f'X-Webhook-Secret: {SECRET}\r\n'
+            f'Content-Length: {content_length}\r\n\r\n'
+        ).encode()
+
+        def exchange():
+            with socket.create_connection(
+                server.server_address, timeout=5
+            ) as connection:
+                connection.sendall(request)
+                return connection.recv(1024).split(b'\r\n')[0]
+
+        try:
+            return await loop.run_in_executor(None, exchange)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    return asyncio.run(scenario()), outbox.messages
+
+
+def test_negative_content_length_is_rejected():
+    status, messages = send_raw(-1)
+    assert status == b'HTTP/1.1 400 Bad Request'
+    assert messages == []
+
+
+def test_silent_client_is_timed_out(monkeypatch):
+    monkeypatch.setattr(WebhookHandler, 'timeout', 0.2)
+    status, messages = send_raw(10)
+    assert status == b'HTTP/1.1 408 Request Timeout'
+    assert messages == []
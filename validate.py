@@ -0,0 +1,75 @@
+NOT_A_DICT = 'ответ API имеет тип {} вместо словаря'
+MISSING_HOMEWORKS = 'в ответе API нет ключа "homeworks"'
+NOT_A_LIST = 'ключ "homeworks" имеет тип {} вместо списка'
+ITEM_NOT_A_DICT = 'работа {} имеет тип {} вместо словаря'
+ITEM_MISSING_KEY = 'у работы {} нет ключа "{}"'
+ITEM_UNKNOWN_STATUS = 'у работы {} неизвестный статус {!r}'
+ITEM_INVALID_NAME = 'у работы {} название имеет тип {} вместо строки'
+NAME_TYPES = (str, int)
+
+
+class ResponseValidator:
+    """Проверяет ответ API целиком, включая каждую работу.
+    Работа корректна, если это словарь с ключами required, статусом из
+    statuses и названием homework_name — строкой или числом, которое можно
+    подставить в уведомление и запомнить в кеше отрисовки. Корректный
+    ответ проверяется одним проходом без исключений, и только если он
+    некорректен, второй проход собирает описания всех проблем.
+    """
+
+    def __init__(self, statuses, required=('homework_name', 'status')):
+        """Допустимые статусы statuses и обязательные поля работы required."""
+        self.statuses = frozenset(statuses)
+        self.required = frozenset(required)
+
+    def _valid(self, homeworks):
+        required, statuses = self.required, self.statuses
+        return all(
+            isinstance(item, dict)
+            and required <= item.keys()
+            and isinstance(item['status'], str)
+            and item['status'] in statuses
+            and isinstance(item.get('homework_name', ''), NAME_TYPES)
+            for item in homeworks
+        )
+
+    def item_valid(self, item):
+        """Проверяет одну работу."""
+        return self._valid((item,))
+
+    def item_problems(self, index, item):
+        """Возвращает описания проблем работы item с номером index."""
+        if not isinstance(item, dict):
+            return [ITEM_NOT_A_DICT.format(index, type(item).__name__)]
+        problems = [
+            ITEM_MISSING_KEY.format(index, key)
+            for key in sorted(self.required - item.keys())
+        ]
+        status = item.get('status')
+        if 'status' in item and (
+            not isinstance(status, str) or status not in self.statuses
+        ):
+            problems.append(ITEM_UNKNOWN_STATUS.format(index, status))
+        name = item.get('homework_name', '')
+        if not isinstance(name, NAME_TYPES):
+            problems.append(
+                ITEM_INVALID_NAME.format(index, type(name).__name__)
+            )
+        return problems
+
+    def problems(self, response):
+        """Возвращает список описаний всех проблем ответа response."""
+        if not isinstance(response, dict):
+            return [NOT_A_DICT.format(type(response).__name__)]
+        if 'homeworks' not in response:
+            return [MISSING_HOMEWORKS]
+        homeworks = response['homeworks']
+        if not isinstance(homeworks, list):
+            return [NOT_A_LIST.format(type(homeworks).__name__)]
+        if self._valid(homeworks):
+            return []
+        return [
+            problem
+            for index, item in enumerate(homeworks)
+            for problem in self.item_problems(index, item)
+        ]
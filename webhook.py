@@ -0,0 +1,156 @@
+import asyncio
+import hmac
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+
+from exception import InvalidResponseException, UnknownTenantException
+
+WEBHOOK_PATH = '/webhook'
+SECRET_HEADER = 'X-Webhook-Secret'
+MAX_BODY_SIZE = 1024 * 1024
+READ_TIMEOUT = 10
+INVALID_JSON = 'Тело запроса не является JSON'
+INVALID_SECRET = 'Неверный секрет вебхука'
+MISSING_TOKEN = 'Не передан токен подписчика в заголовке Authorization'
+BODY_TOO_LARGE = 'Тело запроса больше {} байт'
+INVALID_LENGTH = 'Неверная длина тела запроса: {}'
+READ_TIMED_OUT = 'Тело запроса не получено за {} с'
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Принимает события о статусах работ по адресу /webhook.
+    Тело запроса — JSON в формате ответа API Практикума, подписчик
+    определяется по токену в заголовке Authorization так же, как в
+    запросах к API. Событие обрабатывается в цикле событий сервера, код
+    ответа сообщает, принято ли оно. Соединение, по которому данные не
+    приходят timeout секунд, закрывается.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    timeout = READ_TIMEOUT
+
+    def send_json(self, data, status=200):
+        """Отправляет data в JSON с кодом status."""
+        body = json.dumps(data, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def fail(self, status, error):
+        """Отвечает кодом ошибки status с описанием error."""
+        self.server.count(status)
+        self.send_json({'ok': False, 'error': str(error)}, status)
+
+    def read_payload(self):
+        """Читает тело запроса и возвращает разобранный JSON.
+        Отрицательная или нечисловая длина тела отклоняется с ValueError,
+        не дожидаясь, пока клиент закроет соединение.
+        """
+        length = self.headers.get('Content-Length', '0')
+        if not length.isdigit():
+            self.close_connection = True
+            raise ValueError(INVALID_LENGTH.format(length))
+        length = int(length)
+        if length > MAX_BODY_SIZE:
+            raise OverflowError(BODY_TOO_LARGE.format(MAX_BODY_SIZE))
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            raise ValueError(INVALID_JSON)
+
+    def authorized(self):
+        """Проверяет секрет вебхука, если он задан."""
+        secret = self.server.secret
+        return not secret or hmac.compare_digest(
+            self.headers.get(SECRET_HEADER, ''), secret
+        )
+
+    def request_token(self):
+        """Проверяет адрес и секрет запроса и возвращает токен подписчика.
+        Возвращает None, если запросу уже отправлен ответ с ошибкой.
+        """
+        if self.path != WEBHOOK_PATH:
+            self.fail(404, self.path)
+            return None
+        if not self.authorized():
+            self.fail(401, INVALID_SECRET)
+            return None
+        token = self.headers.get('Authorization', '').split()[-1:]
+        if not token:
+            self.fail(401, MISSING_TOKEN)
+            return None
+        return token[0]
+
+    def dispatch(self, token, payload):
+        """Обрабатывает событие в цикле событий сервера и отвечает."""
+        try:
+            result = asyncio.run_coroutine_threadsafe(
+                self.server.handle(token, payload), self.server.loop
+            ).result(self.server.wait_timeout)
+        except UnknownTenantException as error:
+            self.fail(404, error)
+        except (
+            InvalidResponseException, TypeError, KeyError, ValueError
+        ) as error:
+            self.fail(400, error)
+        except Exception as error:
+            self.fail(503, error)
+        else:
+            self.server.count(200)
+            self.send_json({'ok': True, 'result': result})
+
+    def do_POST(self):
+        """Передаёт событие обработчику сервера."""
+        token = self.request_token()
+        if token is None:
+            return
+        try:
+            payload = self.read_payload()
+        except OverflowError as error:
+            self.close_connection = True
+            self.fail(413, error)
+        except TimeoutError:
+            self.close_connection = True
+            self.fail(408, READ_TIMED_OUT.format(self.timeout))
+        except ValueError as error:
+            self.fail(400, error)
+        else:
+            self.dispatch(token, payload)
+
+    def log_message(self, format, *args):
+        """Не пишет в журнал каждый запрос."""
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """HTTP-сервер вебхука, передающий события в цикл событий loop.
+    handle(токен, данные) — сопрограмма обработки события, wait_timeout —
+    время ожидания её результата в секундах, count(код ответа) вызывается
+    на каждый запрос.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, handle, loop, secret=None, wait_timeout=30,
+                 count=None):
+        """Сервер на адресе address, передающий события handle в цикл loop."""
+        super().__init__(address, WebhookHandler)
+        self.handle = handle
+        self.loop = loop
+        self.secret = secret
+        self.wait_timeout = wait_timeout
+        self.count = count or (lambda status: None)
+
+
+def start_webhook_server(port, handle, loop, secret=None, wait_timeout=30,
+                         count=None, host='0.0.0.0'):
+    """Запускает вебхук в фоновом потоке и возвращает сервер."""
+    server = WebhookServer(
+        (host, port), handle, loop, secret, wait_timeout, count
+    )
+    threading.Thread(
+        target=server.serve_forever, name='webhook', daemon=True
+    ).start()
+    return server